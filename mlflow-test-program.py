@@ -1,8 +1,46 @@
+#!/usr/bin/env python3
+"""
+MLflow Tracking Test Program
+
+Without options, runs a smoke test against the tracking server: list
+experiments, create one with a run that logs a param, two metrics and an
+artifact, and list them again.
+
+--batch-benchmark logs the same runs once call by call and once through
+BatchedLogger, which buffers metrics, params and tags and sends them with
+log_batch from a background thread, and compares requests and wall time.
+
+--artifact-benchmark generates an artifact set (many small files or a few
+large ones), uploads it with log_artifact from 1, 4, 8 ... threads and with
+one log_artifacts directory upload, downloads it the same ways, and reports
+MB/s and files/s for each.
+
+--load-test simulates concurrent training runs (threads, or processes with
+--processes) and reports throughput and p50/p95/p99 latency per tracking
+API (create_run, log_metric, log_batch, search_experiments, ...):
+
+    python mlflow-test-program.py --tracking-uri http://127.0.0.1:5000 \\
+        --load-test --runs 32 --concurrency 8 --steps 100 --metrics-per-step 10
+
+A local stand-in server: mlflow server --backend-store-uri sqlite:///mlflow.db
+"""
+
+import argparse
+import atexit
+import json
+import math
 import os
-import mlflow
-from mlflow.exceptions import MlflowException
+import queue
 import random
+import sys
+import threading
 import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.exceptions import MlflowException
 
 # --- Configuration ---
 # Ensure these environment variables are set in your shell before running this script:
@@ -10,62 +48,703 @@ import time
 # export MLFLOW_TRACKING_PASSWORD="my-secure-mlflow-tracking-password"
 # (Replace with your actual admin password)
 
-MLFLOW_TRACKING_URI = "http://192.168.1.85:30800" # Your external NodePort URL
+DEFAULT_TRACKING_URI = "http://192.168.1.85:30800"  # Your external NodePort URL
+
+# Per-request limits of the log_batch API
+BATCH_MAX_METRICS = 1000
+BATCH_MAX_PARAMS = 100
+BATCH_MAX_TAGS = 100
+BATCH_MAX_ENTITIES = 1000
 
-# Set MLflow tracking URI
-os.environ["MLFLOW_TRACKING_URI"] = MLFLOW_TRACKING_URI
+# --artifact-set presets: (files, bytes per file)
+ARTIFACT_SETS = {
+    'small': (1000, 16 * 1024),
+    'large': (2, 1024 ** 3),
+}
+SIZE_SUFFIXES = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+WRITE_CHUNK_SIZE = 1 << 20
 
-print(f"Attempting to connect to MLflow Tracking Server at: {MLFLOW_TRACKING_URI}")
-print(f"Using username: {os.getenv('MLFLOW_TRACKING_USERNAME')}")
+# APIs in the order they are reported
+LOAD_TEST_APIS = ('create_run', 'log_metric', 'log_batch', 'search_experiments', 'set_terminated')
 
-try:
-    # --- Test 1: List experiments (Initial connection test) ---
-    print("\n--- Test 1: Listing existing experiments ---")
-    experiments = mlflow.search_experiments()
-    if experiments:
-        print("Existing Experiments:")
+
+def smoke_test(tracking_uri: str) -> int:
+    """The original one-shot connectivity test"""
+    print(f"Attempting to connect to MLflow Tracking Server at: {tracking_uri}")
+    print(f"Using username: {os.getenv('MLFLOW_TRACKING_USERNAME')}")
+
+    try:
+        # --- Test 1: List experiments (Initial connection test) ---
+        print("\n--- Test 1: Listing existing experiments ---")
+        experiments = mlflow.search_experiments()
+        if experiments:
+            print("Existing Experiments:")
+            for exp in experiments:
+                print(f"  - Name: {exp.name}, ID: {exp.experiment_id}, Lifecycle: {exp.lifecycle_stage}")
+        else:
+            print("No experiments found or unable to list experiments initially.")
+
+        # --- Test 2: Create a new experiment and log a run ---
+        experiment_name = f"MyTestExperiment-{int(time.time())}"
+        print(f"\n--- Test 2: Creating a new experiment: '{experiment_name}' ---")
+        new_experiment_id = mlflow.create_experiment(experiment_name)
+        print(f"Created experiment with ID: {new_experiment_id}")
+
+        print(f"\n--- Test 2.1: Logging a run in '{experiment_name}' ---")
+        with mlflow.start_run(experiment_id=new_experiment_id, run_name="test_run") as run:
+            print(f"Started run with ID: {run.info.run_id}")
+            mlflow.log_param("param1", "valueA")
+            mlflow.log_metric("metric1", random.random())
+            mlflow.log_metric("metric2", random.randint(1, 100))
+            print("Logged params and metrics.")
+
+            # Save a dummy artifact
+            artifact_path = "output.txt"
+            with open(artifact_path, "w") as f:
+                f.write("This is a test artifact.")
+            mlflow.log_artifact(artifact_path)
+            print(f"Logged artifact: {artifact_path}")
+            os.remove(artifact_path)  # Clean up dummy file
+
+        print("Run completed successfully.")
+
+        # --- Test 3: Re-list experiments to see the new one ---
+        print("\n--- Test 3: Re-listing experiments ---")
+        experiments = mlflow.search_experiments()
+        print("All Experiments (after creating new one):")
         for exp in experiments:
             print(f"  - Name: {exp.name}, ID: {exp.experiment_id}, Lifecycle: {exp.lifecycle_stage}")
+
+        print("\nMLflow client tests completed successfully!")
+        return 0
+
+    except MlflowException as e:
+        print(f"\nMLflow Error: {e}")
+        print("Please check your MLFLOW_TRACKING_URI, authentication credentials, "
+              "and ensure the MLflow server is running and accessible.")
+    except Exception as e:
+        print(f"\nAn unexpected error occurred: {e}")
+        print("Ensure all required Python packages are installed (mlflow, psycopg2-binary, boto3).")
+    return 1
+
+
+class LatencyLog:
+    """Latencies and error counts per API, recorded by one worker and merged afterwards"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.last_error: Dict[str, str] = {}
+
+    def call(self, api: str, function, *args, **kwargs):
+        """function(*args, **kwargs), timed under api; exceptions are counted and re-raised"""
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            self.errors[api] += 1
+            self.last_error[api] = f"{e.__class__.__name__}: {e}"[:200]
+            raise
+        finally:
+            self.latencies[api].append(time.perf_counter() - start)
+
+    def merge(self, other: 'LatencyLog'):
+        for api, values in other.latencies.items():
+            self.latencies[api].extend(values)
+        self.errors.update(other.errors)
+        self.last_error.update(other.last_error)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class BatchedLogger:
+    """Log a run's metrics, params and tags with log_batch from a background thread.
+
+    log_metric(), log_param() and set_tag() only queue the entry.  The
+    thread sends what is pending once max_batch entries have accumulated or
+    flush_interval seconds have passed, split to log_batch's limits.  The
+    queue holds at most max_queue entries: when it is full, callers block
+    until the thread catches up (backpressure) instead of buffering without
+    bound.  close() - called on leaving the with block, also on an
+    exception, and at interpreter exit - sends everything still queued and
+    raises the first failed request's error, if any.
+
+        with mlflow.start_run() as run, BatchedLogger(client, run.info.run_id) as logger:
+            logger.log_metric("loss", loss, step=step)
+    """
+
+    _STOP = object()
+
+    def __init__(self, client, run_id: str, max_batch: int = BATCH_MAX_METRICS, flush_interval: float = 5.0,
+                 max_queue: int = 10000):
+        self.client = client
+        self.run_id = run_id
+        self.max_batch = max(1, min(max_batch, BATCH_MAX_ENTITIES))
+        self.flush_interval = flush_interval
+        self.requests = 0
+        self.entries_sent = 0
+        self.error: Optional[Exception] = None
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"mlflow-batch-{run_id[:8]}", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> 'BatchedLogger':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+
+    def _put(self, kind: str, entry):
+        if self._closed:
+            raise RuntimeError("BatchedLogger is closed")
+        self._queue.put((kind, entry))
+
+    def log_metric(self, key: str, value: float, step: int = 0, timestamp: Optional[int] = None):
+        self._put('metrics', Metric(key, value, timestamp if timestamp is not None else int(time.time() * 1000), step))
+
+    def log_param(self, key: str, value):
+        self._put('params', Param(key, str(value)))
+
+    def set_tag(self, key: str, value):
+        self._put('tags', RunTag(key, str(value)))
+
+    def flush(self):
+        """Send everything queued so far and wait for it"""
+        done = threading.Event()
+        self._put('flush', done)
+        done.wait()
+
+    def close(self):
+        """Flush, stop the thread and raise the first send error"""
+        if not self._closed:
+            self._closed = True
+            atexit.unregister(self.close)
+            self._queue.put((self._STOP, None))
+            self._thread.join()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        pending: Dict[str, list] = {'metrics': [], 'params': [], 'tags': []}
+        count = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                kind, entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = entry = None
+            if kind in pending:
+                pending[kind].append(entry)
+                count += 1
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if count < self.max_batch:
+                    continue
+            if count:
+                self._send(pending)
+                pending = {'metrics': [], 'params': [], 'tags': []}
+                count = 0
+            deadline = None
+            if kind == 'flush':
+                entry.set()
+            elif kind is self._STOP:
+                return
+
+    def _send(self, pending: Dict[str, list]):
+        metrics, params, tags = pending['metrics'], pending['params'], pending['tags']
+        while metrics or params or tags:
+            batch_params, params = params[:BATCH_MAX_PARAMS], params[BATCH_MAX_PARAMS:]
+            batch_tags, tags = tags[:BATCH_MAX_TAGS], tags[BATCH_MAX_TAGS:]
+            room = min(BATCH_MAX_METRICS, BATCH_MAX_ENTITIES - len(batch_params) - len(batch_tags))
+            batch_metrics, metrics = metrics[:room], metrics[room:]
+            try:
+                self.client.log_batch(self.run_id, metrics=batch_metrics, params=batch_params, tags=batch_tags)
+                self.entries_sent += len(batch_metrics) + len(batch_params) + len(batch_tags)
+            except Exception as e:
+                # The client already retried; keep the first error for close()
+                if self.error is None:
+                    self.error = e
+            self.requests += 1
+
+
+def simulate_run(tracking_uri: str, experiment_id: str, index: int, steps: int, metrics_per_step: int,
+                 batch: bool, search_every: int) -> LatencyLog:
+    """One simulated training run: create it, log every step, finish it.
+
+    Per-call runs log each metric with log_metric; batch runs send a step's
+    metrics in one log_batch.  Every search_every steps the run also lists
+    experiments, like a dashboard polling the server.
+    """
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient(tracking_uri=tracking_uri)
+    log = LatencyLog()
+    try:
+        run = log.call('create_run', client.create_run, experiment_id, run_name=f"load-test-{index}")
+    except Exception:
+        return log
+    run_id = run.info.run_id
+    names = [f"metric_{m}" for m in range(metrics_per_step)]
+    status = "FINISHED"
+    for step in range(steps):
+        timestamp = int(time.time() * 1000)
+        try:
+            if batch:
+                metrics = [Metric(name, random.random(), timestamp, step) for name in names]
+                log.call('log_batch', client.log_batch, run_id, metrics=metrics)
+            else:
+                for name in names:
+                    log.call('log_metric', client.log_metric, run_id, name, random.random(), timestamp, step)
+            if search_every and (step + 1) % search_every == 0:
+                log.call('search_experiments', client.search_experiments, max_results=100)
+        except Exception:
+            status = "FAILED"
+    try:
+        log.call('set_terminated', client.set_terminated, run_id, status)
+    except Exception:
+        pass
+    return log
+
+
+def run_load_test(args) -> Dict:
+    """Run args.runs simulated runs, args.concurrency at a time, and summarize the latencies"""
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from mlflow.tracking import MlflowClient
+
+    experiment_name = args.experiment or f"LoadTest-{int(time.time())}"
+    client = MlflowClient(tracking_uri=args.tracking_uri)
+    experiment_id = _experiment_id(client, experiment_name)
+    modes = {'metric': [False], 'batch': [True], 'both': [False, True]}[args.log_mode]
+
+    executor_class = ProcessPoolExecutor if args.processes else ThreadPoolExecutor
+    total = LatencyLog()
+    start = time.perf_counter()
+    with executor_class(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(simulate_run, args.tracking_uri, experiment_id, index, args.steps,
+                                   args.metrics_per_step, modes[index % len(modes)], args.search_every)
+                   for index in range(args.runs)]
+        for future in futures:
+            total.merge(future.result())
+    elapsed = time.perf_counter() - start
+
+    apis = {}
+    for api in LOAD_TEST_APIS:
+        values = sorted(total.latencies.get(api, ()))
+        if not values:
+            continue
+        apis[api] = {
+            'calls': len(values),
+            'errors': total.errors.get(api, 0),
+            'calls_per_sec': len(values) / elapsed,
+            'p50_ms': percentile(values, 50) * 1000,
+            'p95_ms': percentile(values, 95) * 1000,
+            'p99_ms': percentile(values, 99) * 1000,
+            'max_ms': values[-1] * 1000,
+            'last_error': total.last_error.get(api),
+        }
+    requests_made = sum(api['calls'] for api in apis.values())
+    metrics_logged = apis.get('log_metric', {}).get('calls', 0) \
+        + apis.get('log_batch', {}).get('calls', 0) * args.metrics_per_step
+    return {
+        'tracking_uri': args.tracking_uri,
+        'experiment': experiment_name,
+        'runs': args.runs,
+        'concurrency': args.concurrency,
+        'workers': 'processes' if args.processes else 'threads',
+        'steps': args.steps,
+        'metrics_per_step': args.metrics_per_step,
+        'log_mode': args.log_mode,
+        'elapsed_sec': elapsed,
+        'requests': requests_made,
+        'requests_per_sec': requests_made / elapsed,
+        'metrics_per_sec': metrics_logged / elapsed,
+        'apis': apis,
+    }
+
+
+def benchmark_run(client, experiment_id: str, name: str, steps: int, metrics_per_step: int, params: int,
+                  step_time: float, logger_options: Optional[Dict]) -> Tuple[float, int, str]:
+    """Log one run call by call (logger_options None) or through a BatchedLogger.
+
+    Returns wall time, requests sent and the run id.  step_time seconds of
+    simulated training per step is where a background logger overlaps.
+    """
+    start = time.perf_counter()
+    run_id = client.create_run(experiment_id, run_name=name).info.run_id
+    requests_made = 2  # create_run and set_terminated
+    names = [f"metric_{m}" for m in range(metrics_per_step)]
+    if logger_options is None:
+        for p in range(params):
+            client.log_param(run_id, f"param_{p}", p)
+        client.set_tag(run_id, "logging", "per-call")
+        requests_made += params + 1
+        for step in range(steps):
+            if step_time:
+                time.sleep(step_time)
+            for metric in names:
+                client.log_metric(run_id, metric, random.random(), step=step)
+            requests_made += len(names)
     else:
-        print("No experiments found or unable to list experiments initially.")
-
-    # --- Test 2: Create a new experiment and log a run ---
-    experiment_name = f"MyTestExperiment-{int(time.time())}"
-    print(f"\n--- Test 2: Creating a new experiment: '{experiment_name}' ---")
-    new_experiment_id = mlflow.create_experiment(experiment_name)
-    print(f"Created experiment with ID: {new_experiment_id}")
-
-    print(f"\n--- Test 2.1: Logging a run in '{experiment_name}' ---")
-    with mlflow.start_run(experiment_id=new_experiment_id, run_name="test_run") as run:
-        print(f"Started run with ID: {run.info.run_id}")
-        mlflow.log_param("param1", "valueA")
-        mlflow.log_metric("metric1", random.random())
-        mlflow.log_metric("metric2", random.randint(1, 100))
-        print("Logged params and metrics.")
-
-        # Save a dummy artifact
-        artifact_path = "output.txt"
-        with open(artifact_path, "w") as f:
-            f.write("This is a test artifact.")
-        mlflow.log_artifact(artifact_path)
-        print(f"Logged artifact: {artifact_path}")
-        os.remove(artifact_path) # Clean up dummy file
-
-    print("Run completed successfully.")
-
-    # --- Test 3: Re-list experiments to see the new one ---
-    print("\n--- Test 3: Re-listing experiments ---")
-    experiments = mlflow.search_experiments()
-    print("All Experiments (after creating new one):")
-    for exp in experiments:
-        print(f"  - Name: {exp.name}, ID: {exp.experiment_id}, Lifecycle: {exp.lifecycle_stage}")
-
-    print("\nMLflow client tests completed successfully!")
-
-except MlflowException as e:
-    print(f"\nMLflow Error: {e}")
-    print("Please check your MLFLOW_TRACKING_URI, authentication credentials, "
-          "and ensure the MLflow server is running and accessible.")
-except Exception as e:
-    print(f"\nAn unexpected error occurred: {e}")
-    print("Ensure all required Python packages are installed (mlflow, psycopg2-binary, boto3).")
+        with BatchedLogger(client, run_id, **logger_options) as logger:
+            for p in range(params):
+                logger.log_param(f"param_{p}", p)
+            logger.set_tag("logging", "batched")
+            for step in range(steps):
+                if step_time:
+                    time.sleep(step_time)
+                for metric in names:
+                    logger.log_metric(metric, random.random(), step=step)
+        requests_made += logger.requests
+    client.set_terminated(run_id)
+    return time.perf_counter() - start, requests_made, run_id
+
+
+def run_batch_benchmark(args) -> Dict:
+    """Same runs logged per call and batched; checks the batched runs hold every entry"""
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient(tracking_uri=args.tracking_uri)
+    experiment_name = args.experiment or f"BatchBenchmark-{int(time.time())}"
+    experiment_id = _experiment_id(client, experiment_name)
+    logger_options = {'max_batch': args.batch_size, 'flush_interval': args.flush_interval,
+                      'max_queue': args.max_queue}
+    report = {
+        'tracking_uri': args.tracking_uri,
+        'experiment': experiment_name,
+        'runs': args.runs,
+        'steps': args.steps,
+        'metrics_per_step': args.metrics_per_step,
+        'params': args.params,
+        'step_time_sec': args.step_time,
+        'logger': logger_options,
+        'modes': {},
+    }
+    entries = args.runs * (args.steps * args.metrics_per_step + args.params + 1)
+    for mode, options in (('per-call', None), ('batched', logger_options)):
+        elapsed = 0.0
+        requests_made = 0
+        run_ids = []
+        for index in range(args.runs):
+            seconds, made, run_id = benchmark_run(client, experiment_id, f"{mode}-{index}", args.steps,
+                                                  args.metrics_per_step, args.params, args.step_time, options)
+            elapsed += seconds
+            requests_made += made
+            run_ids.append(run_id)
+        report['modes'][mode] = {
+            'elapsed_sec': elapsed,
+            'requests': requests_made,
+            'entries_per_sec': entries / elapsed if elapsed else 0.0,
+        }
+    # The last step of every metric and all params must have arrived
+    run = client.get_run(run_ids[-1])
+    history = client.get_metric_history(run_ids[-1], "metric_0") if args.steps else []
+    report['verified'] = (len(run.data.params) == args.params
+                          and len(run.data.metrics) == (args.metrics_per_step if args.steps else 0)
+                          and len(history) == args.steps)
+    per_call, batched = report['modes']['per-call'], report['modes']['batched']
+    report['request_reduction'] = per_call['requests'] / batched['requests']
+    report['speedup'] = per_call['elapsed_sec'] / batched['elapsed_sec']
+    return report
+
+
+def print_batch_benchmark(report: Dict):
+    print(f"\nMLflow logging benchmark against {report['tracking_uri']} (experiment '{report['experiment']}')")
+    print(f"{report['runs']} runs x {report['steps']} steps x {report['metrics_per_step']} metrics "
+          f"+ {report['params']} params, {report['step_time_sec']}s training per step\n")
+    print(f"{'mode':<10} {'requests':>9} {'wall s':>8} {'entries/s':>10}")
+    for mode, stats in report['modes'].items():
+        print(f"{mode:<10} {stats['requests']:>9,} {stats['elapsed_sec']:>8.2f} {stats['entries_per_sec']:>10.1f}")
+    print(f"\nBatched logging: {report['request_reduction']:.1f}x fewer requests, "
+          f"{report['speedup']:.1f}x faster")
+    if not report['verified']:
+        print("⚠️  The last batched run is missing metrics or params")
+
+
+def parse_size(text: str) -> int:
+    """Bytes from '512', '16K', '64M' or '2G'"""
+    text = text.strip().upper().rstrip('B')
+    suffix = text[-1:] if text[-1:] in SIZE_SUFFIXES else ''
+    return int(float(text[:len(text) - len(suffix)]) * SIZE_SUFFIXES[suffix])
+
+
+def generate_artifacts(directory: str, files: int, file_size: int) -> Dict[str, str]:
+    """Write files of file_size incompressible bytes; returns name -> sha256.
+
+    Files are written and hashed one chunk at a time, so multi-GB artifacts
+    never sit in memory.
+    """
+    import hashlib
+    block = os.urandom(WRITE_CHUNK_SIZE)
+    hashes = {}
+    for index in range(files):
+        name = f"artifact-{index:05d}.bin"
+        digest = hashlib.sha256()
+        remaining = file_size
+        # Vary the first bytes so every file has its own content
+        chunk = index.to_bytes(8, 'big') + block[8:]
+        with open(os.path.join(directory, name), 'wb') as f:
+            while remaining > 0:
+                part = chunk[:remaining]
+                f.write(part)
+                digest.update(part)
+                remaining -= len(part)
+                chunk = block
+        hashes[name] = digest.hexdigest()
+    return hashes
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file, streamed from disk through one reused buffer"""
+    import hashlib
+    digest = hashlib.sha256()
+    buffer = bytearray(WRITE_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+    return digest.hexdigest()
+
+
+def _parallel(function, items: List, workers: int) -> float:
+    """Wall time of function(item) for every item on a pool of workers threads"""
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() re-raises the first failure
+        list(executor.map(function, items))
+    return time.perf_counter() - start
+
+
+def _verify_download(paths: Dict[str, str], hashes: Dict[str, str]) -> bool:
+    """Every artifact was downloaded (name -> local path) with its original content"""
+    return all(name in paths and os.path.isfile(paths[name]) and file_sha256(paths[name]) == digest
+               for name, digest in hashes.items())
+
+
+def run_artifact_benchmark(args) -> Dict:
+    """Upload and download one artifact set per concurrency level, then as a directory"""
+    import shutil
+    import tempfile
+    from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+    from mlflow.tracking import MlflowClient
+
+    client = MlflowClient(tracking_uri=args.tracking_uri)
+    experiment_name = args.experiment or f"ArtifactBenchmark-{int(time.time())}"
+    experiment_id = _experiment_id(client, experiment_name)
+    files, file_size = ARTIFACT_SETS[args.artifact_set]
+    files = args.files or files
+    file_size = parse_size(args.file_size) if args.file_size else file_size
+    total_bytes = files * file_size
+    levels = sorted({int(level) for level in args.concurrency_levels.split(',')})
+
+    work = tempfile.mkdtemp(prefix="mlflow-artifacts-", dir=args.work_dir)
+    results = []
+    try:
+        source = os.path.join(work, "source")
+        os.mkdir(source)
+        start = time.perf_counter()
+        hashes = generate_artifacts(source, files, file_size)
+        generate_sec = time.perf_counter() - start
+        names = sorted(hashes)
+
+        def record(operation: str, workers: Optional[int], elapsed: float, verified: Optional[bool] = None):
+            results.append({
+                'operation': operation,
+                'concurrency': workers,
+                'elapsed_sec': elapsed,
+                'mb_per_sec': total_bytes / 1e6 / elapsed if elapsed else 0.0,
+                'files_per_sec': files / elapsed if elapsed else 0.0,
+                'verified': verified,
+            })
+
+        for workers in levels:
+            run = client.create_run(experiment_id, run_name=f"artifacts-{workers}-threads")
+            run_id = run.info.run_id
+            # Per-file transfers go straight to the run's artifact store (S3/MinIO, proxied
+            # HTTP or a local directory); client.download_artifacts() would add a get_run each
+            repository = get_artifact_repository(run.info.artifact_uri)
+            record('upload log_artifact', workers, _parallel(
+                lambda name: repository.log_artifact(os.path.join(source, name), "files"), names, workers))
+            target = os.path.join(work, f"download-{workers}")
+            os.mkdir(target)
+            paths = {}
+
+            def download(name: str):
+                paths[name] = repository.download_artifacts(f"files/{name}", target)
+
+            record('download', workers, _parallel(download, names, workers), _verify_download(paths, hashes))
+            shutil.rmtree(target)
+            client.set_terminated(run_id)
+
+        run_id = client.create_run(experiment_id, run_name="artifacts-directory").info.run_id
+        start = time.perf_counter()
+        client.log_artifacts(run_id, source, "files")
+        record('upload log_artifacts (directory)', None, time.perf_counter() - start)
+        target = os.path.join(work, "download-directory")
+        os.mkdir(target)
+        start = time.perf_counter()
+        directory = client.download_artifacts(run_id, "files", target)
+        record('download (directory)', None, time.perf_counter() - start,
+               _verify_download({name: os.path.join(directory, name) for name in names}, hashes))
+        client.set_terminated(run_id)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    return {
+        'tracking_uri': args.tracking_uri,
+        'experiment': experiment_name,
+        'files': files,
+        'file_size': file_size,
+        'total_bytes': total_bytes,
+        'generate_sec': generate_sec,
+        'peak_rss_mb': _peak_rss_mb(),
+        'results': results,
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process; stays far below total_bytes for large files"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def print_artifact_benchmark(report: Dict):
+    print(f"\nMLflow artifact benchmark against {report['tracking_uri']} (experiment '{report['experiment']}')")
+    print(f"{report['files']:,} files x {report['file_size'] / 1e6:,.2f} MB = {report['total_bytes'] / 1e6:,.1f} MB "
+          f"(generated in {report['generate_sec']:.1f}s), peak RSS "
+          + (f"{report['peak_rss_mb']:.0f} MB\n" if report['peak_rss_mb'] is not None else "n/a\n"))
+    print(f"{'operation':<34} {'threads':>7} {'wall s':>8} {'MB/s':>9} {'files/s':>9}  verified")
+    for result in report['results']:
+        threads = result['concurrency'] if result['concurrency'] is not None else '-'
+        verified = {True: 'yes', False: 'NO', None: ''}[result['verified']]
+        print(f"{result['operation']:<34} {threads:>7} {result['elapsed_sec']:>8.2f} {result['mb_per_sec']:>9.1f} "
+              f"{result['files_per_sec']:>9.1f}  {verified}")
+
+
+def _experiment_id(client, name: str) -> str:
+    experiment = client.get_experiment_by_name(name)
+    return experiment.experiment_id if experiment else client.create_experiment(name)
+
+
+def print_load_test(report: Dict):
+    print(f"\nMLflow load test against {report['tracking_uri']} (experiment '{report['experiment']}')")
+    print(f"{report['runs']} runs x {report['steps']} steps x {report['metrics_per_step']} metrics, "
+          f"{report['concurrency']} {report['workers']}, log mode {report['log_mode']}\n")
+    print(f"{'API':<20} {'calls':>8} {'errors':>7} {'calls/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for api, stats in report['apis'].items():
+        print(f"{api:<20} {stats['calls']:>8,} {stats['errors']:>7,} {stats['calls_per_sec']:>9.1f} "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    print(f"\n{report['requests']:,} requests in {report['elapsed_sec']:.1f}s: "
+          f"{report['requests_per_sec']:.1f} requests/s, {report['metrics_per_sec']:.1f} metrics/s")
+    for api, stats in report['apis'].items():
+        if stats['errors']:
+            print(f"⚠️  {api}: {stats['errors']} errors, last: {stats['last_error']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description='Smoke test and load test for the MLflow tracking server',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--tracking-uri', default=os.getenv('MLFLOW_TRACKING_URI', DEFAULT_TRACKING_URI),
+                        help=f'Tracking server URI (default: $MLFLOW_TRACKING_URI or {DEFAULT_TRACKING_URI})')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--load-test', action='store_true', help='Simulate concurrent training runs instead of the smoke test')
+    mode.add_argument('--batch-benchmark', action='store_true',
+                      help='Compare per-call logging with BatchedLogger on the same runs')
+    mode.add_argument('--artifact-benchmark', action='store_true',
+                      help='Measure parallel artifact upload and download throughput')
+    parser.add_argument('--runs', type=int, default=16, help='Simulated runs (default: 16)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Runs logging at the same time (default: 8)')
+    parser.add_argument('--processes', action='store_true', help='Run workers as processes instead of threads')
+    parser.add_argument('--steps', type=int, default=50, help='Training steps per run (default: 50)')
+    parser.add_argument('--metrics-per-step', type=int, default=5, help='Metrics logged per step (default: 5)')
+    parser.add_argument('--log-mode', choices=['metric', 'batch', 'both'], default='both',
+                        help='log_metric per metric, one log_batch per step, or half the runs each (default: both)')
+    parser.add_argument('--search-every', type=int, default=10, metavar='N',
+                        help='Call search_experiments every N steps of each run, 0 = never (default: 10)')
+    parser.add_argument('--params', type=int, default=10, help='Params per run in --batch-benchmark (default: 10)')
+    parser.add_argument('--step-time', type=float, default=0.0, metavar='SECONDS',
+                        help='Simulated training time per step in --batch-benchmark (default: 0)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_MAX_METRICS, metavar='N',
+                        help=f'BatchedLogger: send once N entries are pending (default: {BATCH_MAX_METRICS})')
+    parser.add_argument('--flush-interval', type=float, default=5.0, metavar='SECONDS',
+                        help='BatchedLogger: send pending entries at least this often (default: 5)')
+    parser.add_argument('--max-queue', type=int, default=10000, metavar='N',
+                        help='BatchedLogger: entries queued before logging calls block (default: 10000)')
+    parser.add_argument('--artifact-set', choices=sorted(ARTIFACT_SETS), default='small',
+                        help='Artifacts of --artifact-benchmark: 1000 x 16K files or 2 x 1G files (default: small)')
+    parser.add_argument('--files', type=int, metavar='N', help='Override the number of files of the artifact set')
+    parser.add_argument('--file-size', metavar='SIZE', help='Override the file size of the artifact set, e.g. 64M or 4G')
+    parser.add_argument('--concurrency-levels', default='1,4,8', metavar='LIST',
+                        help='Upload/download threads to measure, comma-separated (default: 1,4,8)')
+    parser.add_argument('--work-dir', metavar='DIR', help='Where artifacts are generated and downloaded (default: system temp)')
+    parser.add_argument('--experiment', metavar='NAME', help='Experiment for the runs (default: a new one per invocation)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    # Set MLflow tracking URI
+    os.environ["MLFLOW_TRACKING_URI"] = args.tracking_uri
+    mlflow.set_tracking_uri(args.tracking_uri)
+    if not (args.load_test or args.batch_benchmark or args.artifact_benchmark):
+        return smoke_test(args.tracking_uri)
+
+    # set_terminated would print (and fetch) every run's URL
+    os.environ.setdefault("MLFLOW_SUPPRESS_PRINTING_URL_TO_STDOUT", "true")
+    if args.runs < 1 or args.concurrency < 1 or args.steps < 0 or args.metrics_per_step < 1:
+        parser.error('--runs, --concurrency and --metrics-per-step must be positive, --steps not negative')
+    if args.batch_size < 1 or args.max_queue < 1 or args.flush_interval <= 0:
+        parser.error('--batch-size, --max-queue and --flush-interval must be positive')
+    if args.artifact_benchmark:
+        try:
+            if (args.file_size and parse_size(args.file_size) <= 0) or (args.files is not None and args.files < 1) \
+                    or (min(int(level) for level in args.concurrency_levels.split(',')) < 1):
+                raise ValueError
+        except ValueError:
+            parser.error('--files, --file-size and --concurrency-levels must be positive numbers')
+    try:
+        if args.artifact_benchmark:
+            report = run_artifact_benchmark(args)
+            print_artifact_benchmark(report)
+            failed = any(result['verified'] is False for result in report['results'])
+        elif args.batch_benchmark:
+            report = run_batch_benchmark(args)
+            print_batch_benchmark(report)
+            failed = not report['verified']
+        else:
+            report = run_load_test(args)
+            print_load_test(report)
+            failed = any(stats['errors'] for stats in report['apis'].values())
+    except MlflowException as e:
+        print(f"MLflow Error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4405 @@
+#!/usr/bin/env python3
+"""
+Ansible Execution Tree Parser
+Converts Ansible playbook output into a hierarchical tree structure with advanced analytics
+
+Features:
+- Visual tree structure of Ansible execution
+- Performance timing analysis
+- Success rate tracking
+- JSON output for CI/CD integration
+- Slack/Teams webhook notifications
+- Historical trend analysis
+- Export to multiple formats (markdown, json, html)
+- Native input from the json/jsonl stdout callbacks
+
+Library use (parse-ansible-execution.py is the command line wrapper):
+
+    from ansible_execution_parser import parse
+    parser = parse("deploy.log")
+    print(parser.metrics['success_rate'])
+
+Modules only some code paths need (sqlite3, html, mmap, concurrent.futures,
+threading, orjson, requests) are imported where they are used, so a plain
+parse starts quickly.
+"""
+
+import io
+import os
+import re
+import sys
+import glob
+import json
+import time
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import (TYPE_CHECKING, BinaryIO, Callable, Iterable, Iterator, List, Dict, NamedTuple, Optional, Set,
+                    TextIO, Tuple, Union)
+from functools import lru_cache, partial
+
+if TYPE_CHECKING:
+    import argparse
+    import mmap
+    import queue
+    from concurrent.futures import Future
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """orjson when installed (fast path for JSON export and jsonl input), imported on first use"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+# Display decorations, rendered lazily by ExecutionNode.name
+NODE_LABELS = {
+    'play': '🎭 PLAY: ',
+    'task': '📋 TASK: ',
+    'handler': '🔧 HANDLER: ',
+    'include': '📦 INCLUDE: ',
+    'recap': '📊 ',
+}
+STATUS_EMOJI = {'ok': '✅', 'changed': '🔄', 'failed': '❌', 'fatal': '❌', 'unreachable': '🔌'}
+
+# Multi-line result payloads (-v and above print "=> {" followed by indented
+# JSON and a closing "}" in column 0)
+FAILED_STATUSES = ('failed', 'fatal', 'unreachable')
+DEFAULT_PAYLOAD_BYTES = 64 * 1024
+PAYLOAD_SUMMARY_KEYS = ('msg', 'rc', 'stderr')
+# Top-level "key": value line of Ansible's 4-space indented JSON
+PAYLOAD_FIELD_RE = re.compile(r'^    "(\w+)": (.*?),?$', re.M)
+
+class ExecutionNode:
+    """A node of the execution tree.
+
+    Result leaves make up the bulk of a large run, so nodes use __slots__,
+    share an empty tuple until their first child is added, and keep only the
+    raw title; the decorated display name is rendered on access.
+    """
+    __slots__ = ('level', 'title', 'status', 'host', 'changed', 'failed', 'skipped', 'details',
+                 'start_time', 'end_time', 'duration', 'task_type', 'children')
+    
+    def __init__(self, level: int, title: str, status: str = "", host: str = "",
+                 changed: bool = False, failed: bool = False, skipped: bool = False,
+                 details: str = "", start_time: Optional[datetime] = None,
+                 end_time: Optional[datetime] = None, duration: Optional[float] = None,
+                 task_type: str = "", children: Optional[List['ExecutionNode']] = None):
+        self.level = level
+        self.title = title
+        self.status = status
+        self.host = host
+        self.changed = changed
+        self.failed = failed
+        self.skipped = skipped
+        self.details = details
+        self.start_time = start_time
+        self.end_time = end_time
+        self.duration = duration
+        self.task_type = task_type  # play, task, handler, etc.
+        self.children = children if children is not None else ()
+    
+    def add_child(self, node: 'ExecutionNode'):
+        if not self.children:
+            self.children = [node]
+        else:
+            self.children.append(node)
+    
+    @property
+    def name(self) -> str:
+        """Decorated display name (emoji + kind/status + title/host)"""
+        if self.task_type == "result":
+            return f"{STATUS_EMOJI.get(self.status, '⏭️')} {self.status.upper()}: {self.host}"
+        if self.task_type == "item":
+            return f"{STATUS_EMOJI.get(self.status, '⏭️')} {self.status.upper()}: {self.host} (item={self.title})"
+        if self.task_type == "recap_host":
+            return f"{'❌' if self.failed else '✅'} {self.title}"
+        return NODE_LABELS.get(self.task_type, '') + self.title
+    
+    def to_dict(self) -> Dict:
+        """Convert to dictionary for JSON serialization (including children)"""
+        result = self.fields()
+        result['children'] = [child.to_dict() for child in self.children]
+        return result
+    
+    def fields(self) -> Dict:
+        """JSON-ready fields of this node alone"""
+        return {
+            'level': self.level,
+            'name': self.name,
+            'status': self.status,
+            'host': self.host,
+            'changed': self.changed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'details': self.details,
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'duration': self.duration,
+            'task_type': self.task_type,
+        }
+    
+    @property
+    def payload(self) -> Optional[Dict]:
+        """Result payload (the JSON after "=>") decoded on access.
+        
+        Not cached: callers that need several fields should read it once.
+        None when there are no details, they are not a JSON object, or a
+        multi-line payload was truncated.
+        """
+        details = self.details
+        if not details or details[0] != '{':
+            return None
+        try:
+            value = json.loads(details)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+    
+    def payload_fields(self, keys: Iterable[str] = PAYLOAD_SUMMARY_KEYS) -> Dict:
+        """Top-level payload fields such as msg, rc or stderr.
+        
+        Falls back to scanning the top-level lines of a truncated multi-line
+        payload, so failure messages near its start are still found.
+        """
+        payload = self.payload
+        if payload is not None:
+            return {key: payload[key] for key in keys if key in payload}
+        fields = {}
+        if self.details.startswith('{\n'):
+            wanted = set(keys)
+            for key, value in PAYLOAD_FIELD_RE.findall(self.details):
+                if key in wanted and key not in fields:
+                    try:
+                        fields[key] = json.loads(value)
+                    except ValueError:
+                        fields[key] = value
+        return fields
+    
+    def detail_summary(self, limit: int) -> str:
+        """Details for display: short ones verbatim, payloads as msg/rc/stderr"""
+        details = self.details
+        if not details:
+            return ""
+        multi_line = '\n' in details
+        if len(details) < limit and not multi_line:
+            return details
+        if not (self.failed or multi_line):
+            return ""
+        fields = self.payload_fields()
+        parts = []
+        if fields.get('msg'):
+            parts.append(str(fields['msg']).strip().splitlines()[0])
+        if fields.get('rc') not in (None, ""):
+            parts.append(f"rc={fields['rc']}")
+        if fields.get('stderr'):
+            parts.append(f"stderr: {str(fields['stderr']).strip().splitlines()[0]}")
+        summary = " | ".join(parts)
+        return summary if len(summary) <= limit else summary[:limit - 1] + "…"
+
+# Line classification
+#
+# Every line used to be run through six inline re.match() calls in a fixed
+# order, so the common case (a line that matches nothing, e.g. "task path:"
+# or SSH debug output at -vv) paid for all six.  Lines are now dispatched on
+# their first character to the (precompiled) patterns that can possibly
+# match; recap lines are only tried when they contain "ok=".
+PLAY_RE = re.compile(r'PLAY \[(.*?)\]')
+TASK_RE = re.compile(r'TASK \[(.*?)\]')
+HANDLER_RE = re.compile(r'RUNNING HANDLER \[(.*?)\]')
+INCLUDED_RE = re.compile(r'included: (.*?) for (.*)')
+RESULT_RE = re.compile(r'(ok|changed|failed|skipping|fatal): \[(.*?)\]')
+RECAP_HOST_RE = re.compile(
+    r'(\S+)\s+:\s+ok=(\d+)\s+changed=(\d+)\s+unreachable=(\d+)\s+failed=(\d+)'
+    r'(?:\s+skipped=(\d+))?(?:\s+rescued=(\d+))?(?:\s+ignored=(\d+))?'
+)
+IGNORING_RE = re.compile(r'\.\.\.ignoring$')
+RECAP_PREFIX = 'PLAY RECAP'
+
+# Timing sources embedded in the log itself:
+# - profile_tasks/timer callback line printed at every task start, e.g.
+#   "Saturday 17 October 2026  10:01:02 +0000 (0:00:03.123)       0:01:05.456 ****"
+#   (wall clock, duration of the previous task, elapsed since playbook start)
+# - ANSIBLE_LOG_PATH prefix on every line, e.g.
+#   "2026-10-17 10:01:02,123 p=4242 u=ansible n=ansible | TASK [...]"
+# - timer callback summary "Playbook run took 0 days, 0 hours, 5 minutes, 3 seconds"
+PROFILE_RE = re.compile(
+    r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+'
+    r'(\d{1,2}\s+\w+\s+\d{4})\s+(\d{2}:\d{2}:\d{2})\s+([+-]\d{4})\s+'
+    r'\((\d+):(\d{2}):(\d{2}(?:\.\d+)?)\)\s+(\d+):(\d{2}):(\d{2}(?:\.\d+)?)'
+)
+LOG_PATH_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(\d{3}) p=\d+ u=\S+ n=\S+ (?:[A-Z]+ ?)?\| ?(.*)'
+)
+TIMER_RE = re.compile(r'Playbook run took (\d+) days, (\d+) hours, (\d+) minutes, (\d+) seconds')
+
+# First character -> ordered (kind, pattern) candidates
+LINE_DISPATCH = {
+    'P': (('play', PLAY_RE), ('timer', TIMER_RE)),
+    'T': (('task', TASK_RE), ('profile', PROFILE_RE)),
+    'R': (('handler', HANDLER_RE),),
+    'i': (('include', INCLUDED_RE),),
+    'o': (('result', RESULT_RE),),
+    'c': (('result', RESULT_RE),),
+    'f': (('result', RESULT_RE),),
+    's': (('result', RESULT_RE),),
+    'M': (('profile', PROFILE_RE),),
+    'W': (('profile', PROFILE_RE),),
+    'F': (('profile', PROFILE_RE),),
+    'S': (('profile', PROFILE_RE),),
+    '.': (('ignoring', IGNORING_RE),),
+}
+
+def _hms_to_seconds(hours: str, minutes: str, seconds: str) -> float:
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def parse_log_timestamp(value: str) -> datetime:
+    """Parse a timestamp found in Ansible output into a naive datetime.
+
+    Accepts ISO 8601 strings as written by the json callback
+    ("2026-10-17T10:01:02.123456Z") and ANSIBLE_LOG_PATH style
+    "2026-10-17 10:01:02,123".  Timezone information is dropped: every
+    timing source Ansible writes uses the control node's clock, so naive
+    values from different sources remain comparable.
+    """
+    value = value.strip().replace(',', '.')
+    if value.endswith('Z'):
+        value = value[:-1]
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+def log_utc_offset(value: str) -> Optional[timedelta]:
+    """The UTC offset an ISO 8601 log timestamp carries, or None for local time"""
+    value = value.strip().replace(',', '.')
+    if value.endswith('Z'):
+        return timedelta(0)
+    return datetime.fromisoformat(value).utcoffset()
+
+def classify_line(line: str) -> Optional[Tuple[str, Optional['re.Match']]]:
+    """Classify a stripped, non-empty log line.
+
+    Returns a ``(kind, match)`` tuple where kind is one of ``play``, ``task``,
+    ``handler``, ``include``, ``result``, ``ignoring``, ``recap``,
+    ``recap_host``, ``profile`` or ``timer``, or None when the line carries nothing the parser is interested in.
+    """
+    candidates = LINE_DISPATCH.get(line[0])
+    if candidates:
+        for kind, pattern in candidates:
+            match = pattern.match(line)
+            if match:
+                return kind, match
+        if line.startswith(RECAP_PREFIX):
+            return 'recap', None
+    if 'ok=' in line:
+        match = RECAP_HOST_RE.match(line)
+        if match:
+            return 'recap_host', match
+    return None
+
+SLOWEST_TASKS_LIMIT = 10
+
+def _json_encoder(indent: Optional[int]):
+    """Return a value -> JSON text encoder, preferring orjson when available"""
+    orjson = _orjson()
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return lambda value: orjson.dumps(value, option=option).decode()
+    if indent:
+        return lambda value: json.dumps(value, indent=indent, ensure_ascii=False)
+    return lambda value: json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+# Structured input: ANSIBLE_STDOUT_CALLBACK=json writes one document at the
+# end of the run; the jsonl callback writes one event object per line as it
+# happens.  Both are turned into the same (kind, value) records, which the
+# parser's _on_json_<kind> handlers turn into the usual tree and metrics.
+JSONL_EVENTS = {
+    'v2_playbook_on_play_start': 'play',
+    'v2_playbook_on_task_start': 'task',
+    'v2_playbook_on_handler_task_start': 'handler',
+    'v2_runner_on_ok': 'result',
+    'v2_runner_on_failed': 'result',
+    'v2_runner_on_skipped': 'result',
+    'v2_runner_on_unreachable': 'result',
+    'v2_playbook_on_stats': 'stats',
+}
+# Authoritative status of a jsonl runner event; ok events are ok or changed
+JSONL_STATUS = {
+    'v2_runner_on_failed': 'failed',
+    'v2_runner_on_skipped': 'skipping',
+    'v2_runner_on_unreachable': 'unreachable',
+}
+JSON_WHITESPACE_RE = re.compile(r'[ \t\r\n]*')
+
+def detect_input_format(lines: Iterable[str]) -> Tuple[str, Iterator[str]]:
+    """Peek at the input and tell which callback wrote it.
+    
+    Returns ``('text' | 'json' | 'jsonl', lines)`` where lines yields the
+    peeked lines again followed by the rest.  Blank lines and bracketed
+    warnings ("[WARNING]: ...") before the first real line are skipped.
+    """
+    lines = iter(lines)
+    peeked = []
+    input_format = 'text'
+    for line in lines:
+        peeked.append(line)
+        stripped = line.strip()
+        if not stripped or (stripped[0] == '[' and len(peeked) < 1000):
+            continue
+        if stripped[0] == '{':
+            try:
+                record = json.loads(stripped)
+            except ValueError:
+                record = None
+            input_format = 'jsonl' if isinstance(record, dict) and '_event' in record else 'json'
+        break
+    return input_format, itertools.chain(peeked, lines)
+
+class _JsonScanner:
+    """Pull scanner over JSON text arriving as a sequence of lines.
+    
+    Containers are entered one token at a time while values are decoded
+    whole with JSONDecoder.raw_decode, so only the value being decoded has
+    to be buffered.  A value cut off at the end of the buffer is retried
+    after reading more input; the read size doubles with the buffer, which
+    keeps retries linear in the value's size.
+    """
+    def __init__(self, lines: Iterable[str]):
+        self._lines = iter(lines)
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Read more input, dropping what was consumed; False at end of input"""
+        if self.eof:
+            return False
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        want = max(65536, len(self.buffer))
+        pieces = []
+        size = 0
+        for line in self._lines:
+            # live_lines() yields lines without their newline
+            pieces.append(line if line.endswith('\n') else line + '\n')
+            size += len(line)
+            if size >= want:
+                break
+        else:
+            self.eof = True
+        self.buffer += ''.join(pieces)
+        return bool(pieces)
+    
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, "" at end of input"""
+        while True:
+            self.pos = JSON_WHITESPACE_RE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+    
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON callback output: expected {char!r}, found {found[:1]!r}")
+        self.pos += 1
+    
+    def skip_to(self, char: str):
+        """Skip whole lines until one starts with char (e.g. warnings before the document)"""
+        while self.peek() not in (char, ""):
+            newline = self.buffer.find('\n', self.pos)
+            while newline < 0 and self._fill():
+                newline = self.buffer.find('\n', self.pos)
+            self.pos = len(self.buffer) if newline < 0 else newline + 1
+    
+    def value(self):
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number ending the buffer may continue in the next line
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+    
+    def members(self) -> Iterator[str]:
+        """Yield the keys of the object just entered; the caller consumes each value"""
+        first = True
+        while True:
+            if self.peek() == '}':
+                self.pos += 1
+                return
+            if not first:
+                self.expect(',')
+            first = False
+            key = self.value()
+            self.expect(':')
+            yield key
+    
+    def elements(self) -> Iterator[None]:
+        """Yield once per element of the array just entered; the caller consumes it"""
+        first = True
+        while True:
+            if self.peek() == ']':
+                self.pos += 1
+                return
+            if not first:
+                self.expect(',')
+            first = False
+            yield None
+
+def _stats_records(stats: Dict, timestamp: Optional[str] = None) -> Iterator[Tuple[str, object]]:
+    yield 'recap', timestamp
+    for host in sorted(stats):
+        yield 'recap_host', (host, stats[host])
+
+def json_callback_records(lines: Iterable[str]) -> Iterator[Tuple[str, object]]:
+    """Records of a json callback document, decoded one task entry at a time"""
+    scanner = _JsonScanner(lines)
+    scanner.skip_to('{')
+    scanner.expect('{')
+    for key in scanner.members():
+        if key == 'plays':
+            scanner.expect('[')
+            for _ in scanner.elements():
+                scanner.expect('{')
+                for play_key in scanner.members():
+                    if play_key == 'play':
+                        yield 'play', scanner.value()
+                    elif play_key == 'tasks':
+                        scanner.expect('[')
+                        for _ in scanner.elements():
+                            entry = scanner.value()
+                            task = entry.get('task') or {}
+                            yield 'task', task
+                            for host, result in (entry.get('hosts') or {}).items():
+                                yield 'result', (host, result, None, None)
+                            yield 'task_end', task
+                    else:
+                        scanner.value()
+        elif key == 'stats':
+            yield from _stats_records(scanner.value())
+        else:
+            scanner.value()
+
+def jsonl_callback_records(lines: Iterable[str]) -> Iterator[Tuple[str, object]]:
+    """Records of jsonl callback output; lines that are not JSON objects are skipped"""
+    orjson = _orjson()
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] != '{':
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            continue
+        event = record.get('_event')
+        kind = JSONL_EVENTS.get(event)
+        if kind == 'result':
+            timestamp = record.get('_timestamp')
+            status = JSONL_STATUS.get(event)
+            for host, result in (record.get('hosts') or {}).items():
+                yield 'result', (host, result, timestamp, status)
+        elif kind == 'play':
+            yield 'play', record.get('play') or {}
+        elif kind in ('task', 'handler'):
+            yield kind, record.get('task') or {}
+        elif kind == 'stats':
+            yield from _stats_records(record.get('stats') or {}, record.get('_timestamp'))
+
+def _json_result_status(result: Dict) -> str:
+    if result.get('unreachable'):
+        return 'unreachable'
+    if result.get('failed'):
+        return 'failed'
+    if result.get('skipped'):
+        return 'skipping'
+    if result.get('changed'):
+        return 'changed'
+    return 'ok'
+
+def _item_label(item: Dict) -> str:
+    label = item.get('_ansible_item_label', item.get('item', ''))
+    return label if isinstance(label, str) else json.dumps(label, default=str)
+
+# Log input
+#
+# Archived logs are decompressed as a stream, never to a temp file.  Input is
+# cut into chunks of whole lines at the byte level.  For text logs only the
+# lines whose first byte some classifier dispatches on (or that continue a
+# payload: indented lines and "}") are kept, and they are decoded in one call
+# per chunk; at -vv that drops most SSH debug noise before it costs a str.
+# Each run of dropped lines becomes one empty line, which still ends a payload.
+# Recap host lines start with an arbitrary host name, so every line between
+# PLAY RECAP and the next PLAY header is kept.
+COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+)
+READ_CHUNK_SIZE = 1 << 20
+MMAP_MIN_BYTES = 8 << 20
+KEEP_FIRST_BYTES = frozenset(''.join(LINE_DISPATCH).encode() + b'0123456789} \t\r\f\v\x1b')
+# Colour codes written with ANSIBLE_FORCE_COLOR
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
+def _decompressed(raw, compression: str):
+    """Binary stream of raw's decompressed content"""
+    if compression == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=raw)
+    if compression == 'bz2':
+        import bz2
+        return bz2.BZ2File(raw)
+    if compression == 'xz':
+        import lzma
+        return lzma.LZMAFile(raw)
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.ZstdFile(raw)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd-compressed input needs the zstandard package (pip install zstandard)")
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+def _stream_chunks(stream) -> Iterator[bytes]:
+    """Chunks of whole lines read from a binary stream"""
+    rest = b''
+    for chunk in iter(partial(stream.read, READ_CHUNK_SIZE), b''):
+        cut = chunk.rfind(b'\n') + 1
+        if not cut:
+            rest += chunk
+            continue
+        yield rest + chunk[:cut]
+        rest = chunk[cut:]
+    if rest:
+        yield rest
+
+def _mapped_chunks(mapped: 'mmap.mmap') -> Iterator[bytes]:
+    """Chunks of whole lines sliced from a memory-mapped file"""
+    size = len(mapped)
+    pos = 0
+    while pos < size:
+        end = pos + READ_CHUNK_SIZE
+        if end < size:
+            cut = mapped.rfind(b'\n', pos, end)
+            end = cut + 1 if cut >= 0 else (mapped.find(b'\n', end) + 1 or size)
+        yield mapped[pos:end]
+        pos = end
+
+def _decode(data: bytes) -> str:
+    text = data.decode('utf-8', 'replace')
+    if '\x1b' in text:
+        text = ANSI_ESCAPE_RE.sub('', text)
+    return text
+
+def _all_lines(chunk: bytes) -> List[str]:
+    lines = _decode(chunk).split('\n')
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+def _text_lines(chunk: bytes, state: Dict) -> List[str]:
+    """The lines of chunk the text parser can act on, decoded.
+    
+    Each run of dropped lines leaves one empty line behind: like any line
+    that is neither indented nor "}", it ends an open multi-line payload, so
+    indented output after it is not appended to the previous result.
+    """
+    raw_lines = chunk.split(b'\n')
+    if not raw_lines[-1]:
+        raw_lines.pop()  # chunks end after a newline, not with an empty line
+    if not state['recap'] and b'PLAY RECAP' not in chunk:
+        kept = []
+        gap = False
+        for line in raw_lines:
+            if line and line[0] in KEEP_FIRST_BYTES:
+                kept.append(line)
+                gap = False
+            elif not gap:
+                kept.append(b'')
+                gap = True
+        return _decode(b'\n'.join(kept)).split('\n')
+    lines = []
+    gap = False
+    for raw in raw_lines:
+        if state['recap']:
+            line = _decode(raw)
+            if line.startswith('PLAY ['):
+                state['recap'] = False
+            lines.append(line)
+        elif raw and raw[0] in KEEP_FIRST_BYTES:
+            line = _decode(raw)
+            if line.startswith(RECAP_PREFIX):
+                state['recap'] = True
+            lines.append(line)
+            gap = False
+        elif not gap:
+            lines.append("")
+            gap = True
+    return lines
+
+def _line_batches(raw, seekable: bool) -> Iterator[List[str]]:
+    """Decoded lines of raw, one list per chunk"""
+    if not hasattr(raw, 'peek'):
+        raw = io.BufferedReader(raw)
+    head = raw.peek(8)[:8]
+    compression = next((name for magic, name in COMPRESSION_MAGIC if head.startswith(magic)), None)
+    mapped = None
+    if compression:
+        chunks = _stream_chunks(_decompressed(raw, compression))
+    elif seekable and os.fstat(raw.fileno()).st_size >= MMAP_MIN_BYTES:
+        import mmap
+        mapped = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ)
+        chunks = _mapped_chunks(mapped)
+    else:
+        chunks = _stream_chunks(raw)
+    try:
+        first = next(chunks, b'')
+        input_format, _ = detect_input_format(_all_lines(first))
+        chunks = itertools.chain([first], chunks)
+        if input_format != 'text':
+            yield from map(_all_lines, chunks)
+            return
+        state = {'recap': False}
+        for chunk in chunks:
+            yield _text_lines(chunk, state)
+    finally:
+        if mapped is not None:
+            mapped.close()
+
+def _source_batches(source) -> Iterator[List[str]]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as raw:
+            yield from _line_batches(raw, seekable=True)
+    else:
+        yield from _line_batches(source, seekable=False)
+
+def read_log(source: Union[str, 'os.PathLike', BinaryIO]) -> Iterator[str]:
+    """Lines of a log for the parser, from a path or a binary stream.
+    
+    gzip, bz2, xz and zstd input is recognised by its magic bytes and
+    decompressed on the fly; plain files of MMAP_MIN_BYTES or more are
+    scanned through mmap.  Text logs are filtered as described above, json/
+    jsonl callback output is passed through whole, and ANSI colour codes
+    are removed either way.
+    """
+    return itertools.chain.from_iterable(_source_batches(source))
+
+# Status accounting: one cell per (task, host) holding the final status of
+# that host's result as a small code.  Codes are ordered by precedence, so a
+# loop whose items were ok, changed and failed leaves "failed" in its cell.
+# "ignored" is only ever set explicitly, by the "...ignoring" line that
+# follows a failure under ignore_errors.
+STATUS_NAMES = ('none', 'skipped', 'ok', 'changed', 'failed', 'unreachable', 'ignored')
+SKIPPED_CODE, OK_CODE, CHANGED_CODE, FAILED_CODE, UNREACHABLE_CODE, IGNORED_CODE = range(1, len(STATUS_NAMES))
+STATUS_CODES = {'skipping': SKIPPED_CODE, 'ok': OK_CODE, 'changed': CHANGED_CODE,
+                'failed': FAILED_CODE, 'fatal': FAILED_CODE, 'unreachable': UNREACHABLE_CODE}
+# PLAY RECAP field -> matrix statuses it is made of.  Ansible counts ignored
+# failures as ok, and failures later rescued under "rescued" instead of
+# "failed"; a rescued failure still appears as failed in the log.
+RECAP_FIELDS = {
+    'ok': ('ok', 'changed', 'ignored'),
+    'changed': ('changed',),
+    'unreachable': ('unreachable',),
+    'failed': ('failed',),
+    'skipped': ('skipped',),
+    'ignored': ('ignored',),
+}
+
+class StatusMatrix:
+    """Final status of every (task, host) pair of a run, kept incrementally.
+
+    Hosts are interned to small ids and every task gets a bytearray row
+    indexed by host id, so a cell costs one byte.  Global and per-host
+    counts are adjusted on every cell change, making each update and every
+    rate O(1) regardless of how many results the run has.
+    """
+
+    def __init__(self):
+        self.host_ids: Dict[str, int] = {}
+        self.hosts: List[str] = []
+        self.rows: List[bytearray] = []
+        self.counts = [0] * len(STATUS_NAMES)
+        self.host_counts: List[List[int]] = []
+
+    def add_task(self) -> int:
+        """Open a row for a new task or handler and return its id"""
+        self.rows.append(bytearray())
+        return len(self.rows) - 1
+
+    def host_id(self, host: str) -> int:
+        host_id = self.host_ids.get(host)
+        if host_id is None:
+            host_id = self.host_ids[host] = len(self.hosts)
+            self.hosts.append(host)
+            self.host_counts.append([0] * len(STATUS_NAMES))
+        return host_id
+
+    def record(self, task_id: int, host: str, code: int, force: bool = False) -> int:
+        """Set a cell unless it already holds a status of higher precedence.
+
+        Returns the code the cell held before (0 when it was empty).
+        """
+        host_id = self.host_id(host)
+        row = self.rows[task_id]
+        if len(row) <= host_id:
+            row.extend(bytes(host_id + 1 - len(row)))
+        old = row[host_id]
+        if old == code or (old > code and not force):
+            return old
+        row[host_id] = code
+        host_counts = self.host_counts[host_id]
+        if old:
+            self.counts[old] -= 1
+            host_counts[old] -= 1
+        self.counts[code] += 1
+        host_counts[code] += 1
+        return old
+
+    def status(self, task_id: int, host: str) -> str:
+        host_id = self.host_ids.get(host)
+        row = self.rows[task_id]
+        return STATUS_NAMES[row[host_id] if host_id is not None and host_id < len(row) else 0]
+
+    @property
+    def cells(self) -> int:
+        """Number of (task, host) pairs that reported a result"""
+        return sum(self.counts) - self.counts[0]
+
+    def totals(self, host: Optional[str] = None) -> Dict[str, int]:
+        """Cell counts by status, for the whole run or a single host"""
+        if host is None:
+            counts = self.counts
+        elif host in self.host_ids:
+            counts = self.host_counts[self.host_ids[host]]
+        else:
+            counts = [0] * len(STATUS_NAMES)
+        return {name: counts[code] for code, name in enumerate(STATUS_NAMES) if code}
+
+    def host_failures(self, host: str) -> int:
+        counts = self.host_counts[self.host_id(host)]
+        return counts[FAILED_CODE] + counts[UNREACHABLE_CODE]
+
+    def reconcile(self, recap: Dict[str, Dict[str, int]]) -> List[Dict]:
+        """Compare the counted cells with PLAY RECAP totals, host by host.
+
+        Returns one entry per disagreeing host/field.  Failures that were
+        rescued are expected among the failed cells.
+        """
+        mismatches = []
+        for host in sorted(recap):
+            expected = recap[host]
+            counted = self.totals(host)
+            for field, statuses in RECAP_FIELDS.items():
+                if field not in expected:
+                    continue
+                want = expected[field]
+                if field == 'failed':
+                    want += expected.get('rescued', 0)
+                have = sum(counted[status] for status in statuses)
+                if have != want:
+                    mismatches.append({'host': host, 'field': field, 'counted': have, 'recap': want})
+        return mismatches
+
+def _success_rate(counts: Dict[str, int], total: int) -> float:
+    """Share of operations that neither failed nor found their host unreachable"""
+    if total <= 0:
+        return 100
+    return (total - counts.get('failed', 0) - counts.get('unreachable', 0)) / total * 100
+
+def _status_rates(counts: Dict[str, int], total: int) -> Dict[str, float]:
+    return {status: (count / total * 100 if total > 0 else 0.0) for status, count in counts.items()}
+
+class AnsibleExecutionParser:
+    # Replaced per instance by ParseProfiler.attach()
+    classify_line = staticmethod(classify_line)
+    
+    def __init__(self, streaming: bool = False, record_tasks: bool = False,
+                 payload_statuses: Optional[Iterable[str]] = FAILED_STATUSES,
+                 max_payload_bytes: int = DEFAULT_PAYLOAD_BYTES):
+        # In streaming mode nodes are not attached to the tree; events are
+        # queued for stream() and metrics are kept as bounded aggregates.
+        self.streaming = streaming
+        # (task, host, duration, status) rows kept for the run history in
+        # streaming mode; the tree already holds them otherwise
+        self._task_records: Optional[List[Tuple]] = [] if streaming and record_tasks else None
+        self._events: List[Dict] = []
+        self._slowest_heap: List[Tuple] = []
+        self._task_play: Dict[ExecutionNode, ExecutionNode] = {}  # keyed by node (identity), survives checkpoints
+        self._draining_play: Optional[ExecutionNode] = None
+        self._last_finished: Optional[ExecutionNode] = None
+        self.has_task_profile = False
+        self.runs: List[Dict] = []  # per-run summaries when built with from_runs()
+        self.profiler: Optional['ParseProfiler'] = None  # adds a "profile" section to the JSON report
+        # Called with every node parse_line() produces (live view, alerts)
+        self.listeners: List[Callable[[ExecutionNode], None]] = []
+        # Called with every task/handler once its timing is final (metrics export)
+        self.task_listeners: List[Callable[[ExecutionNode], None]] = []
+        self.root = ExecutionNode(0, "Ansible Playbook Execution", task_type="root")
+        self.current_play = None
+        self.current_task = None
+        self.current_role = None
+        self.start_time = datetime.now()
+        self.timestamps = {}  # Track task timing
+        # Log-derived clock; falls back to wall clock when the log has no timestamps
+        self.clock: Optional[datetime] = None
+        self.log_start: Optional[datetime] = None
+        self.has_log_timestamps = False
+        self.has_line_timestamps = False  # every line prefixed (ANSIBLE_LOG_PATH)
+        # UTC offset of the log clock, from the first timestamp that has one
+        # (callback "Z" times, profile_tasks "+0000"); None if none did
+        self.utc_offset: Optional[timedelta] = None
+        self.reported_duration: Optional[float] = None
+        self.previous_task: Optional[ExecutionNode] = None
+        self._task_start_pending = False
+        # Multi-line payloads are buffered (up to max_payload_bytes) only for
+        # results with these statuses; others are skipped without copying.
+        self.payload_statuses = frozenset(payload_statuses or ())
+        self.max_payload_bytes = max_payload_bytes
+        self._in_payload = False
+        self._payload_node: Optional[ExecutionNode] = None
+        self._payload_parts: List[str] = []
+        self._payload_size = 0
+        self._payload_truncated = 0
+        self.input_format = 'text'  # or json/jsonl, detected by parse()/stream()
+        # Exact per-(task, host) status accounting, checked against the recap
+        self.matrix = StatusMatrix()
+        self.recap: Dict[str, Dict[str, int]] = {}
+        self._task_id: Optional[int] = None
+        self._last_cell: Optional[Tuple[int, str]] = None
+        self._last_result: Optional[ExecutionNode] = None
+        self.metrics = {
+            'total_plays': 0,
+            'total_tasks': 0,
+            'total_hosts': set(),
+            'failed_tasks': 0,
+            'changed_tasks': 0,
+            'skipped_tasks': 0,
+            'total_duration': 0,
+            'slowest_tasks': [],
+            'failed_hosts': set(),
+            'performance_summary': {}
+        }
+        
+    def parse_line(self, line: str) -> Optional[ExecutionNode]:
+        if self._in_payload:
+            if line[:1] in (' ', '\t'):
+                self._payload_line(line)
+                return None
+            if line[:1] == '}':
+                self._payload_line(line)
+                self._end_payload()
+                return None
+            # Output interleaved before the closing brace: keep what we have
+            self._end_payload()
+        
+        line = line.strip()
+        
+        # Skip empty lines and separators
+        if not line or line[0] in '*=':
+            return None
+        
+        # ANSIBLE_LOG_PATH lines carry their own timestamp
+        if line[0].isdigit():
+            prefix_match = LOG_PATH_RE.match(line)
+            if prefix_match:
+                self._advance_clock(parse_log_timestamp(f"{prefix_match.group(1)},{prefix_match.group(2)}"))
+                self.has_line_timestamps = True
+                line = prefix_match.group(3).strip()
+                if not line or line[0] in '*=':
+                    return None
+            
+        classified = self.classify_line(line)
+        if classified is None:
+            return None
+        kind, match = classified
+        node = getattr(self, '_on_' + kind)(match, line)
+        if self.listeners and node is not None:
+            for listener in self.listeners:
+                listener(node)
+        return node
+    
+    def parse(self, lines: Iterable[str]):
+        """Parse a whole input, in whichever format it was written"""
+        for _ in self._nodes(lines):
+            pass
+    
+    def _nodes(self, lines: Iterable[str]) -> Iterator[Optional[ExecutionNode]]:
+        """Nodes produced by the input engine matching the detected format"""
+        self.input_format, lines = detect_input_format(lines)
+        return self._format_nodes(lines)
+    
+    def _format_nodes(self, lines: Iterable[str]) -> Iterator[Optional[ExecutionNode]]:
+        if self.input_format == 'text':
+            return map(self.parse_line, lines)
+        if self.input_format == 'jsonl':
+            return self._json_nodes(jsonl_callback_records(lines))
+        return self._json_nodes(json_callback_records(lines))
+    
+    def resume(self, lines: Iterable[str]):
+        """Parse more lines of an input whose format is already known.
+        
+        Used after restore_state(); streaming events are dropped.
+        """
+        events = self._events
+        for _ in self._format_nodes(lines):
+            if events:
+                events.clear()
+    
+    # Attributes not carried over by checkpoints: callbacks of this process
+    CHECKPOINT_TRANSIENT = ('listeners', 'task_listeners', '_events', 'profiler', 'classify_line',
+                            'parse_line', '_json_nodes', 'finalize_metrics')
+    
+    def checkpoint_state(self) -> Dict:
+        """Picklable parser state, taken before finalize_metrics()"""
+        return {key: value for key, value in self.__dict__.items() if key not in self.CHECKPOINT_TRANSIENT}
+    
+    def restore_state(self, state: Dict):
+        """Continue from a checkpoint_state(); listeners of this parser are kept"""
+        self.__dict__.update((key, value) for key, value in state.items() if key not in self.CHECKPOINT_TRANSIENT)
+    
+    def _options(self) -> Tuple:
+        return (self.streaming, self._task_records is not None, tuple(sorted(self.payload_statuses)),
+                self.max_payload_bytes)
+    
+    def _json_nodes(self, records: Iterable[Tuple[str, object]]) -> Iterator[Optional[ExecutionNode]]:
+        listeners = self.listeners
+        for kind, value in records:
+            node = getattr(self, '_on_json_' + kind)(value)
+            if listeners and node is not None:
+                for listener in listeners:
+                    listener(node)
+            yield node
+    
+    def stream(self, lines: Iterable[str]) -> Iterator[Dict]:
+        """Parse lines and yield execution events as they become known.
+        
+        Yields ``play``, ``task``, ``handler``, ``include``, ``result``,
+        ``recap`` and ``recap_host`` events when the line is read,
+        ``task_end``/``play_end`` events once their timing is final, and a
+        closing ``summary`` event carrying the finalized metrics.  Use with
+        ``AnsibleExecutionParser(streaming=True)`` so nothing is retained
+        beyond the current play.
+        """
+        events = self._events
+        for node in self._nodes(lines):
+            # A result whose payload is still being read is emitted by _end_payload()
+            if node is not None and not (self.streaming and node is self._payload_node):
+                events.append(self._node_event(node.task_type, node))
+            if events:
+                yield from events
+                events.clear()
+        self.finalize_metrics()
+        yield from events
+        events.clear()
+        yield {'event': 'summary', 'metrics': self.metrics}
+    
+    @staticmethod
+    def _node_event(event: str, node: ExecutionNode) -> Dict:
+        fields = {
+            'event': event,
+            'name': node.name,
+            'status': node.status,
+            'host': node.host,
+            'failed': node.failed,
+            'details': node.details,
+        }
+        # A task header is read before its start is known (the profile_tasks
+        # line follows it); its timing is reported by the task_end event
+        if event not in ('task', 'handler'):
+            fields['start_time'] = node.start_time.isoformat() if node.start_time else None
+            fields['end_time'] = node.end_time.isoformat() if node.end_time else None
+            fields['duration'] = node.duration
+        return fields
+    
+    def _attach(self, parent: Optional[ExecutionNode], node: ExecutionNode):
+        if parent is not None and not self.streaming:
+            parent.add_child(node)
+    
+    def _finish_task(self, node: Optional[ExecutionNode]):
+        """Called once a task's timing is final: task listeners, streaming bookkeeping"""
+        if node is None or node is self._last_finished:
+            return
+        self._last_finished = node
+        for listener in self.task_listeners:
+            listener(node)
+        if not self.streaming:
+            return
+        self._events.append(self._node_event('task_end', node))
+        if self._task_records is not None and node.duration is not None:
+            self._task_records.append((node.title, "", node.duration, 'failed' if node.failed else 'ok'))
+        if node.duration:
+            entry = {
+                'name': node.title,
+                'duration': node.duration,
+                'status': 'failed' if node.failed else 'success'
+            }
+            item = (node.duration, self.metrics['total_tasks'], entry)
+            if len(self._slowest_heap) < SLOWEST_TASKS_LIMIT:
+                heapq.heappush(self._slowest_heap, item)
+            else:
+                heapq.heappushpop(self._slowest_heap, item)
+        play = self._task_play.pop(node, None)
+        if play is not None:
+            if node.start_time and (play.start_time is None or node.start_time < play.start_time):
+                play.start_time = node.start_time
+            if node.end_time and (play.end_time is None or node.end_time > play.end_time):
+                play.end_time = node.end_time
+            if play is self._draining_play:
+                self._finish_play(play)
+    
+    def _finish_play(self, play: Optional[ExecutionNode]):
+        if play is None or play.task_type != "play":
+            return
+        if play is self._draining_play:
+            self._draining_play = None
+        if play.start_time and play.end_time:
+            play.duration = (play.end_time - play.start_time).total_seconds()
+        self._events.append(self._node_event('play_end', play))
+    
+    def _leave_play(self):
+        """Retire the current play, waiting for its last task's timing if needed"""
+        if not self.streaming or self.current_play is None:
+            return
+        task = self.current_task
+        if task is not None and self._task_play.get(task) is self.current_play:
+            self._draining_play = self.current_play
+        else:
+            self._finish_play(self.current_play)
+    
+    def _advance_clock(self, timestamp: datetime):
+        """Record a timestamp read from the log"""
+        if self.log_start is None:
+            self.log_start = timestamp
+        self.clock = timestamp
+        self.has_log_timestamps = True
+    
+    def _now(self) -> datetime:
+        """Current time: the latest log timestamp, or wall clock for untimed logs"""
+        if self.has_log_timestamps:
+            return self.clock
+        return datetime.now()
+    
+    @staticmethod
+    def _close_node(node: Optional[ExecutionNode], end_time: datetime):
+        if node and node.start_time and node.end_time is None:
+            node.end_time = end_time
+            node.duration = (end_time - node.start_time).total_seconds()
+    
+    def _start_task(self, node: ExecutionNode):
+        """Close the running task/handler and make node the current one"""
+        self._close_node(self.current_task, node.start_time)
+        if not self.has_task_profile:
+            self._finish_task(self.current_task)
+        self.previous_task = self.current_task
+        self.current_task = node
+        self.current_role = None
+        self._task_id = self.matrix.add_task()
+        self._task_start_pending = True
+        if self.streaming:
+            self._task_play[node] = self.current_play
+    
+    def _on_profile(self, match: 're.Match', line: str) -> None:
+        """Handle a profile_tasks/timer timestamp line.
+        
+        The line is printed when a task starts; the bracketed value is the
+        exact duration of the task that ran before it.
+        """
+        timestamp = datetime.strptime(
+            f"{' '.join(match.group(1).split())} {match.group(2)}", "%d %B %Y %H:%M:%S"
+        )
+        self._advance_clock(timestamp)
+        if self.utc_offset is None:
+            self.utc_offset = datetime.strptime(match.group(3), '%z').utcoffset()
+        self.has_task_profile = True
+        finished = self.previous_task if self._task_start_pending else self.current_task
+        if finished and finished.start_time:
+            finished.duration = _hms_to_seconds(match.group(4), match.group(5), match.group(6))
+            finished.end_time = finished.start_time + timedelta(seconds=finished.duration)
+            self._finish_task(finished)
+        if self._task_start_pending and self.current_task:
+            self.current_task.start_time = timestamp
+            self.current_task.end_time = None
+            self.current_task.duration = None
+        self._task_start_pending = False
+        self.reported_duration = _hms_to_seconds(match.group(7), match.group(8), match.group(9))
+        return None
+    
+    def _on_timer(self, match: 're.Match', line: str) -> None:
+        """Handle the timer callback's 'Playbook run took ...' summary"""
+        days, hours, minutes, seconds = (int(value) for value in match.groups())
+        self.reported_duration = float(((days * 24 + hours) * 60 + minutes) * 60 + seconds)
+        return None
+    
+    def _on_play(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle a PLAY [...] header"""
+        play_name = match.group(1)
+        if self.has_log_timestamps:
+            self._close_node(self.current_task, self.clock)
+        if not self.has_task_profile and self.has_log_timestamps:
+            self._finish_task(self.current_task)
+        self._leave_play()
+        node = ExecutionNode(1, play_name, task_type="play", start_time=self._now())
+        if self.streaming:
+            # Timing is rolled up from the play's tasks as they finish
+            node.start_time = None
+        self._attach(self.root, node)
+        self.current_play = node
+        self.metrics['total_plays'] += 1
+        return node
+    
+    def _on_task(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle a TASK [...] header"""
+        task_name = match.group(1)
+        node = ExecutionNode(2, task_name, task_type="task", start_time=self._now())
+        self._attach(self.current_play, node)
+        self._start_task(node)
+        self.metrics['total_tasks'] += 1
+        return node
+    
+    def _on_include(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle an 'included: <file> for <hosts>' line"""
+        role_path = match.group(1)
+        hosts = match.group(2)
+        role_name = role_path.split('/')[-1] if '/' in role_path else role_path
+        node = ExecutionNode(3, role_name, host=hosts, task_type="include")
+        self._attach(self.current_task, node)
+        self.current_role = node
+        return node
+    
+    def _on_result(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle a per-host task result (ok/changed/failed/skipping/fatal)"""
+        # Interned so the many result nodes of one host/status share a string
+        status = sys.intern(match.group(1))
+        host = sys.intern(match.group(2))
+        if status == 'fatal' and 'UNREACHABLE!' in line:
+            status = 'unreachable'
+        
+        # Update metrics
+        self.metrics['total_hosts'].add(host)
+        self._count_result(host, status)
+        
+        # Extract details if present
+        details = ""
+        if '=>' in line:
+            details = line.split('=>', 1)[1].strip()
+            if details == '{':
+                self._start_payload(status)
+                details = ""
+            
+        node = ExecutionNode(
+            4, 
+            host,
+            status=status,
+            host=host,
+            changed=(status == 'changed'),
+            failed=(status in FAILED_STATUSES),
+            skipped=(status == 'skipping'),
+            details=details,
+            task_type="result"
+        )
+        # Per-host timing is only known when every line is timestamped
+        if self.has_line_timestamps and self.current_task and self.current_task.start_time:
+            node.start_time = self.current_task.start_time
+            node.end_time = self.clock
+            node.duration = (node.end_time - node.start_time).total_seconds()
+            if self._task_records is not None:
+                self._task_records.append((self.current_task.title, host, node.duration, status))
+        if node.failed and self.current_task:
+            self.current_task.failed = True
+        
+        self._attach(self.current_role or self.current_task, node)
+        self._last_result = node
+        if self._in_payload and self._payload_parts:
+            self._payload_node = node
+        return node
+    
+    def _count_result(self, host: str, status: str):
+        """Record a result in the status matrix and keep the counters in step"""
+        if self._task_id is None:
+            self._task_id = self.matrix.add_task()
+        self.matrix.record(self._task_id, host, STATUS_CODES[status])
+        self._last_cell = (self._task_id, host)
+        self._sync_counts(host)
+    
+    def _sync_counts(self, host: str):
+        counts = self.matrix.counts
+        self.metrics['changed_tasks'] = counts[CHANGED_CODE]
+        self.metrics['failed_tasks'] = counts[FAILED_CODE] + counts[UNREACHABLE_CODE]
+        self.metrics['skipped_tasks'] = counts[SKIPPED_CODE]
+        if self.matrix.host_failures(host):
+            self.metrics['failed_hosts'].add(host)
+        else:
+            self.metrics['failed_hosts'].discard(host)
+    
+    def _on_ignoring(self, match: 're.Match', line: str) -> None:
+        """Handle the '...ignoring' line printed after a failure under ignore_errors"""
+        if self._last_cell is not None:
+            task_id, host = self._last_cell
+            if self.matrix.status(task_id, host) == 'failed':
+                self.matrix.record(task_id, host, IGNORED_CODE, force=True)
+                self._sync_counts(host)
+                # The result and its task stop counting as failed everywhere
+                # (slowest tasks, index, timeline, alerts), not just in the counts
+                node = self._last_result
+                if node is not None and node.failed:
+                    node.status = 'ignored'
+                    node.failed = False
+                task = self.current_task
+                if task is not None and task_id == self._task_id:
+                    row = self.matrix.rows[task_id]
+                    task.failed = FAILED_CODE in row or UNREACHABLE_CODE in row
+        return None
+    
+    def _add_recap(self, host: str, counts: Dict[str, int]):
+        """Accumulate a host's PLAY RECAP totals (a log may hold several runs)"""
+        totals = self.recap.setdefault(host, {})
+        for field, value in counts.items():
+            totals[field] = totals.get(field, 0) + value
+    
+    def _start_payload(self, status: str):
+        """Begin reading a multi-line payload, buffering it if status is captured"""
+        self._in_payload = True
+        self._payload_size = 0
+        self._payload_truncated = 0
+        if status in self.payload_statuses and self.max_payload_bytes > 0:
+            self._payload_parts = ['{']
+    
+    def _payload_line(self, line: str):
+        """Buffer one continuation line, counting what exceeds the byte budget"""
+        if not self._payload_parts:
+            return
+        line = line.rstrip('\r\n')
+        size = len(line.encode('utf-8', 'replace')) + 1
+        if self._payload_truncated or self._payload_size + size > self.max_payload_bytes:
+            self._payload_truncated += size
+            return
+        self._payload_size += size
+        self._payload_parts.append(line)
+    
+    def _end_payload(self):
+        """Store the buffered payload on its result node"""
+        node = self._payload_node
+        if node is not None:
+            node.details = '\n'.join(self._payload_parts)
+            if self._payload_truncated:
+                node.details += f"\n… [{self._payload_truncated} bytes truncated]"
+            if self.streaming:
+                self._events.append(self._node_event(node.task_type, node))
+        self._in_payload = False
+        self._payload_node = None
+        self._payload_parts = []
+    
+    def _on_handler(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle a RUNNING HANDLER [...] header"""
+        handler_name = match.group(1)
+        node = ExecutionNode(2, handler_name, task_type="handler", start_time=self._now())
+        self._attach(self.current_play, node)
+        self._start_task(node)
+        return node
+    
+    def _on_recap(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle the PLAY RECAP header"""
+        if self.has_log_timestamps:
+            self._close_node(self.current_task, self.clock)
+        if not self.has_task_profile and self.has_log_timestamps:
+            self._finish_task(self.current_task)
+        self._leave_play()
+        node = ExecutionNode(1, "PLAY RECAP", task_type="recap")
+        self._attach(self.root, node)
+        self.current_play = node
+        return node
+    
+    def _on_recap_host(self, match: 're.Match', line: str) -> ExecutionNode:
+        """Handle a per-host line of the PLAY RECAP"""
+        host = match.group(1)
+        ok = match.group(2)
+        changed = match.group(3)
+        unreachable = match.group(4)
+        failed = match.group(5)
+        counts = {'ok': int(ok), 'changed': int(changed), 'unreachable': int(unreachable), 'failed': int(failed)}
+        # skipped/rescued/ignored were added to the recap in later Ansible releases
+        for field, value in zip(('skipped', 'rescued', 'ignored'), match.groups()[5:]):
+            if value is not None:
+                counts[field] = int(value)
+        self._add_recap(host, counts)
+        
+        node = ExecutionNode(
+            2, 
+            f"{host}: OK={ok} CHANGED={changed} FAILED={failed}",
+            host=host,
+            failed=(failed != "0"),
+            task_type="recap_host"
+        )
+        self._attach(self.current_play, node)
+        return node
+    
+    def _json_time(self, value: Optional[str]) -> Optional[datetime]:
+        """Parse a callback timestamp, widening the run's time span to include it"""
+        if not value:
+            return None
+        timestamp = parse_log_timestamp(value)
+        if self.utc_offset is None:
+            self.utc_offset = log_utc_offset(value)
+        if self.log_start is None or timestamp < self.log_start:
+            self.log_start = timestamp
+        if self.clock is None or timestamp > self.clock:
+            self.clock = timestamp
+        self.has_log_timestamps = True
+        return timestamp
+    
+    def _json_span(self, value: Dict) -> Tuple[Optional[datetime], Optional[datetime]]:
+        duration = value.get('duration') or {}
+        return self._json_time(duration.get('start')), self._json_time(duration.get('end'))
+    
+    @staticmethod
+    def _set_span(node: ExecutionNode, start: Optional[datetime], end: Optional[datetime]):
+        node.start_time = start
+        node.end_time = end
+        node.duration = (end - start).total_seconds() if start and end else None
+    
+    def _json_payload(self, result: Dict) -> str:
+        """Result as Ansible prints it at -v, within the payload byte budget"""
+        text = json.dumps(result, indent=4, sort_keys=True, ensure_ascii=False, default=str)
+        encoded = text.encode('utf-8', 'replace')
+        if len(encoded) <= self.max_payload_bytes:
+            return text
+        kept = encoded[:self.max_payload_bytes].decode('utf-8', 'ignore').rsplit('\n', 1)[0]
+        return f"{kept}\n… [{len(encoded) - len(kept.encode('utf-8', 'replace'))} bytes truncated]"
+    
+    def _close_json_play(self):
+        """End the running task and play at the latest timestamp seen"""
+        self._close_node(self.current_task, self._now())
+        self._finish_task(self.current_task)
+        self._close_node(self.current_play, self._now())
+        self._leave_play()
+    
+    def _on_json_play(self, play: Dict) -> ExecutionNode:
+        self._close_json_play()
+        start, end = self._json_span(play)
+        node = ExecutionNode(1, play.get('name', ''), task_type="play")
+        self._set_span(node, start, end)
+        self._attach(self.root, node)
+        self.current_play = node
+        self.metrics['total_plays'] += 1
+        return node
+    
+    def _on_json_task(self, task: Dict, task_type: str = "task") -> ExecutionNode:
+        start, end = self._json_span(task)
+        node = ExecutionNode(2, task.get('name', ''), task_type=task_type, start_time=start or self._now())
+        self._attach(self.current_play, node)
+        self._start_task(node)
+        if end:
+            self._set_span(node, node.start_time, end)
+        if task_type == "task":
+            self.metrics['total_tasks'] += 1
+        return node
+    
+    def _on_json_handler(self, task: Dict) -> ExecutionNode:
+        return self._on_json_task(task, task_type="handler")
+    
+    def _on_json_task_end(self, task: Dict) -> None:
+        node = self.current_task
+        if node is not None:
+            _, end = self._json_span(task)
+            if end:
+                self._set_span(node, node.start_time, end)
+            self._finish_task(node)
+        return None
+    
+    def _on_json_result(self, value: Tuple) -> ExecutionNode:
+        """One host's result; loop items become child nodes"""
+        host, result, timestamp, status = value
+        status = sys.intern(status or _json_result_status(result))
+        host = sys.intern(host)
+        task = self.current_task
+        failed = status in FAILED_STATUSES
+        
+        self.metrics['total_hosts'].add(host)
+        self._count_result(host, status)
+        
+        delegated = (result.get('_ansible_delegated_vars') or {}).get('ansible_delegated_host')
+        node = ExecutionNode(
+            4,
+            host,
+            status=status,
+            host=sys.intern(f"{host} -> {delegated}") if delegated else host,
+            changed=(status == 'changed'),
+            failed=failed,
+            skipped=(status == 'skipping'),
+            details=self._json_payload(result) if status in self.payload_statuses and self.max_payload_bytes > 0 else "",
+            task_type="result"
+        )
+        # Per-host span: the result's own duration when the callback records
+        # one, else from the task start to the event (jsonl) or task end
+        start, end = self._json_span(result)
+        if start is None and task is not None:
+            start = task.start_time
+        if end is None:
+            end = self._json_time(timestamp) or (task.end_time if task is not None else None)
+        self._set_span(node, start, end)
+        if task is not None:
+            if failed:
+                task.failed = True
+            if end and (task.end_time is None or end > task.end_time):
+                self._set_span(task, task.start_time, end)
+            if self._task_records is not None and node.duration is not None:
+                self._task_records.append((task.title, host, node.duration, status))
+        if not self.streaming:
+            for item in result.get('results') or ():
+                if isinstance(item, dict):
+                    node.add_child(ExecutionNode(
+                        5, _item_label(item), status=_json_result_status(item), host=host,
+                        failed=_json_result_status(item) in FAILED_STATUSES, task_type="item"
+                    ))
+        self._attach(task, node)
+        return node
+    
+    def _on_json_recap(self, timestamp: Optional[str]) -> ExecutionNode:
+        self._close_json_play()
+        self._json_time(timestamp)
+        node = ExecutionNode(1, "PLAY RECAP", task_type="recap")
+        self._attach(self.root, node)
+        self.current_play = node
+        return node
+    
+    def _on_json_recap_host(self, value: Tuple) -> ExecutionNode:
+        host, counts = value
+        failures = counts.get('failures', 0)
+        unreachable = counts.get('unreachable', 0)
+        self._add_recap(host, {
+            'ok': counts.get('ok', 0), 'changed': counts.get('changed', 0), 'unreachable': unreachable,
+            'failed': failures, 'skipped': counts.get('skipped', 0), 'rescued': counts.get('rescued', 0),
+            'ignored': counts.get('ignored', 0),
+        })
+        title = f"{host}: OK={counts.get('ok', 0)} CHANGED={counts.get('changed', 0)} FAILED={failures}"
+        for key in ('unreachable', 'rescued', 'ignored'):
+            if counts.get(key):
+                title += f" {key.upper()}={counts[key]}"
+        node = ExecutionNode(2, title, host=host, failed=bool(failures or unreachable), task_type="recap_host")
+        self._attach(self.current_play, node)
+        return node
+    
+    def render(self, writers: List['TreeWriter'], node: ExecutionNode = None,
+               only: Optional[Iterable[str]] = None, max_nodes: Optional[int] = None):
+        """Feed the tree to every writer in a single depth-first traversal.
+        
+        only: keep just the result statuses given (e.g. failed, changed) and
+        the plays/tasks leading to them; recap lines are always kept.
+        max_nodes: stop after this many nodes have been rendered.
+        """
+        if node is None:
+            node = self.root
+        statuses = _expand_statuses(only)
+        visible_memo: Dict[int, bool] = {}
+        
+        def visible(candidate: ExecutionNode) -> bool:
+            if statuses is None or candidate.task_type in ("recap", "recap_host"):
+                return True
+            key = id(candidate)
+            cached = visible_memo.get(key)
+            if cached is None:
+                if candidate.task_type in ("result", "item"):
+                    cached = candidate.status in statuses
+                else:
+                    cached = any(visible(child) for child in candidate.children)
+                visible_memo[key] = cached
+            return cached
+        
+        state = {'rendered': 0, 'hidden': 0, 'truncated': False}
+        
+        def walk(current: ExecutionNode, depth: int, prefix: str, is_last: bool):
+            if max_nodes is not None and state['rendered'] >= max_nodes:
+                state['truncated'] = True
+                return
+            state['rendered'] += 1
+            for writer in writers:
+                writer.node(current, depth, prefix, is_last)
+            children = current.children
+            if statuses is not None:
+                children = [child for child in children if visible(child)]
+                state['hidden'] += len(current.children) - len(children)
+            child_prefix = prefix + ("    " if is_last else "│   ")
+            last = len(children) - 1
+            for i, child in enumerate(children):
+                walk(child, depth + 1, child_prefix, i == last)
+        
+        for writer in writers:
+            writer.begin(self)
+        walk(node, 0, "", True)
+        
+        notes = []
+        if state['hidden']:
+            notes.append(f"{state['hidden']} subtrees hidden by filter")
+        if state['truncated']:
+            notes.append(f"truncated after {max_nodes} nodes")
+        for writer in writers:
+            writer.end(self, "; ".join(notes) or None)
+    
+    def print_tree(self, node: ExecutionNode = None):
+        self.render([TextTreeWriter(sys.stdout)], node)
+    
+    def generate_markdown(self, node: ExecutionNode = None, level: int = 0) -> str:
+        sink = io.StringIO()
+        self.render([MarkdownWriter(sink, base_depth=level)], node)
+        return sink.getvalue()
+    
+    def finalize_metrics(self):
+        """Calculate final metrics after parsing is complete"""
+        if self._in_payload:
+            self._end_payload()
+        if self.has_log_timestamps or self.streaming:
+            self._close_node(self.current_task, self._now())
+        self._finish_task(self.current_task)
+        if self.streaming:
+            self._leave_play()
+            self._finish_play(self._draining_play)
+        if self.has_log_timestamps:
+            if self.input_format != 'text':
+                # The callback recorded exact play spans
+                self._close_node(self.current_play, self.clock)
+            elif not self.streaming:
+                self._rollup_play_timing()
+            self.start_time = self.log_start
+            self.root.start_time = self.log_start
+            self.root.end_time = self.clock
+            if self.reported_duration is not None:
+                self.root.duration = self.reported_duration
+            else:
+                self.root.duration = (self.root.end_time - self.root.start_time).total_seconds()
+        else:
+            self.root.end_time = datetime.now()
+            self.root.duration = (self.root.end_time - self.start_time).total_seconds()
+        self.metrics['total_duration'] = self.root.duration
+        self.metrics['total_hosts'] = list(self.metrics['total_hosts'])
+        
+        # Exact rates from the status matrix, checked against the recap
+        self._update_rates(self.metrics)
+        if self.recap:
+            self.metrics['recap_check'] = {
+                'hosts': len(self.recap),
+                'mismatches': self.matrix.reconcile(self.recap),
+            }
+        
+        # Find slowest tasks
+        self.metrics['slowest_tasks'] = self._slowest_tasks()
+    
+    def _update_rates(self, metrics: Dict):
+        """Status counts, rates and failures from the status matrix.
+        
+        An operation is one (task, host) pair with a result.  Failures the
+        recap reports as rescued are moved from "failed" to "rescued", so
+        they neither lower the success rate nor fail the run.
+        """
+        counts = self.matrix.totals()
+        rescued = {host: totals['rescued'] for host, totals in self.recap.items() if totals.get('rescued')}
+        failed_hosts = set(self.metrics['failed_hosts'])
+        counts['rescued'] = 0
+        for host, count in rescued.items():
+            count = min(count, self.matrix.totals(host)['failed'])
+            counts['failed'] -= count
+            counts['rescued'] += count
+            if self.matrix.host_failures(host) <= count:
+                failed_hosts.discard(host)
+        total = self.matrix.cells
+        metrics['total_operations'] = total
+        metrics['status_counts'] = counts
+        metrics['failed_tasks'] = counts['failed'] + counts['unreachable']
+        metrics['failed_hosts'] = sorted(failed_hosts)
+        metrics['success_rate'] = _success_rate(counts, total)
+        metrics['rates'] = _status_rates(counts, total)
+    
+    def _slowest_tasks(self) -> List[Dict]:
+        if self.streaming:
+            tasks = [entry for _, _, entry in self._slowest_heap]
+        else:
+            tasks = []
+            self._collect_task_performance(self.root, tasks)
+        return sorted(
+            [task for task in tasks if task['duration'] > 0],
+            key=lambda x: x['duration'],
+            reverse=True
+        )[:SLOWEST_TASKS_LIMIT]
+    
+    def snapshot_metrics(self) -> Dict:
+        """Metrics as finalize_metrics() would report them so far, without finalizing"""
+        metrics = dict(self.metrics)
+        metrics['total_hosts'] = sorted(self.metrics['total_hosts'])
+        metrics['total_duration'] = (self._now() - (self.log_start or self.start_time)).total_seconds()
+        self._update_rates(metrics)
+        metrics['slowest_tasks'] = self._slowest_tasks()
+        return metrics
+    
+    def write_snapshot(self, json_path: Optional[str] = None, markdown_path: Optional[str] = None):
+        """Write partial JSON/Markdown reports mid-run.
+        
+        Files are written next to their destination and renamed into place,
+        so readers never see a half-written report.
+        """
+        final_metrics = self.metrics
+        self.metrics = self.snapshot_metrics()
+        try:
+            if json_path:
+                with open(json_path + ".tmp", 'w', encoding='utf-8') as f:
+                    self.write_json_report(f)
+                os.replace(json_path + ".tmp", json_path)
+            if markdown_path and not self.streaming:
+                with open(markdown_path + ".tmp", 'w', encoding='utf-8') as f:
+                    self.render([MarkdownWriter(f, summary=True)])
+                os.replace(markdown_path + ".tmp", markdown_path)
+        finally:
+            self.metrics = final_metrics
+    
+    def _rollup_play_timing(self):
+        """Derive play start/end from the log-timed tasks and handlers they contain"""
+        for play in self.root.children:
+            if play.task_type != "play":
+                continue
+            starts = [child.start_time for child in play.children if child.start_time]
+            ends = [child.end_time for child in play.children if child.end_time]
+            if starts:
+                play.start_time = min(starts)
+            if ends:
+                play.end_time = max(ends)
+            if play.start_time and play.end_time:
+                play.duration = (play.end_time - play.start_time).total_seconds()
+    
+    def _collect_task_performance(self, node: ExecutionNode, tasks: Optional[List[Dict]] = None):
+        """Recursively collect task performance data"""
+        if tasks is None:
+            tasks = self.metrics['slowest_tasks']
+        if node.task_type in ("task", "handler") and node.duration:
+            tasks.append({
+                'name': node.title,
+                'duration': node.duration,
+                'status': 'failed' if node.failed else 'success'
+            })
+        
+        for child in node.children:
+            self._collect_task_performance(child, tasks)
+    
+    def task_records(self) -> List[Tuple[str, str, float, str]]:
+        """Timed (task, host, duration, status) rows; host is "" for whole-task rows"""
+        if self.streaming:
+            return list(self._task_records or [])
+        records = []
+        
+        def walk(node: ExecutionNode, task: Optional[ExecutionNode]):
+            if node.task_type in ("task", "handler"):
+                task = node
+                if node.duration is not None:
+                    records.append((node.title, "", node.duration, 'failed' if node.failed else 'ok'))
+            elif node.task_type == "result" and task is not None and node.duration is not None:
+                records.append((task.title, node.host, node.duration, node.status))
+            for child in node.children:
+                walk(child, task)
+        
+        walk(self.root, None)
+        return records
+    
+    @classmethod
+    def from_runs(cls, runs: List[Dict]) -> 'AnsibleExecutionParser':
+        """Build a tree-less parser whose metrics combine several parse_run() results"""
+        combined = cls(streaming=True)
+        combined.runs = runs
+        combined.metrics = merge_metrics([run['metrics'] for run in runs], [run['source'] for run in runs])
+        starts = [run['execution_summary']['start_time'] for run in runs]
+        ends = [run['execution_summary']['end_time'] for run in runs if run['execution_summary']['end_time']]
+        combined.start_time = datetime.fromisoformat(min(starts))
+        combined.root.end_time = datetime.fromisoformat(max(ends)) if ends else None
+        combined.root.duration = combined.metrics['total_duration']
+        return combined
+    
+    def generate_json_report(self) -> Dict:
+        """Generate comprehensive JSON report"""
+        report = {
+            'execution_summary': self._execution_summary(),
+            'metrics': self.metrics,
+            'execution_tree': None if self.streaming else self._node_to_dict(self.root)
+        }
+        if self.runs:
+            report['runs'] = self.runs
+        if self.profiler is not None:
+            report['profile'] = self.profiler.report()
+        return report
+    
+    def _execution_summary(self) -> Dict:
+        return {
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.root.end_time.isoformat() if self.root.end_time else None,
+            'total_duration': self.metrics['total_duration'],
+            'success_rate': self.metrics['success_rate']
+        }
+    
+    def _node_to_dict(self, node: ExecutionNode) -> Dict:
+        """Convert execution tree to dictionary"""
+        return node.to_dict()
+    
+    def write_json_report(self, fp, indent: Optional[int] = 2):
+        """Write the JSON report to a text file object in a single tree walk.
+        
+        Produces the same document as generate_json_report() without
+        materialising it: each node's own fields are encoded once (with
+        orjson when installed) and written through a small buffer, so export
+        time is linear in the tree size.  indent=None writes compact JSON.
+        """
+        encode = _json_encoder(indent)
+        newline = "\n" if indent else ""
+        pad = " " * (indent or 0)
+        colon = ": " if indent else ":"
+        
+        def nested(value, depth: int) -> str:
+            # Re-indent an encoded value that sits `depth` levels deep
+            text = encode(value)
+            return text.replace("\n", "\n" + pad * depth) if indent else text
+        
+        buffer = []
+        
+        def emit(text: str):
+            buffer.append(text)
+            if len(buffer) >= 4096:
+                fp.write("".join(buffer))
+                buffer.clear()
+        
+        def walk(node: ExecutionNode, depth: int):
+            closing = newline + pad * depth + "}"
+            inner = newline + pad * (depth + 1)
+            # Reopen the encoded field object to append its children array
+            emit(nested(node.fields(), depth)[:-len(closing)])
+            if not node.children:
+                emit(f",{inner}\"children\"{colon}[]{closing}")
+                return
+            emit(f",{inner}\"children\"{colon}[")
+            last = len(node.children) - 1
+            for i, child in enumerate(node.children):
+                emit(newline + pad * (depth + 2))
+                walk(child, depth + 2)
+                if i != last:
+                    emit(",")
+            emit(f"{inner}]{closing}")
+        
+        emit("{" + newline + pad + '"execution_summary"' + colon + nested(self._execution_summary(), 1))
+        emit("," + newline + pad + '"metrics"' + colon + nested(self.metrics, 1))
+        if self.runs:
+            emit("," + newline + pad + '"runs"' + colon + nested(self.runs, 1))
+        if self.profiler is not None:
+            emit("," + newline + pad + '"profile"' + colon + nested(self.profiler.report(), 1))
+        emit("," + newline + pad + '"execution_tree"' + colon)
+        if self.streaming:
+            emit("null")
+        else:
+            walk(self.root, 1)
+        emit(newline + "}" + newline)
+        fp.write("".join(buffer))
+    
+    def generate_html_report(self) -> str:
+        """Generate HTML report with interactive features"""
+        sink = io.StringIO()
+        self.render([HtmlWriter(sink)])
+        return sink.getvalue()
+    
+    def _generate_tree_text(self) -> str:
+        """Generate plain text tree for HTML report"""
+        sink = io.StringIO()
+        self.render([TextTreeWriter(sink, show_details=False)])
+        return sink.getvalue().rstrip("\n")
+    
+    def send_slack_notification(self, webhook_url: str, channel: str = None):
+        """Send execution summary to Slack"""
+        dispatcher = NotificationDispatcher([NotificationSink('slack', webhook_url, channel)])
+        dispatcher.send(partial(summary_payload, metrics=self.metrics))
+        for _, error in dispatcher.close():
+            if error:
+                print(f"Failed to send Slack notification: {error}")
+                return False
+        return True
+
+def parse(source: Union[str, 'os.PathLike', BinaryIO], streaming: bool = False,
+          profiler: Optional['ParseProfiler'] = None, **options) -> AnsibleExecutionParser:
+    """Parse a log (path or binary file object, plain or compressed) in-process.
+    
+    Returns the parser with finalized metrics; options are passed on to
+    AnsibleExecutionParser.  Streaming mode keeps no tree.  A ParseProfiler
+    records where the time went (see ParseProfiler.report()).
+    """
+    parser = AnsibleExecutionParser(streaming=streaming, **options)
+    if profiler is not None:
+        profiler.attach(parser)
+    if streaming:
+        for _ in parser.stream(read_log(source)):
+            pass
+    else:
+        parser.parse(read_log(source))
+        parser.finalize_metrics()
+    if profiler is not None:
+        profiler.lap('ingest')
+    return parser
+
+class ParseProfiler:
+    """Where the time of a parse goes: line patterns, phases and peak memory.
+    
+    attach() instruments one parser instance (its line classifier, line and
+    record counts, finalize_metrics() and optionally tree writers), so
+    parsers without a profiler run the uninstrumented code.  Phases are
+    laps: lap(name) charges the time since the previous lap to name, minus
+    the time of instrumented calls (finalize, renderers) in between, which
+    are charged to their own phases.
+    """
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        # kind -> [attempts, hits, seconds]; recap and recap_host are prefix/substring checks
+        self.patterns: Dict[str, List] = {}
+        self.lines = 0
+        self.records = 0
+        self.unclassified = 0
+        self._lap_start = time.perf_counter()
+        self._nested = 0.0
+    
+    def attach(self, parser: AnsibleExecutionParser):
+        parser.profiler = self
+        parser.classify_line = self.classify_line
+        parse_line = parser.parse_line
+        json_nodes = parser._json_nodes
+        
+        def counted_parse_line(line: str) -> Optional[ExecutionNode]:
+            self.lines += 1
+            return parse_line(line)
+        
+        def counted_json_nodes(records: Iterable[Tuple[str, object]]) -> Iterator[Optional[ExecutionNode]]:
+            return json_nodes(self._counted(records))
+        
+        parser.parse_line = counted_parse_line
+        parser._json_nodes = counted_json_nodes
+        parser.finalize_metrics = self.timed('finalize', parser.finalize_metrics)
+    
+    def _counted(self, records: Iterable) -> Iterator:
+        for record in records:
+            self.records += 1
+            yield record
+    
+    def timed(self, name: str, function: Callable) -> Callable:
+        """function, with its time charged to phase name"""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+                self._nested += elapsed
+        return wrapper
+    
+    def instrument_writer(self, writer: 'TreeWriter', name: str) -> 'TreeWriter':
+        """Charge a tree writer's own time to render:<name> (the shared walk stays in the lap)"""
+        for method in ('begin', 'node', 'end'):
+            setattr(writer, method, self.timed(f"render:{name}", getattr(writer, method)))
+        return writer
+    
+    def lap(self, name: str):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._lap_start - self._nested
+        self._lap_start = now
+        self._nested = 0.0
+    
+    def _hit(self, kind: str, seconds: float, hit: bool):
+        entry = self.patterns.get(kind)
+        if entry is None:
+            entry = self.patterns[kind] = [0, 0, 0.0]
+        entry[0] += 1
+        entry[1] += hit
+        entry[2] += seconds
+    
+    def classify_line(self, line: str) -> Optional[Tuple[str, Optional['re.Match']]]:
+        """classify_line(), timing every pattern tried"""
+        perf_counter = time.perf_counter
+        candidates = LINE_DISPATCH.get(line[0])
+        if candidates:
+            for kind, pattern in candidates:
+                start = perf_counter()
+                match = pattern.match(line)
+                self._hit(kind, perf_counter() - start, match is not None)
+                if match:
+                    return kind, match
+            start = perf_counter()
+            recap = line.startswith(RECAP_PREFIX)
+            self._hit('recap', perf_counter() - start, recap)
+            if recap:
+                return 'recap', None
+        if 'ok=' in line:
+            start = perf_counter()
+            match = RECAP_HOST_RE.match(line)
+            self._hit('recap_host', perf_counter() - start, match is not None)
+            if match:
+                return 'recap_host', match
+        self.unclassified += 1
+        return None
+    
+    @staticmethod
+    def peak_rss_mb() -> Optional[float]:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    
+    def report(self) -> Dict:
+        ingest = self.phases.get('ingest', 0.0)
+        return {
+            'lines': self.lines,
+            'records': self.records,
+            'unclassified_lines': self.unclassified,
+            'lines_per_sec': round((self.lines or self.records) / ingest) if ingest else None,
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'patterns': {
+                kind: {
+                    'attempts': attempts,
+                    'hits': hits,
+                    'seconds': round(seconds, 6),
+                    'ns_per_attempt': round(seconds / attempts * 1e9) if attempts else 0,
+                }
+                for kind, (attempts, hits, seconds) in sorted(self.patterns.items(), key=lambda item: -item[1][2])
+            },
+            'peak_rss_mb': self.peak_rss_mb(),
+        }
+
+def print_profile(report: Dict, out: Optional[TextIO] = None):
+    """Console view of ParseProfiler.report(), on stderr by default"""
+    out = out or sys.stderr
+    unit = 'lines' if report['lines'] else 'records'
+    count = report['lines'] or report['records']
+    rate = f" ({report['lines_per_sec']:,} {unit}/s)" if report['lines_per_sec'] else ""
+    rss = f", peak RSS {report['peak_rss_mb']:.0f} MB" if report['peak_rss_mb'] is not None else ""
+    ingested = f"{count:,} {unit} ingested" if count else "ingested"
+    print(f"\n🔬 Profile: {ingested} in {report['phases'].get('ingest', 0.0):.3f}s{rate}{rss}", file=out)
+    print("   Phases: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in report['phases'].items()), file=out)
+    if report['patterns']:
+        print(f"   {'Pattern':<12} {'attempts':>11} {'hits':>11} {'seconds':>9} {'ns/try':>7}", file=out)
+        for kind, stats in report['patterns'].items():
+            print(f"   {kind:<12} {stats['attempts']:>11,} {stats['hits']:>11,} {stats['seconds']:>9.3f} "
+                  f"{stats['ns_per_attempt']:>7,}", file=out)
+        print(f"   Unclassified lines: {report['unclassified_lines']:,}", file=out)
+
+# Checkpoints let a growing log be re-parsed from where the previous run
+# stopped.  They hold the parser state (tree, metrics, open play/task, a
+# pending payload), the offset just after the last complete line parsed,
+# and hashes of the first and last CHECKPOINT_HASH_BYTES before it, which
+# catch truncation, rotation and rewritten content without re-reading the
+# whole prefix.
+#
+# They are pickles, which can run code when loaded, so loading only resolves
+# the globals below (the types parser state is made of); a checkpoint that
+# references anything else is refused and the log is parsed in full.  Even
+# so, checkpoints are parser state, not an exchange format: only resume from
+# files this tool wrote in a location other users cannot write to.
+CHECKPOINT_FORMAT = 'ansible-parser-checkpoint/1'
+CHECKPOINT_HASH_BYTES = 64 * 1024
+CHECKPOINT_GLOBALS = frozenset((
+    ('datetime', 'datetime'), ('datetime', 'timedelta'), ('datetime', 'timezone'),
+    ('array', 'array'), ('array', '_array_reconstructor'),
+    (__name__, 'ExecutionNode'), (__name__, 'StatusMatrix'),
+))
+
+def _load_pickle(fp: BinaryIO):
+    """pickle.load() restricted to CHECKPOINT_GLOBALS"""
+    import pickle
+
+    class CheckpointUnpickler(pickle.Unpickler):
+        def find_class(self, module: str, name: str):
+            if (module, name) not in CHECKPOINT_GLOBALS:
+                raise pickle.UnpicklingError(f"checkpoint references {module}.{name}")
+            return super().find_class(module, name)
+    
+    return CheckpointUnpickler(fp).load()
+
+def _prefix_hashes(f: BinaryIO, offset: int) -> Tuple[str, str]:
+    import hashlib
+    f.seek(0)
+    head = hashlib.sha256(f.read(min(offset, CHECKPOINT_HASH_BYTES))).hexdigest()
+    start = max(0, offset - CHECKPOINT_HASH_BYTES)
+    f.seek(start)
+    tail = hashlib.sha256(f.read(offset - start)).hexdigest()
+    return head, tail
+
+def _complete_lines_end(f: BinaryIO, size: int) -> int:
+    """Offset just after the last newline; a line still being written is left for the next run"""
+    position = size
+    while position > 0:
+        start = max(0, position - READ_CHUNK_SIZE)
+        f.seek(start)
+        cut = f.read(position - start).rfind(b'\n')
+        if cut >= 0:
+            return start + cut + 1
+        position = start
+    return 0
+
+def _range_chunks(f: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    """Chunks of whole lines between two line boundaries"""
+    f.seek(start)
+    rest = b''
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        cut = chunk.rfind(b'\n') + 1
+        if not cut:
+            rest += chunk
+            continue
+        yield rest + chunk[:cut]
+        rest = chunk[cut:]
+    if rest:
+        yield rest
+
+def _load_checkpoint(checkpoint_path: str, f: BinaryIO, size: int, parser: AnsibleExecutionParser) -> Tuple[Optional[Dict], str]:
+    """A checkpoint usable for f, or None and the reason it is not"""
+    try:
+        with open(checkpoint_path, 'rb') as cp:
+            checkpoint = _load_pickle(cp)
+    except FileNotFoundError:
+        return None, "no checkpoint yet"
+    except Exception as e:
+        return None, f"unreadable checkpoint ({e.__class__.__name__})"
+    if not isinstance(checkpoint, dict) or checkpoint.get('format') != CHECKPOINT_FORMAT:
+        return None, "checkpoint from another parser version"
+    if checkpoint['options'] != parser._options():
+        return None, "parser options changed"
+    offset = checkpoint['offset']
+    if size < offset:
+        return None, "log was truncated"
+    if _prefix_hashes(f, offset) != (checkpoint['head'], checkpoint['tail']):
+        return None, "log was rotated or rewritten"
+    return checkpoint, "resumed"
+
+def parse_incremental(path: str, checkpoint_path: str, parser: AnsibleExecutionParser) -> Dict:
+    """Parse a growing plain log, resuming from checkpoint_path when it still applies.
+    
+    parser must be new; its state is replaced by the checkpoint's when that
+    matches the log, else the log is parsed from the start.  The checkpoint
+    is rewritten (atomically) before finalize_metrics() runs.  Compressed and
+    json callback input (one document) are always parsed in full and not
+    checkpointed.  Returns how the log was read: mode, reason, offsets.
+    
+    The checkpoint is a pickle loaded with only parser-state types allowed
+    (see CHECKPOINT_GLOBALS); still, only pass checkpoint paths you trust.
+    """
+    import pickle
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        head = f.read(8)
+        if any(head.startswith(magic) for magic, _ in COMPRESSION_MAGIC):
+            f.seek(0)
+            parser.parse(read_log(f))
+            parser.finalize_metrics()
+            return {'mode': 'full', 'reason': "compressed input is not checkpointed", 'start': 0, 'end': size}
+        checkpoint, reason = _load_checkpoint(checkpoint_path, f, size, parser)
+        start = 0
+        prefilter = {'recap': False}
+        if checkpoint is not None:
+            parser.restore_state(checkpoint['parser'])
+            start = checkpoint['offset']
+            prefilter = checkpoint['prefilter']
+        end = _complete_lines_end(f, size)
+        chunks = _range_chunks(f, start, end)
+        if checkpoint is None:
+            first = next(chunks, b'')
+            parser.input_format, _ = detect_input_format(_all_lines(first))
+            chunks = itertools.chain([first], chunks)
+        if parser.input_format == 'json':
+            f.seek(0)
+            parser.parse(read_log(f))
+            parser.finalize_metrics()
+            return {'mode': 'full', 'reason': "json callback output is not checkpointed", 'start': 0, 'end': size}
+        if parser.input_format == 'text':
+            batches = (_text_lines(chunk, prefilter) for chunk in chunks)
+        else:
+            batches = map(_all_lines, chunks)
+        parser.resume(itertools.chain.from_iterable(batches))
+        head_hash, tail_hash = _prefix_hashes(f, end)
+    state = {
+        'format': CHECKPOINT_FORMAT,
+        'options': parser._options(),
+        'offset': end,
+        'head': head_hash,
+        'tail': tail_hash,
+        'prefilter': prefilter,
+        'parser': parser.checkpoint_state(),
+    }
+    temporary = f"{checkpoint_path}.tmp"
+    with open(temporary, 'wb') as cp:
+        pickle.dump(state, cp, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, checkpoint_path)
+    parser.finalize_metrics()
+    return {'mode': 'incremental' if checkpoint is not None else 'full', 'reason': reason, 'start': start, 'end': end}
+
+def parse_run(path: str, record_tasks: bool = False) -> Dict:
+    """Parse one log in streaming mode and return a compact, picklable summary.
+    
+    Used as the ProcessPoolExecutor worker for multi-log ingestion; with
+    record_tasks the timed task rows for the run history are included.
+    """
+    run_parser = AnsibleExecutionParser(streaming=True, record_tasks=record_tasks)
+    for _ in run_parser.stream(read_log(path)):
+        pass
+    run = {
+        'source': path,
+        'execution_summary': run_parser._execution_summary(),
+        'metrics': run_parser.metrics,
+    }
+    if record_tasks:
+        run['tasks'] = run_parser.task_records()
+    return run
+
+def parse_runs(paths: List[str], jobs: Optional[int] = None, record_tasks: bool = False) -> List[Dict]:
+    """Parse several logs, in parallel worker processes when jobs > 1"""
+    worker = partial(parse_run, record_tasks=record_tasks)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [worker(path) for path in paths]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(worker, paths))
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+class RunHistory:
+    """SQLite store of parsed runs for trend analysis and regression detection.
+    
+    Each parse appends one row to `runs` and its timed tasks (and per-host
+    results, when the log has per-line timestamps) to `task_runs`.  Queries
+    only touch the most recent runs through the started_at and run_id
+    indexes, so they stay fast with tens of thousands of stored runs.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL,
+            started_at TEXT NOT NULL,
+            recorded_at TEXT NOT NULL,
+            duration REAL,
+            total_tasks INTEGER,
+            failed_tasks INTEGER,
+            success_rate REAL
+        );
+        CREATE TABLE IF NOT EXISTS task_runs (
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            task TEXT NOT NULL,
+            role TEXT NOT NULL,
+            host TEXT NOT NULL,
+            duration REAL NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+        CREATE INDEX IF NOT EXISTS idx_task_runs_run ON task_runs(run_id, host);
+        CREATE INDEX IF NOT EXISTS idx_task_runs_task ON task_runs(task, run_id);
+        CREATE INDEX IF NOT EXISTS idx_task_runs_host ON task_runs(host, run_id);
+    """
+    
+    def __init__(self, path: str):
+        import sqlite3
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def record(self, source: str, summary: Dict, metrics: Dict, tasks: List[Tuple]) -> int:
+        """Append one run and its task rows in a single transaction"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (source, started_at, recorded_at, duration, total_tasks, failed_tasks, success_rate) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (source, summary['start_time'], datetime.now().isoformat(), metrics['total_duration'],
+                 metrics['total_tasks'], metrics['failed_tasks'], metrics['success_rate'])
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany(
+                "INSERT INTO task_runs (run_id, task, role, host, duration, status) VALUES (?, ?, ?, ?, ?, ?)",
+                ((run_id, task, task.split(' : ', 1)[0] if ' : ' in task else "", host, duration, status)
+                 for task, host, duration, status in tasks)
+            )
+        return run_id
+    
+    def _recent_run_ids(self, limit: int, offset: int = 0) -> List[int]:
+        rows = self.conn.execute(
+            "SELECT id FROM runs ORDER BY started_at DESC, id DESC LIMIT ? OFFSET ?", (limit, offset)
+        ).fetchall()
+        return [row[0] for row in rows]
+    
+    def _task_durations(self, run_ids: List[int]) -> Dict[str, List[float]]:
+        durations: Dict[str, List[float]] = {}
+        if not run_ids:
+            return durations
+        placeholders = ",".join("?" * len(run_ids))
+        for task, duration in self.conn.execute(
+            f"SELECT task, duration FROM task_runs WHERE run_id IN ({placeholders}) AND host = ''", run_ids
+        ):
+            durations.setdefault(task, []).append(duration)
+        return durations
+    
+    def task_percentiles(self, last_runs: int = 20) -> List[Dict]:
+        """p50/p90/p95/max duration per task over the last N runs, slowest p95 first"""
+        stats = []
+        for task, values in self._task_durations(self._recent_run_ids(last_runs)).items():
+            values.sort()
+            stats.append({
+                'task': task,
+                'samples': len(values),
+                'p50': _percentile(values, 50),
+                'p90': _percentile(values, 90),
+                'p95': _percentile(values, 95),
+                'max': values[-1],
+            })
+        return sorted(stats, key=lambda stat: stat['p95'], reverse=True)
+    
+    def regressions(self, baseline_runs: int = 20, threshold: float = 1.5,
+                    min_seconds: float = 5.0) -> List[Dict]:
+        """Tasks of the latest run slower than threshold x their baseline median.
+        
+        The baseline is the median duration over the previous baseline_runs
+        runs; min_seconds ignores jitter on very short tasks.
+        """
+        latest = self._recent_run_ids(1)
+        if not latest:
+            return []
+        baseline = self._task_durations(self._recent_run_ids(baseline_runs, offset=1))
+        flagged = []
+        for task, values in self._task_durations(latest).items():
+            history = sorted(baseline.get(task, []))
+            if not history:
+                continue
+            median = _percentile(history, 50)
+            current = max(values)
+            if current >= median * threshold and current - median >= min_seconds:
+                flagged.append({
+                    'task': task,
+                    'baseline': median,
+                    'latest': current,
+                    'ratio': current / median if median else float('inf'),
+                    'samples': len(history),
+                })
+        return sorted(flagged, key=lambda item: item['latest'] - item['baseline'], reverse=True)
+
+class TaskInterval(NamedTuple):
+    """One host's run of one task, in seconds since the start of the run"""
+    play: int      # index into ExecutionTimeline.plays
+    task: int      # index of the task/handler node in the run
+    name: str
+    host: str
+    start: float
+    end: float
+    status: str
+
+class ExecutionTimeline:
+    """Per-host task intervals of a parsed run, and the analyses built on them.
+    
+    Per-host intervals are exact when every result is timestamped
+    (ANSIBLE_LOG_PATH, json/jsonl callback).  With profile_tasks timing
+    only, every host that reported gets the whole task's interval
+    (host_timing is False) and straggler detection is skipped.
+    """
+    def __init__(self, parser: AnsibleExecutionParser):
+        self.plays: List[Dict] = []
+        self.intervals: List[TaskInterval] = []
+        self.host_timing = False
+        starts = [node.start_time for node in self._task_nodes(parser.root) if node.start_time]
+        self.origin: Optional[datetime] = min(starts) if starts else None
+        if self.origin is None:
+            return
+        task_index = 0
+        for play in parser.root.children:
+            if play.task_type != "play":
+                continue
+            play_index = len(self.plays)
+            self.plays.append({'name': play.title, 'tasks': 0})
+            for task in play.children:
+                if task.task_type not in ("task", "handler"):
+                    continue
+                self.plays[play_index]['tasks'] += 1
+                for result in self._results(task):
+                    if result.start_time and result.end_time:
+                        self.host_timing = True
+                        start, end = result.start_time, result.end_time
+                    elif task.start_time and task.end_time:
+                        start, end = task.start_time, task.end_time
+                    else:
+                        continue
+                    self.intervals.append(TaskInterval(
+                        play_index, task_index, task.title, result.host,
+                        self._offset(start), self._offset(end), result.status
+                    ))
+                task_index += 1
+    
+    @staticmethod
+    def _task_nodes(root: ExecutionNode) -> Iterator[ExecutionNode]:
+        for play in root.children:
+            for task in play.children:
+                if task.task_type in ("task", "handler"):
+                    yield task
+    
+    @staticmethod
+    def _results(task: ExecutionNode) -> Iterator[ExecutionNode]:
+        for child in task.children:
+            if child.task_type == "result":
+                yield child
+            elif child.task_type == "include":
+                yield from (grandchild for grandchild in child.children if grandchild.task_type == "result")
+    
+    def _offset(self, timestamp: datetime) -> float:
+        return (timestamp - self.origin).total_seconds()
+    
+    @staticmethod
+    def _busy_time(intervals: List[TaskInterval]) -> float:
+        """Length of the union of the intervals (overlaps counted once)"""
+        busy = 0.0
+        current_start = current_end = None
+        for interval in sorted(intervals, key=lambda item: item.start):
+            if current_end is None or interval.start > current_end:
+                if current_end is not None:
+                    busy += current_end - current_start
+                current_start, current_end = interval.start, interval.end
+            else:
+                current_end = max(current_end, interval.end)
+        if current_end is not None:
+            busy += current_end - current_start
+        return busy
+    
+    def host_totals(self) -> List[Dict]:
+        """Busy time, span and task/failure counts per host, busiest first"""
+        by_host: Dict[str, List[TaskInterval]] = {}
+        for interval in self.intervals:
+            by_host.setdefault(interval.host, []).append(interval)
+        totals = [{
+            'host': host,
+            'busy': self._busy_time(intervals),
+            'first_start': min(interval.start for interval in intervals),
+            'last_end': max(interval.end for interval in intervals),
+            'tasks': len(intervals),
+            'failed': sum(1 for interval in intervals if interval.status in FAILED_STATUSES),
+        } for host, intervals in by_host.items()]
+        return sorted(totals, key=lambda total: total['busy'], reverse=True)
+    
+    def critical_path(self) -> List[Dict]:
+        """Chain of host intervals that determined the run's end time.
+        
+        Starting from the interval that ended last, each step goes back to
+        the interval that finished most recently before it started: the
+        same host's previous task under the free strategy, or the last host
+        to finish the previous task under linear.  'wait' is the gap between
+        the two (connection setup, forks, serial batches).
+        """
+        if not self.intervals:
+            return []
+        from bisect import bisect_right
+        ordered = sorted(self.intervals, key=lambda interval: interval.end)
+        ends = [interval.end for interval in ordered]
+        index = len(ordered) - 1
+        path = [(ordered[index], 0.0)]
+        while True:
+            current = ordered[index]
+            candidate = min(bisect_right(ends, current.start + 1e-6), index) - 1
+            if candidate < 0:
+                break
+            # Among equally late finishers prefer the same host
+            same_end = candidate
+            while same_end >= 0 and ends[same_end] == ends[candidate]:
+                if ordered[same_end].host == current.host:
+                    candidate = same_end
+                    break
+                same_end -= 1
+            path[-1] = (current, max(0.0, current.start - ordered[candidate].end))
+            index = candidate
+            path.append((ordered[index], 0.0))
+        path.reverse()
+        return [{
+            'play': self.plays[interval.play]['name'],
+            'task': interval.name,
+            'host': interval.host,
+            'start': interval.start,
+            'duration': interval.end - interval.start,
+            'wait': wait,
+        } for interval, wait in path]
+    
+    def stragglers(self, min_times_last: int = 3) -> List[Dict]:
+        """Hosts that were last to report at least twice as often as chance.
+        
+        Only tasks run by two or more hosts whose results did not all
+        arrive at the same time are counted; lag is how far behind the
+        task's median host the straggler finished.
+        """
+        if not self.host_timing:
+            return []
+        by_task: Dict[int, List[TaskInterval]] = {}
+        for interval in self.intervals:
+            by_task.setdefault(interval.task, []).append(interval)
+        hosts = {interval.host for interval in self.intervals}
+        seen = dict.fromkeys(hosts, 0)
+        last = dict.fromkeys(hosts, 0)
+        lag = dict.fromkeys(hosts, 0.0)
+        for intervals in by_task.values():
+            if len(intervals) < 2:
+                continue
+            ends = sorted(interval.end for interval in intervals)
+            if ends[-1] - ends[0] < 0.001:
+                continue
+            latest = max(intervals, key=lambda interval: interval.end)
+            for interval in intervals:
+                seen[interval.host] += 1
+            last[latest.host] += 1
+            lag[latest.host] += latest.end - ends[(len(ends) - 1) // 2]
+        result = []
+        for host in hosts:
+            if last[host] < min_times_last or not seen[host]:
+                continue
+            ratio = last[host] / seen[host]
+            if ratio * len(hosts) >= 2:
+                result.append({
+                    'host': host,
+                    'tasks': seen[host],
+                    'times_last': last[host],
+                    'last_ratio': ratio,
+                    'mean_lag': lag[host] / last[host],
+                })
+        return sorted(result, key=lambda entry: entry['times_last'], reverse=True)
+    
+    def utilisation(self) -> List[Dict]:
+        """Per play: wall time, busy host-seconds and how much of hosts x wall time was used"""
+        by_play: Dict[int, List[TaskInterval]] = {}
+        for interval in self.intervals:
+            by_play.setdefault(interval.play, []).append(interval)
+        plays = []
+        for index, play in enumerate(self.plays):
+            intervals = by_play.get(index)
+            if not intervals:
+                continue
+            wall = max(interval.end for interval in intervals) - min(interval.start for interval in intervals)
+            by_host: Dict[str, List[TaskInterval]] = {}
+            for interval in intervals:
+                by_host.setdefault(interval.host, []).append(interval)
+            busy = sum(self._busy_time(host_intervals) for host_intervals in by_host.values())
+            start = min(interval.start for interval in intervals)
+            plays.append({
+                'play': play['name'],
+                'start': start,
+                'hosts': len(by_host),
+                'wall': wall,
+                'busy': busy,
+                'parallelism': busy / wall if wall else 0.0,
+                'utilisation': busy / (wall * len(by_host)) if wall else 0.0,
+            })
+        return plays
+    
+    def summary(self) -> Dict:
+        path = self.critical_path()
+        return {
+            'host_timing': self.host_timing,
+            'critical_path_seconds': (path[-1]['start'] + path[-1]['duration'] - path[0]['start']) if path else 0.0,
+            'critical_path': path,
+            'hosts': self.host_totals(),
+            'stragglers': self.stragglers(),
+            'plays': self.utilisation(),
+        }
+    
+    def write_chrome_trace(self, fp):
+        """Write a Chrome trace-event JSON file (chrome://tracing, ui.perfetto.dev).
+        
+        Hosts are threads of one process, ordered by first start; plays and
+        the critical path get tracks of their own above them.
+        """
+        def micros(seconds: float) -> int:
+            return int(round(seconds * 1_000_000))
+        
+        hosts = sorted(self.host_totals(), key=lambda total: total['first_start'])
+        tids = {total['host']: index + 3 for index, total in enumerate(hosts)}
+        events = [{'ph': 'M', 'pid': 1, 'name': 'process_name', 'args': {'name': 'ansible-playbook'}}]
+        for tid, name in [(1, 'plays'), (2, 'critical path')] + [(tid, host) for host, tid in tids.items()]:
+            events.append({'ph': 'M', 'pid': 1, 'tid': tid, 'name': 'thread_name', 'args': {'name': name}})
+            events.append({'ph': 'M', 'pid': 1, 'tid': tid, 'name': 'thread_sort_index', 'args': {'sort_index': tid}})
+        for play in self.utilisation():
+            events.append({'ph': 'X', 'pid': 1, 'tid': 1, 'cat': 'play', 'name': play['play'],
+                           'ts': micros(play['start']), 'dur': micros(play['wall']),
+                           'args': {'hosts': play['hosts'], 'utilisation': round(play['utilisation'], 3)}})
+        for step in self.critical_path():
+            events.append({'ph': 'X', 'pid': 1, 'tid': 2, 'cat': 'critical', 'name': step['task'],
+                           'ts': micros(step['start']), 'dur': micros(step['duration']),
+                           'args': {'host': step['host'], 'wait': round(step['wait'], 3)}})
+        for interval in self.intervals:
+            events.append({'ph': 'X', 'pid': 1, 'tid': tids[interval.host], 'cat': interval.status,
+                           'name': interval.name, 'ts': micros(interval.start),
+                           'dur': micros(interval.end - interval.start),
+                           'args': {'play': self.plays[interval.play]['name'], 'status': interval.status}})
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                   'otherData': {'origin': self.origin.isoformat() if self.origin else None}}, fp)
+
+# Queries over one run (--where).  Every result becomes a row of compact
+# columns; posting lists by host, status and task are appended as rows
+# arrive, play/role/task names resolve to tasks first, and durations are
+# sorted once at the end, so a query touches only the rows it matches.
+WHERE_TOKEN_RE = re.compile(
+    r"""\s*(?:(?P<paren>[()])|(?P<op>and|or|not)(?![\w.*?-])"""
+    r"""|(?P<field>\w+)\s*(?P<cmp>!=|>=|<=|=|~|>|<)\s*(?P<value>"[^"]*"|'[^']*'|[^\s()]+))""",
+    re.I
+)
+WHERE_FIELDS = ('status', 'host', 'play', 'task', 'role', 'duration')
+INDEX_FORMAT = 'ansible-run-index/1'
+
+class RunIndex:
+    """Index of a run's results for --where queries.
+    
+    Attach it to a parser before parsing (it registers as a listener, so it
+    works in streaming mode and for json/jsonl input) and call finish()
+    after finalize_metrics().  Rows are (task, host, status, duration);
+    result durations come from the log where it has them, else from the
+    task.
+    """
+    def __init__(self, parser: Optional[AnsibleExecutionParser] = None):
+        from array import array
+        self.tasks: List[Tuple[str, str, str]] = []  # (play, task, role)
+        self._task_nodes: List[Optional[ExecutionNode]] = []
+        self.hosts: List[str] = []
+        self.statuses: List[str] = []
+        self._host_ids: Dict[str, int] = {}
+        self._status_ids: Dict[str, int] = {}
+        self.row_task = array('I')
+        self.row_host = array('I')
+        self.row_status = array('B')
+        self.row_duration = array('d')
+        self.by_host: List[List[int]] = []
+        self.by_status: List[List[int]] = []
+        self.by_task: List[List[int]] = []
+        self._durations: List[float] = []
+        self._duration_rows: List[int] = []
+        self._failed_row: Optional[Tuple[int, ExecutionNode]] = None
+        self._parser = parser
+        if parser is not None:
+            parser.listeners.append(self.observe)
+    
+    def __len__(self) -> int:
+        return len(self.row_task)
+    
+    def _add_task(self, play: str, task: str, node: Optional[ExecutionNode] = None) -> int:
+        role = task.split(' : ', 1)[0] if ' : ' in task else ""
+        self.tasks.append((play, task, role))
+        self._task_nodes.append(node)
+        self.by_task.append([])
+        return len(self.tasks) - 1
+    
+    @staticmethod
+    def _intern(value: str, ids: Dict[str, int], values: List[str], postings: List[List[int]]) -> int:
+        value_id = ids.get(value)
+        if value_id is None:
+            value_id = ids[value] = len(values)
+            values.append(value)
+            postings.append([])
+        return value_id
+    
+    def add(self, task_id: int, host: str, status: str, duration: Optional[float] = None):
+        row = len(self.row_task)
+        host_id = self._intern(host, self._host_ids, self.hosts, self.by_host)
+        status_id = self._intern(status, self._status_ids, self.statuses, self.by_status)
+        self.row_task.append(task_id)
+        self.row_host.append(host_id)
+        self.row_status.append(status_id)
+        self.row_duration.append(float('nan') if duration is None else duration)
+        self.by_host[host_id].append(row)
+        self.by_status[status_id].append(row)
+        self.by_task[task_id].append(row)
+    
+    def _sync_failed_row(self):
+        # A "...ignoring" line after a failed result turns the node into an
+        # ignored one once it was indexed; the row is still the last one added
+        row, node = self._failed_row
+        self._failed_row = None
+        status_id = self._intern(node.status, self._status_ids, self.statuses, self.by_status)
+        old = self.row_status[row]
+        if status_id != old:
+            self.by_status[old].pop()
+            self.by_status[status_id].append(row)
+            self.row_status[row] = status_id
+    
+    def observe(self, node: ExecutionNode):
+        parser = self._parser
+        if self._failed_row is not None:
+            self._sync_failed_row()
+        if node.task_type in ("task", "handler"):
+            play = parser.current_play.title if parser.current_play else ""
+            self._add_task(play, node.title, node)
+        elif node.task_type == "result":
+            if not self.tasks:
+                self._add_task("", "")
+            # Delegated json results carry "host -> delegate"; index the inventory host
+            self.add(len(self.tasks) - 1, node.title, node.status, node.duration)
+            if node.failed:
+                self._failed_row = (len(self.row_task) - 1, node)
+    
+    def finish(self):
+        """Fill in task durations and sort the duration index"""
+        if self._failed_row is not None:
+            self._sync_failed_row()
+        durations = self.row_duration
+        for task_id, node in enumerate(self._task_nodes):
+            if node is not None and node.duration is not None:
+                for row in self.by_task[task_id]:
+                    if durations[row] != durations[row]:  # NaN: no per-result timing
+                        durations[row] = node.duration
+        self._task_nodes = [None] * len(self._task_nodes)
+        order = sorted((row for row in range(len(durations)) if durations[row] == durations[row]),
+                       key=durations.__getitem__)
+        self._duration_rows = order
+        self._durations = [durations[row] for row in order]
+    
+    def _task_rows(self, field: int, matches: Callable[[str], bool]) -> Set[int]:
+        rows: Set[int] = set()
+        for task_id, entry in enumerate(self.tasks):
+            if matches(entry[field]):
+                rows.update(self.by_task[task_id])
+        return rows
+    
+    def _term(self, field: str, cmp: str, value: str) -> Set[int]:
+        from bisect import bisect_left, bisect_right
+        from fnmatch import fnmatchcase
+        if field == 'duration':
+            try:
+                seconds = float(value.rstrip('s'))
+            except ValueError:
+                raise ValueError(f"duration needs a number of seconds, got {value!r}")
+            durations, rows = self._durations, self._duration_rows
+            if cmp in ('>', '>='):
+                start = (bisect_right if cmp == '>' else bisect_left)(durations, seconds)
+                return set(rows[start:])
+            if cmp in ('<', '<='):
+                end = (bisect_left if cmp == '<' else bisect_right)(durations, seconds)
+                return set(rows[:end])
+            start, end = bisect_left(durations, seconds), bisect_right(durations, seconds)
+            matched = set(rows[start:end])
+            return set(range(len(self))) - matched if cmp == '!=' else matched
+        if cmp in ('>', '>=', '<', '<='):
+            raise ValueError(f"{field} does not support {cmp}")
+        if cmp == '~':
+            matches = lambda candidate: fnmatchcase(candidate, value)
+        elif field == 'status':
+            statuses = _expand_statuses([value])
+            matches = lambda candidate: candidate in statuses
+        else:
+            matches = lambda candidate: candidate == value
+        if field in ('host', 'status'):
+            names, postings = (self.hosts, self.by_host) if field == 'host' else (self.statuses, self.by_status)
+            rows = set()
+            for value_id, name in enumerate(names):
+                if matches(name):
+                    rows.update(postings[value_id])
+        else:
+            rows = self._task_rows(('play', 'task', 'role').index(field), matches)
+        return set(range(len(self))) - rows if cmp == '!=' else rows
+    
+    def query(self, where: str) -> List[int]:
+        """Row ids matching a --where expression, in execution order.
+        
+        Terms are field OP value with fields status, host, play, task, role
+        and duration, OP one of = != ~ (glob) and, for duration, > >= < <=;
+        combine with and/or/not and parentheses.  "and" binds tighter.
+        """
+        tokens = []
+        position = 0
+        where = where.strip()
+        while position < len(where):
+            match = WHERE_TOKEN_RE.match(where, position)
+            if not match or match.end() == position:
+                raise ValueError(f"cannot parse --where at: {where[position:]!r}")
+            position = match.end()
+            if match.group('field'):
+                field = match.group('field').lower()
+                if field not in WHERE_FIELDS:
+                    raise ValueError(f"unknown field {field!r} (use {', '.join(WHERE_FIELDS)})")
+                value = match.group('value')
+                if value[0] in '"\'':
+                    value = value[1:-1]
+                tokens.append(('term', (field, match.group('cmp'), value)))
+            elif match.group('paren'):
+                tokens.append((match.group('paren'), None))
+            elif match.group('op'):
+                tokens.append((match.group('op').lower(), None))
+        tokens.append(('end', None))
+        everything = None
+        
+        def expect(kind: str):
+            if tokens[0][0] != kind:
+                raise ValueError(f"expected {kind} in --where, got {tokens[0][0]}")
+            return tokens.pop(0)[1]
+        
+        def primary() -> Set[int]:
+            nonlocal everything
+            kind = tokens[0][0]
+            if kind == 'not':
+                tokens.pop(0)
+                if everything is None:
+                    everything = set(range(len(self)))
+                return everything - primary()
+            if kind == '(':
+                tokens.pop(0)
+                rows = disjunction()
+                expect(')')
+                return rows
+            return self._term(*expect('term'))
+        
+        def conjunction() -> Set[int]:
+            rows = primary()
+            while tokens[0][0] == 'and':
+                tokens.pop(0)
+                rows = rows & primary()
+            return rows
+        
+        def disjunction() -> Set[int]:
+            rows = conjunction()
+            while tokens[0][0] == 'or':
+                tokens.pop(0)
+                rows = rows | conjunction()
+            return rows
+        
+        rows = disjunction()
+        expect('end')
+        return sorted(rows)
+    
+    def row(self, row: int) -> Dict:
+        play, task, role = self.tasks[self.row_task[row]]
+        duration = self.row_duration[row]
+        return {
+            'play': play,
+            'task': task,
+            'role': role,
+            'host': self.hosts[self.row_host[row]],
+            'status': self.statuses[self.row_status[row]],
+            'duration': None if duration != duration else duration,
+        }
+    
+    def save(self, fp: TextIO):
+        """Write the index as JSON (columns plus name tables)"""
+        fp.write(_json_encoder(None)({
+            'format': INDEX_FORMAT,
+            'tasks': self.tasks,
+            'hosts': self.hosts,
+            'statuses': self.statuses,
+            'rows': {
+                'task': self.row_task.tolist(),
+                'host': self.row_host.tolist(),
+                'status': self.row_status.tolist(),
+                'duration': [None if value != value else value for value in self.row_duration],
+            },
+        }))
+    
+    @classmethod
+    def load(cls, fp: TextIO) -> 'RunIndex':
+        """Rebuild an index written by save(); no log is read"""
+        orjson = _orjson()
+        data = (orjson.loads if orjson is not None else json.loads)(fp.read())
+        if data.get('format') != INDEX_FORMAT:
+            raise ValueError("not a run index written by --index")
+        index = cls()
+        for play, task, _ in data['tasks']:
+            index._add_task(play, task)
+        index.hosts = data['hosts']
+        index.statuses = data['statuses']
+        index._host_ids = {host: i for i, host in enumerate(index.hosts)}
+        index._status_ids = {status: i for i, status in enumerate(index.statuses)}
+        index.by_host = [[] for _ in index.hosts]
+        index.by_status = [[] for _ in index.statuses]
+        rows = data['rows']
+        index.row_task.extend(rows['task'])
+        index.row_host.extend(rows['host'])
+        index.row_status.extend(rows['status'])
+        index.row_duration.extend(float('nan') if value is None else value for value in rows['duration'])
+        for row, (task_id, host_id, status_id) in enumerate(zip(rows['task'], rows['host'], rows['status'])):
+            index.by_task[task_id].append(row)
+            index.by_host[host_id].append(row)
+            index.by_status[status_id].append(row)
+        index.finish()
+        return index
+
+    @classmethod
+    def from_report(cls, report: Dict) -> 'RunIndex':
+        """Rebuild an index from a --json report's execution tree"""
+        tree = report.get('execution_tree')
+        if tree is None:
+            raise ValueError("report has no execution tree (written with --stream or for several runs)")
+        index = cls()
+        play = ""
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            kind = node['task_type']
+            if kind == 'play':
+                play = node['name'][len(NODE_LABELS['play']):]
+            elif kind in ('task', 'handler'):
+                title = node['name'][len(NODE_LABELS[kind]):]
+                index._add_task(play, title, ExecutionNode(node['level'], title, duration=node['duration'],
+                                                           task_type=kind))
+            elif kind == 'result':
+                if not index.tasks:
+                    index._add_task("", "")
+                index.add(len(index.tasks) - 1, node['host'].split(' -> ', 1)[0], node['status'], node['duration'])
+                continue
+            elif kind in ('recap', 'recap_host'):
+                continue
+            stack.extend(reversed(node['children']))
+        index.finish()
+        return index
+
+def print_query(index: RunIndex, where: str, rows: List[int], limit: int = 50):
+    """Console section for --where"""
+    print(f"\n🔎 {len(rows)} result(s) where {where}:")
+    for row in rows[:limit] if limit else rows:
+        entry = index.row(row)
+        duration = f"{entry['duration']:.1f}s" if entry['duration'] is not None else "-"
+        print(f"   {STATUS_EMOJI.get(entry['status'], '⏭️')} {entry['status']:<11} {duration:>8}  "
+              f"{entry['host']:<20} {entry['play']} / {entry['task']}")
+    if limit and len(rows) > limit:
+        print(f"   ... {len(rows) - limit} more (--limit 0 shows all)")
+
+# Run diffs
+#
+# Both runs are reduced to RunIndex rows and aligned by dictionary lookups:
+# tasks on (play, task, n-th occurrence of that pair), results on the host
+# within a matched task.  Every row is visited a constant number of times,
+# so the diff is linear in the number of results; only the reported lists
+# are sorted.
+
+DIFF_FORMAT = 'ansible-run-diff/1'
+JSON_FIRST_KEY_RE = re.compile(rb'\s*\{\s*"(\w+)"')
+
+def load_run_index(path: str) -> RunIndex:
+    """RunIndex of a log (any supported format), a --json report or an --index file"""
+    with open(path, 'rb') as f:
+        match = JSON_FIRST_KEY_RE.match(f.read(4096))
+    first_key = match.group(1) if match else None
+    if first_key == b'format':
+        with open(path, encoding='utf-8') as f:
+            return RunIndex.load(f)
+    if first_key == b'execution_summary':
+        orjson = _orjson()
+        with open(path, 'rb') as f:
+            return RunIndex.from_report((orjson.loads if orjson is not None else json.loads)(f.read()))
+    parser = AnsibleExecutionParser(streaming=True, payload_statuses=())
+    index = RunIndex(parser)
+    for _ in parser.stream(read_log(path)):
+        pass
+    index.finish()
+    return index
+
+def _task_keys(index: RunIndex) -> Dict[Tuple[str, str, int], int]:
+    """(play, task, occurrence) -> task id; repeated tasks pair up in order"""
+    seen: Dict[Tuple[str, str], int] = {}
+    keys = {}
+    for task_id, (play, task, _) in enumerate(index.tasks):
+        occurrence = seen.get((play, task), 0)
+        seen[(play, task)] = occurrence + 1
+        keys[(play, task, occurrence)] = task_id
+    return keys
+
+# A host's outcome of a task with several results (loop items) is its worst one
+DIFF_STATUS_RANK = {'skipping': 0, 'ok': 1, 'changed': 2}
+
+def _task_cells(index: RunIndex, task_id: int) -> Dict[str, Tuple[str, float]]:
+    """host -> (status, duration) of a task, loop items folded into one cell"""
+    hosts, statuses = index.hosts, index.statuses
+    row_host, row_status, row_duration = index.row_host, index.row_status, index.row_duration
+    cells: Dict[str, Tuple[str, float]] = {}
+    for row in index.by_task[task_id]:
+        host, status, duration = hosts[row_host[row]], statuses[row_status[row]], row_duration[row]
+        cell = cells.get(host)
+        if cell is not None:
+            if DIFF_STATUS_RANK.get(cell[0], 3) > DIFF_STATUS_RANK.get(status, 3):
+                status = cell[0]
+            if not duration >= cell[1]:  # also keeps the old value when this one is NaN
+                duration = cell[1]
+        cells[host] = (status, duration)
+    return cells
+
+def _task_duration(cells: Dict[str, Tuple[str, float]]) -> Optional[float]:
+    """Longest result of a task (its wall time when results carry no timing)"""
+    known = [duration for _, duration in cells.values() if duration == duration]
+    return max(known) if known else None
+
+def _add_host_time(totals: Dict[str, float], cells: Dict[str, Tuple[str, float]]):
+    for host, (_, duration) in cells.items():
+        totals[host] = totals.get(host, 0.0) + (duration if duration == duration else 0.0)
+
+def _duration_change(baseline: float, current: float, threshold: float, min_seconds: float) -> Optional[str]:
+    delta = current - baseline
+    if delta >= min_seconds and current >= baseline * threshold:
+        return 'slower'
+    if -delta >= min_seconds and baseline >= current * threshold:
+        return 'faster'
+    return None
+
+def _duration_entry(baseline: float, current: float, threshold: float, min_seconds: float) -> Dict:
+    return {
+        'baseline': baseline,
+        'current': current,
+        'delta': current - baseline,
+        'ratio': current / baseline if baseline else None,
+        'change': _duration_change(baseline, current, threshold, min_seconds),
+    }
+
+def diff_runs(baseline: RunIndex, current: RunIndex, threshold: float = 1.5, min_seconds: float = 5.0) -> Dict:
+    """Structural diff of two runs: status transitions and duration deltas.
+
+    Tasks are matched on (play, task, occurrence) and results on their host,
+    so reordered or inserted tasks do not shift the comparison.  A duration
+    counts as slower (faster) when it grew (shrank) by the factor threshold
+    and by at least min_seconds, as for --regressions.
+    """
+    baseline_keys = _task_keys(baseline)
+    current_keys = _task_keys(current)
+    transitions: Dict[str, int] = {}
+    status_changes = []
+    tasks = []
+    tasks_added = []
+    compared = 0
+    task_time = [0.0, 0.0]
+    old_hosts: Dict[str, float] = {}
+    new_hosts: Dict[str, float] = {}
+    for key, task_id in current_keys.items():
+        play, task, occurrence = key
+        cells = _task_cells(current, task_id)
+        _add_host_time(new_hosts, cells)
+        duration = _task_duration(cells)
+        task_time[1] += duration or 0.0
+        baseline_id = baseline_keys.get(key)
+        if baseline_id is None:
+            tasks_added.append({'play': play, 'task': task, 'occurrence': occurrence, 'hosts': len(cells),
+                                'failed': sum(status in FAILED_STATUSES for status, _ in cells.values()),
+                                'duration': duration})
+            continue
+        old_cells = _task_cells(baseline, baseline_id)
+        _add_host_time(old_hosts, old_cells)
+        old_duration = _task_duration(old_cells)
+        task_time[0] += old_duration or 0.0
+        if duration is not None and old_duration is not None:
+            tasks.append({'play': play, 'task': task, 'occurrence': occurrence,
+                          **_duration_entry(old_duration, duration, threshold, min_seconds)})
+        for host, (status, _) in cells.items():
+            old = old_cells.get(host)
+            if old is None:
+                continue
+            compared += 1
+            if old[0] != status:
+                transition = f"{old[0]} -> {status}"
+                transitions[transition] = transitions.get(transition, 0) + 1
+                status_changes.append({'play': play, 'task': task, 'occurrence': occurrence,
+                                       'host': host, 'from': old[0], 'to': status})
+    tasks_removed = []
+    for key, task_id in baseline_keys.items():
+        if key not in current_keys:
+            play, task, occurrence = key
+            cells = _task_cells(baseline, task_id)
+            _add_host_time(old_hosts, cells)
+            duration = _task_duration(cells)
+            task_time[0] += duration or 0.0
+            tasks_removed.append({'play': play, 'task': task, 'occurrence': occurrence, 'hosts': len(cells),
+                                  'failed': sum(status in FAILED_STATUSES for status, _ in cells.values()),
+                                  'duration': duration})
+
+    hosts = [{'host': host, **_duration_entry(old_hosts[host], seconds, threshold, min_seconds)}
+             for host, seconds in new_hosts.items() if host in old_hosts]
+    tasks.sort(key=lambda entry: entry['delta'], reverse=True)
+    hosts.sort(key=lambda entry: entry['delta'], reverse=True)
+    new_failures = sum(change['to'] in FAILED_STATUSES and change['from'] not in FAILED_STATUSES
+                       for change in status_changes)
+    fixed = sum(change['from'] in FAILED_STATUSES and change['to'] not in FAILED_STATUSES
+                for change in status_changes)
+    return {
+        'format': DIFF_FORMAT,
+        'baseline': {'tasks': len(baseline.tasks), 'hosts': len(baseline.hosts), 'results': len(baseline),
+                     'task_time': task_time[0]},
+        'current': {'tasks': len(current.tasks), 'hosts': len(current.hosts), 'results': len(current),
+                    'task_time': task_time[1]},
+        'summary': {
+            'tasks_matched': len(current_keys) - len(tasks_added),
+            'tasks_added': len(tasks_added),
+            'tasks_removed': len(tasks_removed),
+            'hosts_added': sum(host not in old_hosts for host in new_hosts),
+            'hosts_removed': sum(host not in new_hosts for host in old_hosts),
+            'results_compared': compared,
+            'status_changes': len(status_changes),
+            'new_failures': new_failures,
+            'fixed': fixed,
+            'slower_tasks': sum(entry['change'] == 'slower' for entry in tasks),
+            'faster_tasks': sum(entry['change'] == 'faster' for entry in tasks),
+            'task_time_delta': task_time[1] - task_time[0],
+        },
+        'transitions': dict(sorted(transitions.items(), key=lambda item: item[1], reverse=True)),
+        'status_changes': status_changes,
+        'tasks': tasks,
+        'hosts': hosts,
+        'tasks_added': tasks_added,
+        'tasks_removed': tasks_removed,
+        'hosts_added': [host for host in new_hosts if host not in old_hosts],
+        'hosts_removed': [host for host in old_hosts if host not in new_hosts],
+    }
+
+def _task_label(entry: Dict) -> str:
+    repeat = f" (#{entry['occurrence'] + 1})" if entry['occurrence'] else ""
+    return f"{entry['play']} / {entry['task']}{repeat}"
+
+def print_diff(diff: Dict, baseline: str, current: str, limit: int = 50):
+    """Console report for --diff"""
+    shown = (lambda entries: entries[:limit]) if limit else (lambda entries: entries)
+
+    def more(entries: List):
+        if limit and len(entries) > limit:
+            print(f"   ... {len(entries) - limit} more (--limit 0 shows all)")
+
+    summary = diff['summary']
+    print(f"\n🔀 Run diff: {baseline} -> {current}")
+    print(f"   Tasks: {diff['baseline']['tasks']:,} -> {diff['current']['tasks']:,} "
+          f"({summary['tasks_matched']:,} matched, {summary['tasks_added']:,} added, "
+          f"{summary['tasks_removed']:,} removed)")
+    print(f"   Hosts: {diff['baseline']['hosts']:,} -> {diff['current']['hosts']:,} "
+          f"({summary['hosts_added']:,} added, {summary['hosts_removed']:,} removed)")
+    print(f"   Results compared: {summary['results_compared']:,}, {summary['status_changes']:,} status changes "
+          f"({summary['new_failures']:,} newly failing, {summary['fixed']:,} fixed)")
+    print(f"   Task time: {diff['baseline']['task_time']:,.1f}s -> {diff['current']['task_time']:,.1f}s "
+          f"({summary['task_time_delta']:+,.1f}s)")
+    if diff['transitions']:
+        print("   Transitions: " + ", ".join(f"{transition} {count:,}"
+                                             for transition, count in diff['transitions'].items()))
+
+    groups = (
+        ('❌ Newly failing', lambda change: change['to'] in FAILED_STATUSES and change['from'] not in FAILED_STATUSES),
+        ('✅ Fixed', lambda change: change['from'] in FAILED_STATUSES and change['to'] not in FAILED_STATUSES),
+        ('🔄 Other status changes', lambda change: (change['to'] in FAILED_STATUSES) == (change['from'] in FAILED_STATUSES)),
+    )
+    for title, selected in groups:
+        changes = [change for change in diff['status_changes'] if selected(change)]
+        if changes:
+            print(f"\n{title} ({len(changes):,}):")
+            for change in shown(changes):
+                print(f"   {change['from'] + ' -> ' + change['to']:<22} {change['host']:<20} {_task_label(change)}")
+            more(changes)
+
+    for change, title in (('slower', '🐢 Slower'), ('faster', '🐇 Faster')):
+        tasks = [entry for entry in diff['tasks'] if entry['change'] == change]
+        if change == 'faster':
+            tasks.reverse()
+        if tasks:
+            print(f"\n{title} tasks ({len(tasks):,}):")
+            for entry in shown(tasks):
+                ratio = f"{entry['ratio']:.1f}x" if entry['ratio'] is not None else "new"
+                print(f"   {entry['baseline']:>8.1f}s -> {entry['current']:>8.1f}s {entry['delta']:>+9.1f}s "
+                      f"{ratio:>6}  {_task_label(entry)}")
+            more(tasks)
+        hosts = [entry for entry in diff['hosts'] if entry['change'] == change]
+        if change == 'faster':
+            hosts.reverse()
+        if hosts:
+            print(f"\n{title} hosts ({len(hosts):,}):")
+            for entry in shown(hosts):
+                print(f"   {entry['baseline']:>8.1f}s -> {entry['current']:>8.1f}s {entry['delta']:>+9.1f}s  {entry['host']}")
+            more(hosts)
+
+    for key, title in (('tasks_added', f'➕ Tasks only in {current}'), ('tasks_removed', f'➖ Tasks only in {baseline}')):
+        entries = diff[key]
+        if entries:
+            print(f"\n{title} ({len(entries):,}):")
+            for entry in shown(entries):
+                failed = f", failed on {entry['failed']}" if entry['failed'] else ""
+                print(f"   {_task_label(entry)} ({entry['hosts']} hosts{failed})")
+            more(entries)
+    for key, title in (('hosts_added', f'➕ Hosts only in {current}'), ('hosts_removed', f'➖ Hosts only in {baseline}')):
+        if diff[key]:
+            print(f"\n{title} ({len(diff[key]):,}): " + ", ".join(shown(diff[key]))
+                  + (" ..." if limit and len(diff[key]) > limit else ""))
+
+def merge_metrics(metrics_list: List[Dict], sources: Optional[List[str]] = None) -> Dict:
+    """Combine finalized metrics of several runs.
+    
+    Counts and durations are summed, host sets are unioned and the slowest
+    tasks are the overall top entries, tagged with the run they came from.
+    The result can itself be merged again.
+    """
+    merged = {
+        'total_plays': 0,
+        'total_tasks': 0,
+        'total_hosts': set(),
+        'failed_tasks': 0,
+        'changed_tasks': 0,
+        'skipped_tasks': 0,
+        'total_duration': 0,
+        'slowest_tasks': [],
+        'failed_hosts': set(),
+        'performance_summary': {},
+        'total_operations': 0,
+        'status_counts': {},
+    }
+    slowest = []
+    mismatches = []
+    recap_hosts = 0
+    checked = False
+    for i, metrics in enumerate(metrics_list):
+        for key in ('total_plays', 'total_tasks', 'failed_tasks', 'changed_tasks',
+                    'skipped_tasks', 'total_duration', 'total_operations'):
+            merged[key] += metrics.get(key) or 0
+        merged['total_hosts'].update(metrics['total_hosts'])
+        merged['failed_hosts'].update(metrics['failed_hosts'])
+        for status, count in (metrics.get('status_counts') or {}).items():
+            merged['status_counts'][status] = merged['status_counts'].get(status, 0) + count
+        if 'recap_check' in metrics:
+            checked = True
+            recap_hosts += metrics['recap_check']['hosts']
+            for mismatch in metrics['recap_check']['mismatches']:
+                mismatches.append(dict(mismatch, source=sources[i]) if sources and 'source' not in mismatch else mismatch)
+        for task in metrics['slowest_tasks']:
+            if sources and 'source' not in task:
+                task = dict(task, source=sources[i])
+            slowest.append(task)
+    merged['slowest_tasks'] = heapq.nlargest(SLOWEST_TASKS_LIMIT, slowest, key=lambda task: task['duration'])
+    merged['total_hosts'] = sorted(merged['total_hosts'])
+    merged['failed_hosts'] = sorted(merged['failed_hosts'])
+    operations = merged['total_operations']
+    merged['success_rate'] = ((operations - merged['failed_tasks']) / operations) * 100 if operations > 0 else 100
+    merged['rates'] = _status_rates(merged['status_counts'], operations)
+    if checked:
+        merged['recap_check'] = {'hosts': recap_hosts, 'mismatches': mismatches}
+    return merged
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    """Expand glob patterns (for shells that don't), keeping unmatched names as-is"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if pattern != "-" else []
+        paths.extend(matches or [pattern])
+    return paths
+
+def _expand_statuses(only: Optional[Iterable[str]]) -> Optional[Set[str]]:
+    if not only:
+        return None
+    statuses = {status.strip().lower() for status in only if status.strip()}
+    # "failed" covers both spellings Ansible uses for a failed result
+    if statuses & {'failed', 'fatal'}:
+        statuses |= {'failed', 'fatal', 'unreachable'}
+    if 'skipped' in statuses:
+        statuses.add('skipping')
+    return statuses
+
+class TreeWriter:
+    """Renders the execution tree into a text sink.
+    
+    Writers are driven by AnsibleExecutionParser.render(), which walks the
+    tree once for all of them; each node is written straight to the sink
+    (a buffered file, stdout or io.StringIO) instead of being concatenated.
+    """
+    def __init__(self, sink: TextIO):
+        self.sink = sink
+    
+    def begin(self, parser: AnsibleExecutionParser):
+        pass
+    
+    def node(self, node: ExecutionNode, depth: int, prefix: str, is_last: bool):
+        raise NotImplementedError
+    
+    def end(self, parser: AnsibleExecutionParser, note: Optional[str]):
+        pass
+
+class TextTreeWriter(TreeWriter):
+    """Box-drawing text tree, as printed on the console"""
+    def __init__(self, sink: TextIO, show_details: bool = True):
+        super().__init__(sink)
+        self.show_details = show_details
+    
+    def node(self, node: ExecutionNode, depth: int, prefix: str, is_last: bool):
+        if node.level == 0:
+            self.sink.write(f"🌳 {node.name}\n")
+            return
+        connector = "└── " if is_last else "├── "
+        self.sink.write(f"{prefix}{connector}{node.name}\n")
+        details = node.detail_summary(100) if self.show_details and node.details else ""
+        if details:
+            detail_prefix = prefix + ("    " if is_last else "│   ")
+            self.sink.write(f"{detail_prefix}💬 {details}\n")
+    
+    def end(self, parser: AnsibleExecutionParser, note: Optional[str]):
+        if note:
+            self.sink.write(f"… {note}\n")
+
+class MarkdownWriter(TreeWriter):
+    """Nested Markdown list, optionally preceded by the report summary"""
+    def __init__(self, sink: TextIO, summary: bool = False, base_depth: int = 0):
+        super().__init__(sink)
+        self.summary = summary
+        self.base_depth = base_depth
+    
+    def begin(self, parser: AnsibleExecutionParser):
+        if not self.summary:
+            return
+        metrics = parser.metrics
+        self.sink.write(
+            "# Ansible Execution Tree\n\n"
+            f"Generated automatically from Ansible playbook execution at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+            "## Summary\n"
+            f"- **Duration:** {metrics['total_duration']:.1f}s\n"
+            f"- **Success Rate:** {metrics['success_rate']:.1f}%\n"
+            f"- **Total Tasks:** {metrics['total_tasks']}\n"
+            f"- **Failed Tasks:** {metrics['failed_tasks']}\n\n"
+            "## Execution Tree\n\n"
+        )
+    
+    def node(self, node: ExecutionNode, depth: int, prefix: str, is_last: bool):
+        if node.level == 0:
+            self.sink.write(f"# {node.name}\n\n")
+            return
+        indent = "  " * (depth + self.base_depth)
+        self.sink.write(f"{indent}- {node.name}\n")
+        details = node.detail_summary(200) if node.details else ""
+        if details:
+            self.sink.write(f"{indent}  - Details: `{details}`\n")
+    
+    def end(self, parser: AnsibleExecutionParser, note: Optional[str]):
+        if note:
+            self.sink.write(f"\n_{note}_\n")
+
+HTML_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Ansible Execution Report</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 20px; }
+        .header { background: #2c3e50; color: white; padding: 20px; border-radius: 8px; }
+        .metrics { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; margin: 20px 0; }
+        .metric-card { background: #ecf0f1; padding: 15px; border-radius: 8px; text-align: center; }
+        .metric-value { font-size: 2em; font-weight: bold; color: #2c3e50; }
+        .success { color: #27ae60; }
+        .warning { color: #f39c12; }
+        .error { color: #e74c3c; }
+        .tree { font-family: monospace; white-space: pre-line; background: #f8f9fa; padding: 15px; border-radius: 8px; }
+        .slowest-tasks { margin-top: 20px; }
+        .task-item { padding: 8px; margin: 4px 0; background: #fff; border-left: 4px solid #3498db; }
+    </style>
+</head>
+<body>
+"""
+
+class HtmlWriter(TreeWriter):
+    """Standalone HTML report: metric cards, slowest tasks and the text tree"""
+    def begin(self, parser: AnsibleExecutionParser):
+        from html import escape
+        self.escape = escape
+        metrics = parser.metrics
+        failed_class = "error" if metrics['failed_tasks'] > 0 else "success"
+        slowest_html = "".join(
+            f'<div class="task-item">{escape(task["name"])} - {task["duration"]:.1f}s</div>'
+            for task in metrics['slowest_tasks'][:5]
+        )
+        self.sink.write(HTML_HEAD)
+        self.sink.write(f"""    <div class="header">
+        <h1>🌳 Ansible Execution Report</h1>
+        <p>Generated at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
+    </div>
+    
+    <div class="metrics">
+        <div class="metric-card">
+            <div class="metric-value success">{metrics['success_rate']:.1f}%</div>
+            <div>Success Rate</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value">{metrics['total_duration']:.1f}s</div>
+            <div>Total Duration</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value">{metrics['total_tasks']}</div>
+            <div>Total Tasks</div>
+        </div>
+        <div class="metric-card">
+            <div class="metric-value {failed_class}">{metrics['failed_tasks']}</div>
+            <div>Failed Tasks</div>
+        </div>
+    </div>
+    
+    <div class="slowest-tasks">
+        <h2>🐌 Slowest Tasks</h2>
+        {slowest_html}
+    </div>
+    
+    <div class="tree">
+        <h2>📊 Execution Tree</h2>
+""")
+    
+    def node(self, node: ExecutionNode, depth: int, prefix: str, is_last: bool):
+        if node.level == 0:
+            self.sink.write(f"🌳 {self.escape(node.name)}\n")
+        else:
+            connector = "└── " if is_last else "├── "
+            self.sink.write(f"{prefix}{connector}{self.escape(node.name)}\n")
+    
+    def end(self, parser: AnsibleExecutionParser, note: Optional[str]):
+        if note:
+            self.sink.write(f"<em>… {self.escape(note)}</em>\n")
+        self.sink.write("""    </div>
+</body>
+</html>
+""")
+
+# Notifications
+#
+# The run summary (and, with --alert-failures, batches of failures as they
+# are parsed) goes to any number of sinks.  Payloads are built per sink type;
+# sends run on a small thread pool sharing one pooled requests.Session, with
+# a timeout per request and bounded, backed-off retries on connection
+# errors, 429 and 5xx.  requests is only imported once something is sent.
+NOTIFY_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+NOTIFY_TITLE = "Ansible Playbook Execution Complete"
+
+class NotificationSink(NamedTuple):
+    kind: str  # slack, teams or webhook
+    url: str
+    channel: Optional[str] = None
+
+def _slack_payload(sink: NotificationSink, title: str, ok: bool, facts: List[Tuple[str, str]],
+                   text: str = "") -> Dict:
+    payload = {
+        "attachments": [{
+            "color": "good" if ok else "danger",
+            "title": f"{'✅' if ok else '❌'} {title}",
+            "fields": [{"title": name, "value": value, "short": name != "Hosts"} for name, value in facts],
+            "footer": "Ansible Execution Parser",
+            "ts": int(time.time())
+        }]
+    }
+    if text:
+        payload["attachments"][0]["text"] = text
+    if sink.channel:
+        payload["channel"] = sink.channel
+    return payload
+
+def _teams_payload(title: str, ok: bool, facts: List[Tuple[str, str]], text: str = "") -> Dict:
+    section = {"facts": [{"name": name, "value": value} for name, value in facts]}
+    if text:
+        section["text"] = text
+    return {
+        "@type": "MessageCard",
+        "@context": "https://schema.org/extensions",
+        "themeColor": "2EB886" if ok else "D00000",
+        "summary": title,
+        "title": f"{'✅' if ok else '❌'} {title}",
+        "sections": [section],
+    }
+
+def summary_payload(sink: NotificationSink, metrics: Dict) -> Dict:
+    """End-of-run summary in the format sink expects"""
+    ok = metrics['failed_tasks'] == 0
+    if sink.kind == 'webhook':
+        return {
+            "event": "summary",
+            "ok": ok,
+            "metrics": {key: metrics.get(key) for key in (
+                'success_rate', 'total_duration', 'total_tasks', 'failed_tasks', 'changed_tasks',
+                'total_hosts', 'failed_hosts', 'status_counts')},
+        }
+    facts = [
+        ("Success Rate", f"{metrics['success_rate']:.1f}%"),
+        ("Duration", f"{metrics['total_duration']:.1f}s"),
+        ("Total Tasks", str(metrics['total_tasks'])),
+        ("Failed Tasks", str(metrics['failed_tasks'])),
+        ("Hosts", ", ".join(metrics['total_hosts'])),
+    ]
+    if sink.kind == 'teams':
+        return _teams_payload(NOTIFY_TITLE, ok, facts)
+    return _slack_payload(sink, NOTIFY_TITLE, ok, facts)
+
+def alert_payload(sink: NotificationSink, failures: List[Dict]) -> Dict:
+    """Failures seen since the previous alert, in the format sink expects"""
+    if sink.kind == 'webhook':
+        return {"event": "failures", "failures": failures}
+    title = f"{len(failures)} new Ansible failure{'s' if len(failures) != 1 else ''}"
+    lines = [f"{failure['host']}: {failure['task']}" + (f" - {failure['summary']}" if failure['summary'] else "")
+             for failure in failures[:20]]
+    if len(failures) > 20:
+        lines.append(f"... and {len(failures) - 20} more")
+    if sink.kind == 'teams':
+        return _teams_payload(title, False, [], "\n\n".join(lines))
+    return _slack_payload(sink, title, False, [], "\n".join(lines))
+
+class NotificationDispatcher:
+    """Send payloads to every sink in parallel, off the parsing thread.
+    
+    send() returns immediately; close() waits for what is still in flight
+    and returns one (sink, error or None) pair per send attempt.
+    """
+    def __init__(self, sinks: List[NotificationSink], timeout: float = 10.0,
+                 retries: int = 3, backoff: float = 0.5, workers: int = 4):
+        self.sinks = sinks
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.workers = max(1, min(workers, len(sinks) * 2))
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+        self._futures: List[Tuple[NotificationSink, 'Future']] = []
+        self._session = None
+        self._lock = threading.Lock()
+    
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=len(self.sinks), pool_maxsize=self.workers)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._session = session
+            return self._session
+    
+    def _post(self, sink: NotificationSink, payload: Dict) -> Tuple[NotificationSink, Optional[str]]:
+        # Any failure (no requests package, a malformed URL, an unencodable
+        # payload) is reported like an HTTP error instead of raising in close()
+        try:
+            return self._deliver(sink, payload)
+        except Exception as e:
+            return sink, str(e) or e.__class__.__name__
+    
+    def _deliver(self, sink: NotificationSink, payload: Dict) -> Tuple[NotificationSink, Optional[str]]:
+        import requests
+        session = self._get_session()
+        error = None
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            try:
+                response = session.post(sink.url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = str(e)
+            except requests.RequestException as e:
+                return sink, str(e)
+            else:
+                if response.status_code < 400:
+                    return sink, None
+                error = f"HTTP {response.status_code}"
+                if response.status_code not in NOTIFY_RETRY_STATUSES:
+                    return sink, error
+                retry_after = response.headers.get('Retry-After', '')
+                if retry_after.isdigit():
+                    delay = min(float(retry_after), 60.0)
+            if attempt < self.retries:
+                time.sleep(delay)
+        return sink, error
+    
+    def send(self, build: Callable[[NotificationSink], Dict]):
+        """Queue one payload per sink, built by build(sink)"""
+        for sink in self.sinks:
+            self._futures.append((sink, self._executor.submit(self._post, sink, build(sink))))
+    
+    def close(self, timeout: Optional[float] = None) -> List[Tuple[NotificationSink, Optional[str]]]:
+        from concurrent.futures import wait
+        done, _ = wait([future for _, future in self._futures], timeout=timeout)
+        results = [future.result() if future in done else (sink, "timed out") for sink, future in self._futures]
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._session is not None:
+            self._session.close()
+        return results
+
+class FailureAlerter:
+    """Parser listener sending failed results to the notification sinks while parsing.
+    
+    A failure goes out when the next node arrives (an "...ignoring" line in
+    between turns it into an ignored result, which is not sent); after the
+    first alert, failures are batched into at most one alert per interval.
+    Nodes are kept until the batch is sent, so multi-line payloads finished
+    in the meantime make it into the summary.
+    """
+    def __init__(self, parser: AnsibleExecutionParser, dispatcher: NotificationDispatcher,
+                 interval: float = 30.0):
+        self.parser = parser
+        self.dispatcher = dispatcher
+        self.interval = interval
+        self.pending: List[Tuple[str, ExecutionNode]] = []
+        self.last_sent: Optional[float] = None
+        self.sent = 0
+        parser.listeners.append(self.observe)
+    
+    def observe(self, node: ExecutionNode):
+        if self.pending and (self.last_sent is None or time.monotonic() - self.last_sent >= self.interval):
+            self.flush()
+        if node.task_type == "result" and node.failed:
+            task = self.parser.current_task
+            self.pending.append((task.title if task else "", node))
+    
+    def flush(self):
+        failures = [{'task': task, 'host': node.host, 'status': node.status, 'summary': node.detail_summary(200)}
+                    for task, node in self.pending if node.failed]
+        self.pending = []
+        if not failures:
+            return
+        self.last_sent = time.monotonic()
+        self.sent += len(failures)
+        self.dispatcher.send(partial(alert_payload, failures=failures))
+
+# Run metrics in the Prometheus text format, which both node_exporter's
+# textfile collector and the Pushgateway ingest
+DEFAULT_DURATION_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _sample_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+class PrometheusExporter:
+    """Task listener aggregating task durations into histograms while parsing.
+    
+    A finished task is counted into the histogram of its (role, task) when
+    its timing becomes final, so memory grows with the number of distinct
+    tasks, not with results, and streaming mode stays bounded.  render()
+    adds per-host counters and run gauges from the finalized metrics.
+    """
+    def __init__(self, parser: AnsibleExecutionParser, buckets: Iterable[float] = DEFAULT_DURATION_BUCKETS,
+                 labels: Optional[Dict[str, str]] = None):
+        from bisect import bisect_left
+        self.parser = parser
+        self.buckets = tuple(sorted(buckets))
+        self.labels = tuple((labels or {}).items())
+        # (role, task) -> per-bucket counts, the +Inf-only count, then the sum
+        self.histograms: Dict[Tuple[str, str], List[float]] = {}
+        self._bucket = partial(bisect_left, self.buckets)
+        parser.task_listeners.append(self.observe)
+    
+    def observe(self, node: ExecutionNode):
+        # Without timestamps in the log, durations would be parsing times
+        if node.duration is None or not self.parser.has_log_timestamps:
+            return
+        title = node.title
+        key = tuple(title.split(' : ', 1)) if ' : ' in title else ("", title)
+        counts = self.histograms.get(key)
+        if counts is None:
+            counts = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[self._bucket(node.duration)] += 1
+        counts[-1] += node.duration
+    
+    def render(self, metrics: Dict) -> str:
+        """The run as Prometheus text exposition; call after finalize_metrics()"""
+        lines: List[str] = []
+        
+        def family(name: str, kind: str, description: str):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        def sample(name: str, labels: Tuple, value: float):
+            pairs = ','.join(f'{key}="{_label_value(str(label))}"' for key, label in self.labels + labels)
+            lines.append(f"{name}{{{pairs}}} {_sample_value(value)}" if pairs else f"{name} {_sample_value(value)}")
+        
+        family('ansible_task_duration_seconds', 'histogram', 'Duration of tasks by role and task name.')
+        bounds = [_sample_value(bound) for bound in self.buckets] + ['+Inf']
+        for (role, task), counts in sorted(self.histograms.items()):
+            labels = (('role', role), ('task', task))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                sample('ansible_task_duration_seconds_bucket', labels + (('le', bound),), cumulative)
+            sample('ansible_task_duration_seconds_sum', labels, counts[-1])
+            sample('ansible_task_duration_seconds_count', labels, cumulative)
+        
+        matrix = self.parser.matrix
+        recap = self.parser.recap
+        hosts = sorted(matrix.hosts)
+        family('ansible_host_failures_total', 'counter', 'Failed or unreachable results per host, rescued ones excluded.')
+        for host in hosts:
+            rescued = recap.get(host, {}).get('rescued', 0)
+            sample('ansible_host_failures_total', (('host', host),), max(0, matrix.host_failures(host) - rescued))
+        family('ansible_host_results_total', 'counter', 'Task results per host by final status.')
+        for host in hosts:
+            for status, count in matrix.totals(host).items():
+                sample('ansible_host_results_total', (('host', host), ('status', status)), count)
+        
+        family('ansible_run_duration_seconds', 'gauge', 'Duration of the playbook run.')
+        sample('ansible_run_duration_seconds', (), float(metrics['total_duration'] or 0.0))
+        family('ansible_run_success_ratio', 'gauge', 'Share of task results that succeeded (0-1).')
+        sample('ansible_run_success_ratio', (), metrics['success_rate'] / 100.0)
+        family('ansible_run_operations', 'gauge', 'Task results (task, host pairs) of the run.')
+        sample('ansible_run_operations', (), metrics['total_operations'])
+        family('ansible_run_failures', 'gauge', 'Failed or unreachable task results of the run.')
+        sample('ansible_run_failures', (), metrics['failed_tasks'])
+        family('ansible_run_tasks', 'gauge', 'Tasks of the run.')
+        sample('ansible_run_tasks', (), metrics['total_tasks'])
+        end_time = self.parser.root.end_time
+        if end_time is not None:
+            family('ansible_run_end_timestamp_seconds', 'gauge', 'When the run ended, in seconds since the epoch.')
+            # Log times are naive; without an offset in the log they are read as UTC,
+            # never in the local timezone of the machine rendering them
+            offset = timezone(self.parser.utc_offset or timedelta(0))
+            sample('ansible_run_end_timestamp_seconds', (), end_time.replace(tzinfo=offset).timestamp())
+        lines.append("")
+        return "\n".join(lines)
+
+def write_metrics_file(path: str, text: str):
+    """Replace a textfile-collector file; the collector only reads *.prom, so the temporary file is skipped"""
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+def push_metrics(url: str, job: str, text: str, timeout: float = 10.0):
+    """Replace the metrics of job on a Pushgateway (PUT /metrics/job/<job>)"""
+    import requests
+    if '/' in job:
+        import base64
+        path = f"job@base64/{base64.urlsafe_b64encode(job.encode('utf-8')).decode('ascii')}"
+    else:
+        from urllib.parse import quote
+        path = f"job/{quote(job, safe='')}"
+    response = requests.put(f"{url.rstrip('/')}/metrics/{path}", data=text.encode('utf-8'),
+                            headers={'Content-Type': PROMETHEUS_CONTENT_TYPE}, timeout=timeout)
+    response.raise_for_status()
+
+class LiveMonitor:
+    """Throttled in-terminal progress view for piped ansible-playbook output.
+    
+    Registered as a parser listener to keep per-host tallies; refresh() is
+    called by live_lines() at most once per interval, in the parsing thread,
+    so it never races the parser and costs nothing per line.
+    """
+    def __init__(self, parser: AnsibleExecutionParser, out: TextIO = sys.stderr,
+                 snapshot_interval: float = 30.0, json_path: Optional[str] = None,
+                 markdown_path: Optional[str] = None, max_hosts: int = 12):
+        self.parser = parser
+        self.out = out
+        self.interactive = out.isatty()
+        self.snapshot_interval = snapshot_interval
+        self.json_path = json_path
+        self.markdown_path = markdown_path
+        self.max_hosts = max_hosts
+        self.started = time.monotonic()
+        self.last_snapshot = self.started
+        self.host_counts: Dict[str, Dict[str, int]] = {}
+        self.last_status: Dict[str, str] = {}
+        self.task_hosts: Set[str] = set()
+        self.slowest: Optional[Tuple[float, str]] = None
+        self.drawn_lines = 0
+        parser.listeners.append(self.observe)
+    
+    def observe(self, node: ExecutionNode):
+        if node.task_type == "result":
+            counts = self.host_counts.setdefault(node.host, {})
+            counts[node.status] = counts.get(node.status, 0) + 1
+            self.last_status[node.host] = node.status
+            self.task_hosts.add(node.host)
+        elif node.task_type in ("task", "handler"):
+            self.task_hosts = set()
+            self._track_slowest()
+    
+    def _track_slowest(self):
+        # profile_tasks durations land after the next task header, so this
+        # also runs on every refresh
+        finished = self.parser.previous_task
+        if finished is not None and finished.duration and (
+                self.slowest is None or finished.duration > self.slowest[0]):
+            self.slowest = (finished.duration, finished.title)
+    
+    def _lines(self) -> List[str]:
+        parser = self.parser
+        self._track_slowest()
+        elapsed = int(time.monotonic() - self.started)
+        play = parser.current_play.title if parser.current_play else "-"
+        task = parser.current_task.title if parser.current_task else "-"
+        total_hosts = len(parser.metrics['total_hosts'])
+        failed_hosts = sorted(parser.metrics['failed_hosts'])
+        lines = [
+            f"⏱  {elapsed // 3600:02d}:{elapsed % 3600 // 60:02d}:{elapsed % 60:02d} elapsed | "
+            f"{parser.metrics['total_tasks']} tasks | {total_hosts} hosts",
+            f"🎭 {play}",
+            f"📋 {task} ({len(self.task_hosts)}/{total_hosts} hosts reported)",
+            f"❌ {parser.metrics['failed_tasks']} failures" + (f" on {', '.join(failed_hosts[:8])}" if failed_hosts else "")
+            + (f" (+{len(failed_hosts) - 8} more)" if len(failed_hosts) > 8 else ""),
+        ]
+        if self.slowest:
+            lines.append(f"🐌 Slowest so far: {self.slowest[1]} ({self.slowest[0]:.1f}s)")
+        if self.interactive:
+            for host in sorted(self.host_counts)[:self.max_hosts]:
+                counts = self.host_counts[host]
+                lines.append(
+                    f"   {STATUS_EMOJI.get(self.last_status[host], '⏭️')} {host:<20} "
+                    f"ok={counts.get('ok', 0)} changed={counts.get('changed', 0)} "
+                    f"failed={counts.get('failed', 0) + counts.get('fatal', 0)} skipped={counts.get('skipping', 0)}"
+                )
+            if len(self.host_counts) > self.max_hosts:
+                lines.append(f"   … {len(self.host_counts) - self.max_hosts} more hosts")
+        return lines
+    
+    def refresh(self):
+        lines = self._lines()
+        if self.interactive:
+            # Move back over the previous frame and clear it
+            if self.drawn_lines:
+                self.out.write(f"\x1b[{self.drawn_lines}F\x1b[J")
+            self.out.write("\n".join(lines) + "\n")
+            self.drawn_lines = len(lines)
+        else:
+            self.out.write(" | ".join(lines[:4]) + "\n")
+        self.out.flush()
+        now = time.monotonic()
+        if self.snapshot_interval and now - self.last_snapshot >= self.snapshot_interval:
+            self.last_snapshot = now
+            if self.json_path or self.markdown_path:
+                try:
+                    self.parser.write_snapshot(self.json_path, self.markdown_path)
+                except OSError as e:
+                    print(f"Warning: Could not write snapshot: {e}", file=sys.stderr)
+
+def _read_chunks(fd: int, chunks: 'queue.Queue[bytes]'):
+    # os.read returns whatever is available, so a quiet pipe still delivers
+    # its last lines promptly; b"" marks EOF
+    while True:
+        data = os.read(fd, 65536)
+        chunks.put(data)
+        if not data:
+            return
+
+def live_lines(stream, monitor: LiveMonitor, interval: float = 2.0) -> Iterator[str]:
+    """Yield lines from stream while refreshing monitor every interval seconds.
+    
+    A reader thread feeds raw chunks through a bounded queue, so the view
+    keeps refreshing while ansible-playbook is quiet, and a slow consumer
+    applies backpressure instead of buffering the whole log.
+    """
+    import codecs
+    import queue
+    import threading
+    chunks: 'queue.Queue[bytes]' = queue.Queue(maxsize=64)
+    reader = threading.Thread(target=_read_chunks, args=(stream.fileno(), chunks), daemon=True)
+    reader.start()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    pending = ""
+    next_refresh = time.monotonic() + interval
+    while True:
+        try:
+            data = chunks.get(timeout=max(0.0, next_refresh - time.monotonic()))
+        except queue.Empty:
+            data = None
+        if data == b"":
+            break
+        if data:
+            text = pending + decoder.decode(data)
+            if '\x1b' in text:
+                text = ANSI_ESCAPE_RE.sub('', text)
+            lines = text.split("\n")
+            pending = lines.pop()
+            yield from lines
+        if time.monotonic() >= next_refresh:
+            monitor.refresh()
+            next_refresh = time.monotonic() + interval
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+    monitor.refresh()
+
+def print_timeline(timeline: ExecutionTimeline, summary: Dict, limit: int = 10):
+    """Console section for --timeline"""
+    path = summary['critical_path']
+    if not path:
+        print("\n⏱️  Timeline: no timed tasks (needs profile_tasks, ANSIBLE_LOG_PATH or json/jsonl input)")
+        return
+    waits = sum(step['wait'] for step in path)
+    print(f"\n⏱️  Critical Path: {summary['critical_path_seconds']:.1f}s over {len(path)} steps "
+          f"({waits:.1f}s waiting between steps)")
+    for step in sorted(path, key=lambda step: step['duration'], reverse=True)[:limit]:
+        host = f" on {step['host']}" if timeline.host_timing else ""
+        print(f"   {step['duration']:>8.1f}s  {step['task']}{host}")
+    if not timeline.host_timing:
+        print("   (per-host timing needs ANSIBLE_LOG_PATH or json/jsonl input)")
+        return
+    print("\n🖥️  Busiest Hosts:")
+    for total in summary['hosts'][:limit]:
+        print(f"   {total['host']:<24} busy {total['busy']:>8.1f}s  tasks {total['tasks']:>5}  "
+              f"finished at {total['last_end']:.1f}s" + (f"  failed {total['failed']}" if total['failed'] else ""))
+    if summary['stragglers']:
+        print("\n🐢 Stragglers:")
+        for entry in summary['stragglers']:
+            print(f"   {entry['host']:<24} last on {entry['times_last']}/{entry['tasks']} tasks "
+                  f"({entry['last_ratio']:.0%}), {entry['mean_lag']:.1f}s behind the median host")
+    print("\n📈 Parallelism per Play:")
+    for play in summary['plays']:
+        print(f"   {play['play']}: {play['hosts']} hosts, {play['wall']:.1f}s wall, "
+              f"{play['parallelism']:.1f} hosts busy on average ({play['utilisation']:.0%} utilisation)")
+
+def report_history(args):
+    """Print --trend percentiles and --regressions from the run history"""
+    if not (args.trend or args.regressions):
+        return
+    history = RunHistory(args.history)
+    try:
+        if args.trend:
+            stats = history.task_percentiles(args.trend)
+            print(f"\n📈 Task duration percentiles (last {args.trend} runs):")
+            print(f"   {'p50':>8} {'p90':>8} {'p95':>8} {'max':>8} {'runs':>5}  task")
+            for stat in stats:
+                print(f"   {stat['p50']:>7.1f}s {stat['p90']:>7.1f}s {stat['p95']:>7.1f}s "
+                      f"{stat['max']:>7.1f}s {stat['samples']:>5}  {stat['task']}")
+        if args.regressions:
+            flagged = history.regressions(args.regression_baseline, args.regression_threshold,
+                                          args.regression_min_seconds)
+            if flagged:
+                print(f"\n🚨 Regressions vs. median of previous {args.regression_baseline} runs:")
+                for item in flagged:
+                    print(f"   {item['task']}: {item['baseline']:.1f}s -> {item['latest']:.1f}s "
+                          f"({item['ratio']:.1f}x over {item['samples']} runs)")
+            else:
+                print("\n✅ No task regressions against the history baseline")
+    finally:
+        history.close()
+
+def diff_main(args) -> int:
+    """--diff: print and/or write the diff of two runs; 1 if results newly fail"""
+    baseline, current = args.diff
+    try:
+        diff = diff_runs(load_run_index(baseline), load_run_index(current),
+                         args.regression_threshold, args.regression_min_seconds)
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found", file=sys.stderr)
+        return 1
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    diff['baseline']['source'] = baseline
+    diff['current']['source'] = current
+    if not args.quiet and args.diff_json != "-":
+        print_diff(diff, baseline, current, args.limit)
+    if args.diff_json:
+        text = _json_encoder(None if args.json_compact else 2)(diff)
+        if args.diff_json == "-":
+            print(text)
+        else:
+            try:
+                with open(args.diff_json, 'w', encoding='utf-8') as f:
+                    f.write(text + "\n")
+            except OSError as e:
+                print(f"Error: Could not write diff: {e}", file=sys.stderr)
+                return 1
+            if not args.quiet:
+                print(f"\n📁 Generated outputs:\n   🔀 Diff: {args.diff_json}")
+    return 1 if diff['summary']['new_failures'] else 0
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(
+        description='Advanced Ansible Execution Tree Parser with Analytics',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''
+Examples:
+  # Basic usage
+  python parse-ansible-execution.py ansible_output.log
+  
+  # Live monitoring
+  ansible-playbook site.yml | python parse-ansible-execution.py - --live --json live.json
+  
+  # Generate JSON report
+  python parse-ansible-execution.py ansible_output.log --json report.json
+  
+  # Generate HTML report
+  python parse-ansible-execution.py ansible_output.log --html report.html
+  
+  # HTML report of a large run showing only failed/changed subtrees
+  python parse-ansible-execution.py ansible_output.log --html report.html --only failed,changed --max-nodes 20000
+  
+  # Send Slack notification
+  python parse-ansible-execution.py ansible_output.log --slack-webhook https://hooks.slack.com/...
+  
+  # Constant-memory streaming with JSON Lines events
+  python parse-ansible-execution.py awx-job.log --stream --jsonl events.jsonl
+  
+  # Record runs and flag tasks that got slower than their recent baseline
+  python parse-ansible-execution.py deploy.log --history runs.db --regressions
+  python parse-ansible-execution.py --history runs.db --trend 30
+  
+  # Critical path, stragglers and a timeline for ui.perfetto.dev
+  python parse-ansible-execution.py deploy.log --timeline --trace deploy.trace.json
+  
+  # Query a run: failed results on workers, slow tasks of a role
+  python parse-ansible-execution.py deploy.log --where 'status=failed and host~worker*' --index deploy.idx.json
+  python parse-ansible-execution.py --query-index deploy.idx.json --where 'role=platform/mlflow and duration>30'
+  
+  # What changed since yesterday's run: new failures, slower tasks and hosts
+  python parse-ansible-execution.py --diff yesterday.json today.log --diff-json diff.json
+  
+  # Combined report over many runs, parsed in parallel
+  python parse-ansible-execution.py 'logs/deploy-*.log' --jobs 8 --json combined.json
+  
+  # CI/CD integration
+  ansible-playbook site.yml 2>&1 | tee deploy.log | python parse-ansible-execution.py - --json ci-report.json --slack-webhook $SLACK_WEBHOOK
+        '''
+    )
+    
+    parser.add_argument('input_files', nargs='*', metavar='input_file',
+                        help='Ansible output file(s) or glob(s), or "-" for stdin')
+    parser.add_argument('--json', '-j', metavar='FILE', help='Generate JSON report to specified file')
+    parser.add_argument('--json-compact', action='store_true', help='Write the JSON report without indentation')
+    parser.add_argument('--html', '-H', metavar='FILE', help='Generate HTML report to specified file')
+    parser.add_argument('--markdown', '-m', metavar='FILE', help='Generate Markdown report to specified file')
+    parser.add_argument('--slack-webhook', '-s', metavar='URL', help='Send summary to Slack webhook')
+    parser.add_argument('--slack-channel', '-c', metavar='CHANNEL', help='Slack channel (optional)')
+    parser.add_argument('--teams-webhook', metavar='URL', action='append', default=[],
+                        help='Send summary to a Microsoft Teams incoming webhook (repeatable)')
+    parser.add_argument('--webhook', metavar='URL', action='append', default=[],
+                        help='POST the summary as plain JSON to URL (repeatable)')
+    parser.add_argument('--notify-timeout', type=float, default=10.0, metavar='SECONDS',
+                        help='Timeout of each notification request (default: 10)')
+    parser.add_argument('--notify-retries', type=int, default=3, metavar='N',
+                        help='Retries on connection errors, 429 and 5xx, with exponential backoff (default: 3)')
+    parser.add_argument('--alert-failures', action='store_true',
+                        help='Also notify about failures while parsing, e.g. with --live')
+    parser.add_argument('--alert-interval', type=float, default=30.0, metavar='SECONDS',
+                        help='Batch failure alerts to at most one per interval (default: 30)')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                        help='Write run metrics in the Prometheus text format to FILE (node_exporter textfile collector)')
+    parser.add_argument('--pushgateway', metavar='URL', help='Push run metrics to a Prometheus Pushgateway')
+    parser.add_argument('--metrics-job', default='ansible', metavar='NAME', help='Pushgateway job name (default: ansible)')
+    parser.add_argument('--metrics-label', action='append', default=[], metavar='KEY=VALUE',
+                        help='Label added to every exported series (repeatable), e.g. playbook=site')
+    parser.add_argument('--metrics-buckets', metavar='SECONDS',
+                        help='Task duration histogram buckets, comma-separated (default: 1,5,15,30,60,120,300,600,1800,3600)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Suppress console output')
+    parser.add_argument('--no-tree', action='store_true', help='Skip tree output (useful for CI/CD)')
+    parser.add_argument('--performance', '-p', action='store_true', help='Show detailed performance analysis')
+    parser.add_argument('--only', metavar='STATUSES', help='Only render results with these statuses and their parents, e.g. failed,changed')
+    parser.add_argument('--max-nodes', type=int, metavar='N', help='Truncate tree output (console, Markdown, HTML) after N nodes')
+    parser.add_argument('--payloads', choices=['failed', 'all', 'none'], default='failed',
+                        help='Capture multi-line result payloads (-v output) for failed results, all results or none (default: failed)')
+    parser.add_argument('--max-payload-bytes', type=int, default=DEFAULT_PAYLOAD_BYTES, metavar='N',
+                        help=f'Truncate each captured payload after N bytes (default: {DEFAULT_PAYLOAD_BYTES})')
+    parser.add_argument('--stream', action='store_true', help='Constant-memory streaming mode: emit events instead of building the tree')
+    parser.add_argument('--jsonl', metavar='FILE', help='Write streaming events as JSON Lines to FILE ("-" for stdout, implies --stream)')
+    parser.add_argument('--live', action='store_true', help='Show a live progress view (on stderr) while reading')
+    parser.add_argument('--refresh', type=float, default=2.0, metavar='SECONDS', help='Live view refresh interval (default: 2)')
+    parser.add_argument('--snapshot-interval', type=float, default=30.0, metavar='SECONDS',
+                        help='In live mode, rewrite --json/--markdown with partial reports this often (default: 30, 0 disables)')
+    parser.add_argument('--timeline', action='store_true',
+                        help='Per-host timeline analysis: critical path, host totals, stragglers, parallelism per play')
+    parser.add_argument('--trace', metavar='FILE', help='Write a Chrome trace-event / Perfetto timeline to FILE')
+    parser.add_argument('--where', metavar='EXPR',
+                        help="List results matching EXPR, e.g. 'status=failed and host~worker*' "
+                             "(fields: status, host, play, task, role, duration; ops: = != ~ > >= < <=)")
+    parser.add_argument('--limit', type=int, default=50, metavar='N', help='Show at most N --where matches or --diff entries per section (default: 50, 0 = all)')
+    parser.add_argument('--index', metavar='FILE', help='Save the result index to FILE for later --query-index queries')
+    parser.add_argument('--query-index', metavar='FILE', help='Answer --where from an index saved with --index instead of parsing')
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two runs (logs, --json reports or --index files): status changes and duration deltas')
+    parser.add_argument('--diff-json', metavar='FILE', help='Write the --diff result as JSON to FILE ("-" for stdout)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Report pattern hits and match time, phase times and peak memory (stderr and --json)')
+    parser.add_argument('--profile-dump', metavar='FILE', help='Run under cProfile and write pstats data to FILE')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='Resume parsing a growing log from the state saved in FILE, then update it '
+                             '(a pickle: only use checkpoint files written by this tool in a trusted location)')
+    parser.add_argument('--jobs', type=int, metavar='N', help='Worker processes for multiple input files (default: CPU count)')
+    parser.add_argument('--history', metavar='DB', help='Append this run to a SQLite run-history database')
+    parser.add_argument('--trend', type=int, metavar='N', help='Show per-task duration percentiles over the last N runs in --history')
+    parser.add_argument('--regressions', action='store_true', help='Flag tasks of the latest run that regressed against their --history baseline')
+    parser.add_argument('--regression-threshold', type=float, default=1.5, metavar='X', help='Regression factor over the baseline median, or between --diff runs (default: 1.5)')
+    parser.add_argument('--regression-baseline', type=int, default=20, metavar='N', help='Number of previous runs forming the baseline (default: 20)')
+    parser.add_argument('--regression-min-seconds', type=float, default=5.0, metavar='S', help='Ignore regressions (and --diff duration changes) smaller than S seconds (default: 5)')
+    
+    args = parser.parse_args(argv)
+    if args.profile_dump:
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(_main, parser, args)
+        finally:
+            profile.dump_stats(args.profile_dump)
+    return _main(parser, args)
+
+def _main(parser: 'argparse.ArgumentParser', args: 'argparse.Namespace') -> int:
+    paths = expand_inputs(args.input_files)
+    if args.query_index:
+        if not args.where:
+            parser.error('--query-index requires --where')
+        try:
+            with open(args.query_index, encoding='utf-8') as f:
+                index = RunIndex.load(f)
+            print_query(index, args.where, index.query(args.where), args.limit)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+    if args.diff_json and not args.diff:
+        parser.error('--diff-json requires --diff')
+    if args.diff:
+        if paths:
+            parser.error('--diff takes its two runs as arguments, not input files')
+        return diff_main(args)
+    if (args.trend or args.regressions) and not args.history:
+        parser.error('--trend and --regressions require --history')
+    if not paths:
+        if not args.history:
+            parser.error('the following arguments are required: input_file')
+        # Query-only invocation against the run history
+        report_history(args)
+        return 0
+    if len(paths) > 1 and "-" in paths:
+        parser.error('"-" (stdin) cannot be combined with other input files')
+    if len(paths) > 1 and args.jsonl:
+        parser.error('--jsonl is only supported for a single input file')
+    if len(paths) > 1 and args.live:
+        parser.error('--live is only supported for a single input file')
+    if args.jsonl:
+        args.stream = True
+        if args.jsonl == "-":
+            args.quiet = True
+    sinks = ([NotificationSink('slack', args.slack_webhook, args.slack_channel)] if args.slack_webhook else []) \
+        + [NotificationSink('teams', url) for url in args.teams_webhook] \
+        + [NotificationSink('webhook', url) for url in args.webhook]
+    if args.alert_failures and not sinks:
+        parser.error('--alert-failures requires --slack-webhook, --teams-webhook or --webhook')
+    if len(paths) > 1 and (args.where or args.index):
+        parser.error('--where and --index are only supported for a single input file')
+    if args.where:
+        try:
+            RunIndex().query(args.where)  # syntax check before a long parse
+        except ValueError as e:
+            parser.error(f'--where: {e}')
+    if len(paths) > 1 and args.alert_failures:
+        parser.error('--alert-failures is only supported for a single input file')
+    export_metrics = bool(args.metrics_file or args.pushgateway)
+    if export_metrics:
+        if len(paths) > 1:
+            parser.error('--metrics-file and --pushgateway are only supported for a single input file')
+        if args.checkpoint:
+            parser.error('--metrics-file and --pushgateway cannot be combined with --checkpoint')
+        metric_labels = {}
+        for label in args.metrics_label:
+            key, separator, value = label.partition('=')
+            if not separator or not re.fullmatch(r'[a-zA-Z_][a-zA-Z0-9_]*', key):
+                parser.error(f'--metrics-label: expected KEY=VALUE with a valid label name, got {label!r}')
+            metric_labels[key] = value
+        try:
+            buckets = [float(bound) for bound in args.metrics_buckets.split(',')] if args.metrics_buckets \
+                else DEFAULT_DURATION_BUCKETS
+        except ValueError as e:
+            parser.error(f'--metrics-buckets: {e}')
+    if args.checkpoint:
+        if len(paths) > 1 or paths[0] == "-":
+            parser.error('--checkpoint requires a single input file path')
+        if args.live or args.jsonl or args.where or args.index:
+            parser.error('--checkpoint cannot be combined with --live, --jsonl, --where or --index')
+    
+    payload_statuses = {'failed': FAILED_STATUSES, 'all': tuple(STATUS_EMOJI) + ('skipping',), 'none': ()}[args.payloads]
+    execution_parser = AnsibleExecutionParser(streaming=args.stream, record_tasks=bool(args.history),
+                                              payload_statuses=payload_statuses,
+                                              max_payload_bytes=args.max_payload_bytes)
+    monitor = None
+    if args.live:
+        monitor = LiveMonitor(execution_parser, snapshot_interval=args.snapshot_interval,
+                              json_path=args.json, markdown_path=args.markdown)
+    index = RunIndex(execution_parser) if args.where or args.index else None
+    dispatcher = None
+    alerter = None
+    checkpoint_info = None
+    exporter = PrometheusExporter(execution_parser, buckets, metric_labels) if export_metrics else None
+    profiler = None
+    if args.profile:
+        profiler = ParseProfiler()
+        profiler.attach(execution_parser)
+    lap = profiler.lap if profiler else (lambda name: None)
+    if sinks:
+        dispatcher = NotificationDispatcher(sinks, timeout=args.notify_timeout, retries=args.notify_retries)
+        if args.alert_failures:
+            alerter = FailureAlerter(execution_parser, dispatcher, interval=args.alert_interval)
+    
+    def consume(lines):
+        if not args.stream:
+            execution_parser.parse(lines)
+            execution_parser.finalize_metrics()
+            return
+        events_out = None
+        if args.jsonl:
+            events_out = sys.stdout if args.jsonl == "-" else open(args.jsonl, 'w')
+        try:
+            for event in execution_parser.stream(lines):
+                if events_out:
+                    events_out.write(json.dumps(event) + "\n")
+        finally:
+            if events_out and events_out is not sys.stdout:
+                events_out.close()
+    
+    try:
+        if len(paths) > 1:
+            # Several runs: parse in worker processes, keep only merged metrics
+            execution_parser = AnsibleExecutionParser.from_runs(
+                parse_runs(paths, args.jobs, record_tasks=bool(args.history))
+            )
+            execution_parser.profiler = profiler
+            args.stream = True
+        elif args.checkpoint:
+            # Only the lines appended since the last run are parsed
+            checkpoint_info = parse_incremental(paths[0], args.checkpoint, execution_parser)
+        elif monitor:
+            # Live view reads plain text as it arrives
+            if paths[0] == "-":
+                consume(live_lines(sys.stdin, monitor, args.refresh))
+            else:
+                with open(paths[0], 'rb') as f:
+                    consume(live_lines(f, monitor, args.refresh))
+        else:
+            # stdin or file, plain or compressed
+            consume(read_log(sys.stdin.buffer if paths[0] == "-" else paths[0]))
+    except FileNotFoundError as e:
+        print(f"Error: File '{e.filename}' not found", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # The reader of --jsonl - went away (e.g. "| head"): stop like a tool
+        # killed by SIGPIPE, with stdout on devnull so the exit flush is quiet
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+        return 141
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    lap('ingest')
+    if index is not None:
+        index.finish()
+        lap('index')
+    
+    # Notifications go out while the reports below are written
+    if dispatcher:
+        if alerter:
+            alerter.flush()
+        dispatcher.send(partial(summary_payload, metrics=execution_parser.metrics))
+        lap('notify')
+    
+    # Tree outputs (console, Markdown, HTML) share a single traversal
+    outputs_created = []
+    writers = []
+    open_files = []
+    written = []
+    only = args.only.split(',') if args.only else None
+    
+    show_tree = not args.quiet and not args.no_tree and not args.stream
+    if show_tree:
+        writers.append(TextTreeWriter(sys.stdout))
+    
+    # Markdown output (the tree is not retained in streaming mode)
+    if args.markdown:
+        if args.stream:
+            print("Warning: Markdown tree is not available in streaming or multi-run mode", file=sys.stderr)
+        else:
+            try:
+                f = open(args.markdown, 'w', encoding='utf-8')
+                open_files.append(f)
+                writers.append(MarkdownWriter(f, summary=True))
+                written.append(f"📝 Markdown: {args.markdown}")
+            except Exception as e:
+                print(f"Warning: Could not create markdown file: {e}", file=sys.stderr)
+    
+    # HTML output
+    if args.html:
+        try:
+            f = open(args.html, 'w', encoding='utf-8')
+            open_files.append(f)
+            writers.append(HtmlWriter(f))
+            written.append(f"🌐 HTML: {args.html}")
+        except Exception as e:
+            print(f"Error: Could not create HTML file: {e}", file=sys.stderr)
+    
+    if show_tree:
+        print("\n" + "="*80)
+        print("ANSIBLE EXECUTION TREE")
+        print("="*80)
+    if writers:
+        if profiler:
+            for writer in writers:
+                profiler.instrument_writer(writer, type(writer).__name__.replace('Tree', '')[:-len('Writer')].lower())
+        try:
+            execution_parser.render(writers, only=only, max_nodes=args.max_nodes)
+            outputs_created.extend(written)
+        except Exception as e:
+            print(f"Error: Could not render execution tree: {e}", file=sys.stderr)
+        finally:
+            for f in open_files:
+                f.close()
+        lap('render')
+    
+    # Console output
+    if not args.quiet:
+        print(f"\n📊 Execution Summary:")
+        print(f"   Duration: {execution_parser.metrics['total_duration']:.1f}s")
+        print(f"   Success Rate: {execution_parser.metrics['success_rate']:.1f}%")
+        print(f"   Total Tasks: {execution_parser.metrics['total_tasks']}")
+        print(f"   Failed Tasks: {execution_parser.metrics['failed_tasks']}")
+        print(f"   Changed Tasks: {execution_parser.metrics['changed_tasks']}")
+        rates = execution_parser.metrics.get('rates') or {}
+        if execution_parser.metrics.get('total_operations'):
+            print(f"   Operations: {execution_parser.metrics['total_operations']} ("
+                  + ", ".join(f"{status} {rate:.1f}%" for status, rate in rates.items() if rate) + ")")
+        print(f"   Hosts: {', '.join(execution_parser.metrics['total_hosts'])}")
+        recap_check = execution_parser.metrics.get('recap_check')
+        if recap_check and recap_check['mismatches']:
+            print(f"   ⚠️  Counts disagree with PLAY RECAP in {len(recap_check['mismatches'])} place(s):")
+            for mismatch in recap_check['mismatches'][:5]:
+                source = f" ({mismatch['source']})" if 'source' in mismatch else ""
+                print(f"     {mismatch['host']} {mismatch['field']}: counted {mismatch['counted']}, "
+                      f"recap {mismatch['recap']}{source}")
+        if execution_parser.runs:
+            print(f"   Runs: {len(execution_parser.runs)}")
+            for run in execution_parser.runs:
+                run_metrics = run['metrics']
+                status_emoji = "❌" if run_metrics['failed_tasks'] else "✅"
+                print(f"     {status_emoji} {run['source']} - {run_metrics['total_duration']:.1f}s, "
+                      f"{run_metrics['total_tasks']} tasks, {run_metrics['failed_tasks']} failed")
+        
+        if args.performance and execution_parser.metrics['slowest_tasks']:
+            print(f"\n🐌 Slowest Tasks:")
+            for task in execution_parser.metrics['slowest_tasks'][:5]:
+                status_emoji = "❌" if task['status'] == 'failed' else "✅"
+                source = f" ({task['source']})" if 'source' in task else ""
+                print(f"   {status_emoji} {task['name']} - {task['duration']:.1f}s{source}")
+        lap('console')
+    
+    # Queries over the result index
+    if index is not None:
+        if args.where and not args.quiet:
+            print_query(index, args.where, index.query(args.where), args.limit)
+        if args.index:
+            try:
+                with open(args.index, 'w', encoding='utf-8') as f:
+                    index.save(f)
+                outputs_created.append(f"🔎 Index: {args.index} ({len(index):,} results)")
+            except OSError as e:
+                print(f"Error: Could not write index: {e}", file=sys.stderr)
+        lap('index')
+    
+    # Timeline analysis (needs the tree)
+    if args.timeline or args.trace:
+        if args.stream:
+            print("Warning: Timeline analysis is not available in streaming or multi-run mode", file=sys.stderr)
+        else:
+            timeline = ExecutionTimeline(execution_parser)
+            if args.timeline:
+                execution_parser.metrics['timeline'] = timeline.summary()
+                if not args.quiet:
+                    print_timeline(timeline, execution_parser.metrics['timeline'])
+            if args.trace:
+                try:
+                    with open(args.trace, 'w', encoding='utf-8') as f:
+                        timeline.write_chrome_trace(f)
+                    outputs_created.append(f"🧭 Trace: {args.trace}")
+                except OSError as e:
+                    print(f"Error: Could not create trace file: {e}", file=sys.stderr)
+        lap('timeline')
+    
+    # JSON output
+    if args.json:
+        try:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                execution_parser.write_json_report(f, indent=None if args.json_compact else 2)
+            outputs_created.append(f"🔧 JSON: {args.json}")
+        except Exception as e:
+            print(f"Error: Could not create JSON file: {e}", file=sys.stderr)
+        lap('json')
+    
+    # Prometheus metrics
+    if exporter:
+        exposition = exporter.render(execution_parser.metrics)
+        if args.metrics_file:
+            try:
+                write_metrics_file(args.metrics_file, exposition)
+                outputs_created.append(f"📈 Metrics: {args.metrics_file} ({len(exporter.histograms):,} task histograms)")
+            except OSError as e:
+                print(f"Error: Could not write metrics file: {e}", file=sys.stderr)
+        if args.pushgateway:
+            try:
+                import requests
+            except ImportError:
+                print(f"Warning: Could not push metrics to {args.pushgateway}: "
+                      f"the requests package is not installed", file=sys.stderr)
+            else:
+                try:
+                    push_metrics(args.pushgateway, args.metrics_job, exposition, timeout=args.notify_timeout)
+                    outputs_created.append(f"📈 Pushgateway: {args.pushgateway} (job {args.metrics_job})")
+                except requests.RequestException as e:
+                    print(f"Warning: Could not push metrics to {args.pushgateway}: {e}", file=sys.stderr)
+        lap('metrics')
+    
+    # Run history
+    if args.history:
+        import sqlite3
+        try:
+            history = RunHistory(args.history)
+            try:
+                if execution_parser.runs:
+                    for run in execution_parser.runs:
+                        history.record(run['source'], run['execution_summary'], run['metrics'], run.pop('tasks'))
+                else:
+                    source = "stdin" if paths[0] == "-" else paths[0]
+                    history.record(source, execution_parser._execution_summary(), execution_parser.metrics,
+                                   execution_parser.task_records())
+            finally:
+                history.close()
+            outputs_created.append(f"🗄️  History: {args.history}")
+            report_history(args)
+        except sqlite3.Error as e:
+            print(f"Error: Could not update run history: {e}", file=sys.stderr)
+        lap('history')
+    
+    # Notifications (sent in the background since parsing finished)
+    if dispatcher:
+        sent: Dict[str, int] = {}
+        failed: Dict[NotificationSink, Tuple[int, str]] = {}
+        for sink, error in dispatcher.close():
+            if error:
+                failed[sink] = (failed.get(sink, (0, ""))[0] + 1, error)
+            else:
+                sent[sink.kind] = sent.get(sink.kind, 0) + 1
+        for sink, (count, error) in failed.items():
+            print(f"Warning: {count} {sink.kind} notification(s) to {sink.url} failed: {error}", file=sys.stderr)
+        for kind, count in sent.items():
+            outputs_created.append(f"📢 {kind.capitalize()} notifications sent: {count}")
+        if alerter and alerter.sent:
+            outputs_created.append(f"🚨 Failure alerts: {alerter.sent} failures reported while parsing")
+        lap('notify')
+    
+    if checkpoint_info:
+        parsed = checkpoint_info['end'] - checkpoint_info['start']
+        if checkpoint_info['mode'] == 'incremental':
+            outputs_created.append(f"♻️  Checkpoint: {args.checkpoint} "
+                                   f"(resumed at byte {checkpoint_info['start']:,}, {parsed:,} new bytes)")
+        else:
+            outputs_created.append(f"♻️  Checkpoint: {args.checkpoint} "
+                                   f"(full parse of {parsed:,} bytes: {checkpoint_info['reason']})")
+    
+    # Summary of outputs
+    if not args.quiet and outputs_created:
+        print(f"\n📁 Generated outputs:")
+        for output in outputs_created:
+            print(f"   {output}")
+    
+    if profiler:
+        print_profile(profiler.report())
+    
+    # Exit with error code if there were failures
+    return 1 if execution_parser.metrics['failed_tasks'] > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
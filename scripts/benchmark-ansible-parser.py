@@ -0,0 +1,710 @@
+#!/usr/bin/env python3
+"""
+Ansible Execution Parser Benchmark
+Measures parse throughput of ansible_execution_parser.py on a synthetic log
+
+The synthetic log mimics a `-vv` run of cluster.yml: most lines are noise
+(task path, SSH debug output, separators) and only a minority are PLAY/TASK
+headers or per-host results.  The legacy classifier (six inline re.match
+calls per line) is kept here as the "before" baseline.
+
+Examples:
+  # 256 MB synthetic log, compare classifiers and full parse
+  python scripts/benchmark-ansible-parser.py
+
+  # Multi-GB run, keep the generated log for later runs
+  python scripts/benchmark-ansible-parser.py --size-mb 2048 --log /tmp/synthetic.log --keep
+
+  # Execution tree memory: tracemalloc peak per million result lines
+  python scripts/benchmark-ansible-parser.py --memory 1000000
+
+  # Multi-log ingestion speedup: 16 logs of 64 MB, jobs = 1, 2, 4 ... CPU count
+  python scripts/benchmark-ansible-parser.py --parallel 16 --size-mb 64
+
+  # Input engines: one run of 1M results as text, json and jsonl callback output
+  python scripts/benchmark-ansible-parser.py --engines 1000000
+
+  # Archived logs: text-layer decompression vs read_log() for gzip, bz2, xz (and zstd)
+  python scripts/benchmark-ansible-parser.py --compression --size-mb 512
+
+  # Suite: parse, finalize, renderers, JSON export and memory on a configurable
+  # run, results saved as JSON and compared with an earlier commit's results
+  python scripts/benchmark-ansible-parser.py --suite --plays 8 --tasks 60 --hosts 40 \\
+      --loop-items 5 --failure-ratio 0.02 --verbosity 2 --results bench-$(git rev-parse --short HEAD).json
+  python scripts/benchmark-ansible-parser.py --suite --compare bench-abc1234.json
+
+  # Startup: -X importtime of the parser module against a budget (exit 1 when over)
+  python scripts/benchmark-ansible-parser.py --startup --import-budget-ms 30
+"""
+
+import os
+import re
+import bz2
+import sys
+import gzip
+import json
+import lzma
+import time
+import random
+import platform
+import tracemalloc
+import argparse
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+# Modules the plain parse path must not pull in at import time
+LAZY_MODULES = ("requests", "sqlite3", "html", "mmap", "concurrent.futures", "threading", "orjson")
+
+NOISE_LINES = [
+    "task path: /home/runner/ml-platform/infrastructure/cluster/roles/{role}/tasks/main.yml:{n}",
+    "<{host}> ESTABLISH SSH CONNECTION FOR USER: ansible",
+    "<{host}> SSH: EXEC ssh -C -o ControlMaster=auto -o ControlPersist=60s -o StrictHostKeyChecking=no {host} '/bin/sh -c '\"'\"'echo ~ansible && sleep 0'\"'\"''",
+    "<{host}> (0, b'/home/ansible\\n', b'')",
+    "Using module file /usr/lib/python3/dist-packages/ansible/modules/command.py",
+    "META: role_complete for {host}",
+    "redirecting (type: modules) ansible.builtin.k8s to kubernetes.core.k8s",
+]
+
+ROLES = ["foundation/k3s_control_plane", "foundation/k3s_workers", "cni/cilium",
+         "storage/minio", "platform/mlflow", "platform/harbor", "monitoring/prometheus"]
+
+def load_parser_module():
+    import ansible_execution_parser
+    return ansible_execution_parser
+
+def measure_startup(runs: int, budget_ms: float) -> bool:
+    """Median -X importtime of the parser module in fresh interpreters.
+    
+    Bytecode is compiled first, as it would be after the first run on a
+    CI agent.  Returns False when the budget is exceeded or one of
+    LAZY_MODULES was imported eagerly.
+    """
+    subprocess.run([sys.executable, "-m", "py_compile", str(SCRIPTS_DIR / "ansible_execution_parser.py")], check=True)
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    # Prints the modules the import added (site may have loaded some already)
+    code = (f"import sys; sys.path.insert(0, {str(SCRIPTS_DIR)!r}); before = set(sys.modules); "
+            "import ansible_execution_parser; print(' '.join(set(sys.modules) - before))")
+    samples = []
+    eager = set()
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                                capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == "ansible_execution_parser":
+                samples.append(int(fields[1]) / 1000)
+        eager.update(set(result.stdout.split()) & set(LAZY_MODULES))
+    median = statistics.median(samples)
+    print(f"Import ansible_execution_parser: median {median:.1f} ms, min {min(samples):.1f} ms "
+          f"over {runs} runs (budget {budget_ms:.0f} ms)")
+    if eager:
+        print(f"Imported eagerly: {', '.join(sorted(eager))}")
+    ok = median <= budget_ms and not eager
+    print("Startup budget: " + ("OK" if ok else "EXCEEDED"))
+    return ok
+
+def generate_log(path: str, size_mb: int, hosts: int = 40, seed: int = 42) -> int:
+    """Write a synthetic -vv log of roughly size_mb megabytes, return line count"""
+    rng = random.Random(seed)
+    host_names = [f"node{i:02d}" for i in range(hosts)]
+    target = size_mb * 1024 * 1024
+    written = 0
+    lines = 0
+    play = 0
+    with open(path, 'w') as f:
+        while written < target:
+            play += 1
+            chunk = [f"PLAY [Deploy platform layer {play}] " + "*" * 60, ""]
+            for task in range(25):
+                role = rng.choice(ROLES)
+                chunk.append(f"TASK [{role} : step {task}] " + "*" * 50)
+                for host in host_names:
+                    for template in rng.sample(NOISE_LINES, 3):
+                        chunk.append(template.format(role=role, host=host, n=rng.randint(1, 200)))
+                    roll = rng.random()
+                    if roll < 0.6:
+                        chunk.append(f"ok: [{host}]")
+                    elif roll < 0.85:
+                        chunk.append(f'changed: [{host}] => {{"changed": true, "rc": 0}}')
+                    elif roll < 0.99:
+                        chunk.append(f"skipping: [{host}]")
+                    else:
+                        chunk.append(f'fatal: [{host}]: FAILED! => {{"msg": "timeout"}}')
+                chunk.append("")
+            text = "\n".join(chunk) + "\n"
+            f.write(text)
+            written += len(text.encode())
+            lines += len(chunk)
+        f.write("PLAY RECAP " + "*" * 60 + "\n")
+        for host in host_names:
+            f.write(f"{host} : ok=10 changed=2 unreachable=0 failed=0 skipped=1 rescued=0 ignored=0\n")
+            lines += 1
+    return lines + 1
+
+def _profile_line(clock: datetime, previous: float, elapsed: float) -> str:
+    """profile_tasks line printed at a task start"""
+    def hms(seconds: float) -> str:
+        return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+    return f"{clock.strftime('%A %d %B %Y  %H:%M:%S')} +0000 ({hms(previous)})       {hms(elapsed)} " + "*" * 30
+
+def _failure_payload(host: str, payload_bytes: int, rng: random.Random) -> List[str]:
+    """Multi-line (-v) result payload of roughly payload_bytes"""
+    lines = [f"fatal: [{host}]: FAILED! => {{", '    "changed": false,',
+             '    "cmd": "kubectl rollout status deployment/mlflow -n mlflow --timeout=300s",',
+             '    "msg": "non-zero return code",', '    "rc": 1,',
+             '    "stderr": "error: timed out waiting for the condition",', '    "stdout_lines": [']
+    size = sum(len(line) + 1 for line in lines)
+    output = []
+    while size < payload_bytes:
+        line = f'        "Waiting for deployment \\"mlflow\\" rollout to finish: {rng.randint(0, 3)} of 3 updated replicas are available..."'
+        output.append(line)
+        size += len(line) + 2
+    lines.append(",\n".join(output))
+    lines += ["    ]", "}"]
+    return lines
+
+def generate_run(path: str, plays: int = 4, tasks: int = 50, hosts: int = 40, loop_items: int = 0,
+                 failure_ratio: float = 0.01, verbosity: int = 1, payload_bytes: int = 2048,
+                 seed: int = 42) -> Dict:
+    """Write a deterministic synthetic run shaped by the given parameters.
+    
+    Every 4th task loops over loop_items items when loop_items > 0.
+    verbosity 0 prints bare results, 1 adds result payloads (failures as
+    multi-line JSON of about payload_bytes), 2 adds -vv SSH/task-path noise.
+    Task starts carry profile_tasks timestamps and the PLAY RECAP matches
+    the results, so the recap check must come out clean.
+    
+    Returns the line, byte and result counts of the log.
+    """
+    rng = random.Random(seed)
+    host_names = [f"node{i:02d}" for i in range(hosts)]
+    stats = {host: {"ok": 0, "changed": 0, "failed": 0, "skipped": 0} for host in host_names}
+    clock = datetime(2026, 10, 17, 10, 0, 0)
+    started = clock
+    previous = 0.0
+    lines = 0
+    results = 0
+    size = 0
+    with open(path, "w") as f:
+        for play in range(1, plays + 1):
+            chunk = [f"PLAY [Deploy platform layer {play}] " + "*" * 60, ""]
+            for task in range(tasks):
+                role = ROLES[(play + task) % len(ROLES)]
+                items = loop_items if loop_items and task % 4 == 3 else 0
+                chunk.append(f"TASK [{role} : step {task}] " + "*" * 50)
+                chunk.append(_profile_line(clock, previous, (clock - started).total_seconds()))
+                for host in host_names:
+                    if verbosity >= 2:
+                        for template in rng.sample(NOISE_LINES, 3):
+                            chunk.append(template.format(role=role, host=host, n=rng.randint(1, 200)))
+                    roll = rng.random()
+                    if roll < failure_ratio:
+                        status = "failed"
+                    else:
+                        roll = rng.random()
+                        status = "ok" if roll < 0.6 else "changed" if roll < 0.85 else "skipping"
+                    if items and status != "failed":
+                        for item in range(items):
+                            chunk.append(f"{status}: [{host}] => (item=package-{item})")
+                    elif status == "failed":
+                        if verbosity >= 1:
+                            chunk.extend(_failure_payload(host, payload_bytes, rng))
+                        else:
+                            chunk.append(f'fatal: [{host}]: FAILED! => {{"changed": false, "msg": "timeout", "rc": 1}}')
+                    elif status == "changed" and verbosity >= 1:
+                        chunk.append(f'changed: [{host}] => {{"changed": true, "rc": 0}}')
+                    else:
+                        chunk.append(f"{status}: [{host}]")
+                    counts = stats[host]
+                    counts["skipped" if status == "skipping" else status] += 1
+                    counts["ok"] += status == "changed"
+                    results += 1
+                chunk.append("")
+                previous = rng.uniform(0.5, 30.0)
+                clock += timedelta(seconds=previous)
+            text = "\n".join(chunk) + "\n"
+            f.write(text)
+            size += len(text.encode())
+            lines += text.count("\n")
+        recap = ["PLAY RECAP " + "*" * 60]
+        for host, counts in stats.items():
+            recap.append(f"{host:<26} : ok={counts['ok']:<4} changed={counts['changed']:<4} unreachable=0    "
+                         f"failed={counts['failed']:<4} skipped={counts['skipped']:<4} rescued=0    ignored=0")
+        recap.append(_profile_line(clock, previous, (clock - started).total_seconds()))
+        text = "\n".join(recap) + "\n"
+        f.write(text)
+        size += len(text.encode())
+        lines += len(recap)
+    return {"lines": lines, "bytes": size, "results": results}
+
+def _best_of(repeat: int, func) -> Tuple[float, object]:
+    """Fastest of repeat calls, with the value of the last one"""
+    best = float("inf")
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func()
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+def _peak_rss_mb(path: str, streaming: bool) -> float:
+    """Peak RSS of a fresh interpreter parsing path (tree or streaming mode)"""
+    # ParseProfiler.peak_rss_mb() handles the ru_maxrss units of each platform
+    code = (f"import sys; sys.path.insert(0, {str(SCRIPTS_DIR)!r}); import ansible_execution_parser as m; "
+            f"m.parse({path!r}, streaming={streaming}); print(m.ParseProfiler.peak_rss_mb())")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output)
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPTS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_suite(module, path: str, shape: Dict, info: Dict, repeat: int) -> Dict:
+    """Time parsing, finalize, each renderer and JSON export of one run; measure memory"""
+    size_mb = info["bytes"] / (1024 * 1024)
+    timings = {}
+
+    def tree_parser():
+        parser = module.AnsibleExecutionParser()
+        parser.parse(module.read_log(path))
+        return parser
+
+    timings["parse_tree"], parser = _best_of(repeat, tree_parser)
+    timings["parse_stream"], _ = _best_of(repeat, lambda: module.parse(path, streaming=True))
+    # One-shot: a second call would finalize already finalized metrics
+    timings["finalize_metrics"], _ = _best_of(1, parser.finalize_metrics)
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        writers = {
+            "render_text": lambda: [module.TextTreeWriter(sink)],
+            "render_markdown": lambda: [module.MarkdownWriter(sink, summary=True)],
+            "render_html": lambda: [module.HtmlWriter(sink)],
+            "render_all": lambda: [module.TextTreeWriter(sink), module.MarkdownWriter(sink, summary=True),
+                                   module.HtmlWriter(sink)],
+        }
+        for name, make in writers.items():
+            timings[name], _ = _best_of(repeat, lambda: parser.render(make()))
+        timings["json_export"], _ = _best_of(repeat, lambda: parser.write_json_report(sink, indent=2))
+        timings["json_export_compact"], _ = _best_of(repeat, lambda: parser.write_json_report(sink, indent=None))
+
+    tracemalloc.start()
+    tree_parser().finalize_metrics()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    benchmarks = {}
+    for name, seconds in timings.items():
+        entry = {"seconds": round(seconds, 6)}
+        if name.startswith("parse"):
+            entry.update(mb_per_sec=round(size_mb / seconds, 2), lines_per_sec=round(info["lines"] / seconds))
+        entry["results_per_sec"] = round(info["results"] / seconds)
+        benchmarks[name] = entry
+    recap_check = parser.metrics.get("recap_check") or {}
+    return {
+        "suite": "ansible-execution-parser",
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "orjson": module._orjson() is not None,
+        "repeat": repeat,
+        "shape": shape,
+        "input": dict(info, mb=round(size_mb, 2)),
+        "benchmarks": benchmarks,
+        "memory": {
+            "tree_tracemalloc_peak_mb": round(peak / (1024 * 1024), 2),
+            "tree_peak_rss_mb": round(_peak_rss_mb(path, False), 2),
+            "stream_peak_rss_mb": round(_peak_rss_mb(path, True), 2),
+        },
+        "recap_mismatches": len(recap_check.get("mismatches", ())),
+    }
+
+def print_suite(report: Dict, baseline: Optional[Dict] = None):
+    info = report["input"]
+    print(f"Run: {info['results']:,} results, {info['lines']:,} lines, {info['mb']:.1f} MB "
+          f"(commit {report['commit'] or '-'}, Python {report['python']})\n")
+    before = (baseline or {}).get("benchmarks", {})
+    header = f"{'Benchmark':<22} {'Seconds':>9} {'Results/sec':>13} {'MB/s':>8}"
+    if baseline:
+        header += f" {'Baseline':>9} {'Change':>8}"
+    print(header)
+    for name, entry in report["benchmarks"].items():
+        line = f"{name:<22} {entry['seconds']:>9.3f} {entry['results_per_sec']:>13,} {entry.get('mb_per_sec', ''):>8}"
+        if name in before:
+            change = (entry["seconds"] / before[name]["seconds"] - 1) * 100
+            line += f" {before[name]['seconds']:>9.3f} {change:>+7.1f}%"
+        print(line)
+    print()
+    for name, value in report["memory"].items():
+        line = f"{name:<26} {value:>9.1f} MB"
+        old = (baseline or {}).get("memory", {}).get(name)
+        if old:
+            line += f"  (baseline {old:.1f} MB, {(value / old - 1) * 100:+.1f}%)"
+        print(line)
+    if report["recap_mismatches"]:
+        print(f"\nWarning: {report['recap_mismatches']} PLAY RECAP mismatches on a generated run")
+    if baseline and baseline.get("shape") != report["shape"]:
+        print("\nNote: baseline was recorded with a different run shape")
+
+def legacy_classify(line: str):
+    """Baseline: the original parse_line pattern chain"""
+    line = line.strip()
+    if not line or line.startswith('*') or line.startswith('='):
+        return None
+    if re.match(r'PLAY \[(.*?)\]', line):
+        return 'play'
+    if re.match(r'TASK \[(.*?)\]', line):
+        return 'task'
+    if re.match(r'included: (.*?) for (.*)', line):
+        return 'include'
+    if re.match(r'(ok|changed|failed|skipping|fatal): \[(.*?)\]', line):
+        return 'result'
+    if re.match(r'RUNNING HANDLER \[(.*?)\]', line):
+        return 'handler'
+    if line.startswith('PLAY RECAP'):
+        return 'recap'
+    if re.match(r'(\S+)\s+:\s+ok=(\d+)\s+changed=(\d+)\s+unreachable=(\d+)\s+failed=(\d+)', line):
+        return 'recap_host'
+    return None
+
+def current_classify(module):
+    classify_line = module.classify_line
+
+    def classify(line: str):
+        line = line.strip()
+        if not line or line[0] in '*=':
+            return None
+        return classify_line(line)
+    return classify
+
+def time_lines(path: str, func) -> float:
+    start = time.perf_counter()
+    with open(path, 'r') as f:
+        for line in f:
+            func(line)
+    return time.perf_counter() - start
+
+def result_lines(count: int, hosts: int = 40):
+    """Yield TASK headers and per-host results until count results were produced"""
+    host_names = [f"node{i:02d}" for i in range(hosts)]
+    statuses = ["ok", "changed", "ok", "skipping"]
+    produced = 0
+    task = 0
+    yield "PLAY [Memory benchmark] ****"
+    while produced < count:
+        task += 1
+        yield f"TASK [{ROLES[task % len(ROLES)]} : step {task}] ****"
+        for i, host in enumerate(host_names):
+            yield f"{statuses[(task + i) % len(statuses)]}: [{host}]"
+            produced += 1
+            if produced == count:
+                break
+
+def measure_tree_memory(module, count: int, hosts: int) -> float:
+    """Peak traced memory in MB while building the tree for count results"""
+    tracemalloc.start()
+    parser = module.AnsibleExecutionParser()
+    for line in result_lines(count, hosts):
+        parser.parse_line(line)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+def measure_parallel(module, runs: int, size_mb: int, hosts: int):
+    """Time parse_runs() over `runs` generated logs for increasing job counts"""
+    workdir = tempfile.mkdtemp(prefix="ansible-bench-")
+    paths = [os.path.join(workdir, f"run-{i:03d}.log") for i in range(runs)]
+    try:
+        print(f"Generating {runs} synthetic logs of {size_mb} MB in {workdir} ...")
+        for i, path in enumerate(paths):
+            generate_log(path, size_mb, hosts, seed=i)
+        jobs_list = []
+        jobs = 1
+        while jobs < (os.cpu_count() or 1):
+            jobs_list.append(jobs)
+            jobs *= 2
+        jobs_list.append(os.cpu_count() or 1)
+
+        print(f"\n{'Jobs':>4} {'Seconds':>9} {'MB/s':>8} {'Speedup':>8}")
+        baseline = None
+        for jobs in jobs_list:
+            start = time.perf_counter()
+            module.parse_runs(paths, jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"{jobs:>4} {elapsed:>9.2f} {runs * size_mb / elapsed:>8.1f} {baseline / elapsed:>7.2f}x")
+    finally:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(workdir)
+
+def time_read_log(module, path: str) -> float:
+    """Full parse of path through read_log() (byte-level prefilter, mmap or decompression)"""
+    parse_line = module.AnsibleExecutionParser().parse_line
+    start = time.perf_counter()
+    for line in module.read_log(path):
+        parse_line(line)
+    return time.perf_counter() - start
+
+def measure_compression(module, log_path: str, size_mb: float):
+    """Parse throughput of compressed copies of log_path, text layer vs read_log()"""
+    codecs = {"gzip": (gzip.open, ".gz"), "bz2": (bz2.open, ".bz2"), "xz": (lzma.open, ".xz")}
+    try:
+        import zstandard
+        codecs["zstd"] = (lambda path, mode: zstandard.open(path, mode), ".zst")
+    except ImportError:
+        print("zstandard not installed, skipping zstd")
+    print(f"{'Codec':<6} {'Ratio':>6} {'Text layer MB/s':>16} {'read_log MB/s':>14} {'Speedup':>8}")
+    for name, (opener, suffix) in codecs.items():
+        compressed = log_path + suffix
+        with open(log_path, 'rb') as src, opener(compressed, 'wb') as dst:
+            while True:
+                block = src.read(1 << 20)
+                if not block:
+                    break
+                dst.write(block)
+        try:
+            parse_line = module.AnsibleExecutionParser().parse_line
+            start = time.perf_counter()
+            with opener(compressed, 'rt') as f:
+                for line in f:
+                    parse_line(line)
+            baseline = time.perf_counter() - start
+            elapsed = time_read_log(module, compressed)
+            ratio = os.path.getsize(log_path) / os.path.getsize(compressed)
+            print(f"{name:<6} {ratio:>5.1f}x {size_mb / baseline:>16.1f} {size_mb / elapsed:>14.1f} "
+                  f"{baseline / elapsed:>7.2f}x")
+        finally:
+            os.remove(compressed)
+
+def simulate_plays(results: int, hosts: int, seed: int = 42):
+    """Yield (play, tasks) of a synthetic run with timestamps, until results were produced.
+    
+    Each task is (name, start, end, [(host, status, end, msg), ...]).
+    """
+    rng = random.Random(seed)
+    host_names = [f"node{i:02d}" for i in range(hosts)]
+    clock = datetime(2026, 10, 17, 10, 0, 0)
+    produced = 0
+    play = 0
+    while produced < results:
+        play += 1
+        tasks = []
+        for task in range(25):
+            start = clock
+            task_results = []
+            for host in host_names:
+                clock += timedelta(milliseconds=rng.randint(5, 400))
+                roll = rng.random()
+                status = "ok" if roll < 0.6 else "changed" if roll < 0.85 else "skipping" if roll < 0.99 else "failed"
+                task_results.append((host, status, clock, "timeout" if status == "failed" else ""))
+                produced += 1
+            tasks.append((f"{rng.choice(ROLES)} : step {task}", start, clock, task_results))
+            if produced >= results:
+                break
+        yield f"Deploy platform layer {play}", tasks
+
+def _iso(value: datetime) -> str:
+    return value.isoformat() + "Z"
+
+def _json_result(status: str, msg: str) -> dict:
+    result = {"changed": status == "changed", "action": "command"}
+    if status == "failed":
+        result.update(failed=True, msg=msg, rc=1)
+    elif status == "skipping":
+        result.update(skipped=True, skip_reason="Conditional result was False")
+    return result
+
+def write_engine_inputs(workdir: str, results: int, hosts: int) -> dict:
+    """Write one synthetic run as default (text), json and jsonl callback output"""
+    paths = {fmt: os.path.join(workdir, f"run.{fmt}") for fmt in ("text", "json", "jsonl")}
+    stats = {}
+    with open(paths["text"], "w") as text, open(paths["json"], "w") as doc, open(paths["jsonl"], "w") as events:
+        doc.write('{\n    "custom_stats": {},\n    "global_custom_stats": {},\n    "plays": [\n')
+        for play_index, (play, tasks) in enumerate(simulate_plays(results, hosts)):
+            play_span = {"start": _iso(tasks[0][1]), "end": _iso(tasks[-1][2])}
+            text.write(f"PLAY [{play}] " + "*" * 60 + "\n\n")
+            events.write(json.dumps({"_event": "v2_playbook_on_play_start", "_timestamp": play_span["start"],
+                                     "play": {"duration": {"start": play_span["start"]}, "name": play}}) + "\n")
+            entries = []
+            for task, start, end, task_results in tasks:
+                text.write(f"TASK [{task}] " + "*" * 50 + "\n")
+                task_info = {"duration": {"start": _iso(start)}, "name": task}
+                events.write(json.dumps({"_event": "v2_playbook_on_task_start", "_timestamp": _iso(start),
+                                         "hosts": {}, "task": task_info}) + "\n")
+                host_results = {}
+                for host, status, finished, msg in task_results:
+                    result = _json_result(status, msg)
+                    host_results[host] = result
+                    counts = stats.setdefault(host, {"changed": 0, "failures": 0, "ignored": 0, "ok": 0,
+                                                     "rescued": 0, "skipped": 0, "unreachable": 0})
+                    if status == "failed":
+                        text.write(f'fatal: [{host}]: FAILED! => {{"changed": false, "msg": "{msg}", "rc": 1}}\n')
+                        event = "v2_runner_on_failed"
+                        counts["failures"] += 1
+                    else:
+                        text.write(f"{status}: [{host}]\n")
+                        event = "v2_runner_on_skipped" if status == "skipping" else "v2_runner_on_ok"
+                        counts["skipped" if status == "skipping" else "ok"] += 1
+                        counts["changed"] += status == "changed"
+                    events.write(json.dumps({"_event": event, "_timestamp": _iso(finished),
+                                             "hosts": {host: result}, "task": task_info}) + "\n")
+                text.write("\n")
+                entries.append(json.dumps({"hosts": host_results,
+                                           "task": {"duration": {"start": _iso(start), "end": _iso(end)},
+                                                    "name": task}}, indent=4, sort_keys=True))
+            doc.write(("," if play_index else "") + json.dumps({"play": {"duration": play_span, "name": play}},
+                                                               indent=4)[:-2])
+            doc.write(',\n    "tasks": [\n' + ",\n".join(entries) + "\n    ]\n}\n")
+        doc.write('    ],\n    "stats": ' + json.dumps(stats, indent=4, sort_keys=True) + "\n}\n")
+        text.write("PLAY RECAP " + "*" * 60 + "\n")
+        for host, counts in stats.items():
+            text.write(f"{host} : ok={counts['ok']} changed={counts['changed']} unreachable=0 "
+                       f"failed={counts['failures']} skipped={counts['skipped']} rescued=0 ignored=0\n")
+        events.write(json.dumps({"_event": "v2_playbook_on_stats", "stats": stats}) + "\n")
+    return paths
+
+def measure_engines(module, results: int, hosts: int):
+    """Streaming parse time of the same run in each input format"""
+    workdir = tempfile.mkdtemp(prefix="ansible-bench-")
+    try:
+        print(f"Writing a run of {results:,} results as text, json and jsonl in {workdir} ...")
+        paths = write_engine_inputs(workdir, results, hosts)
+        print(f"\n{'Format':<8} {'MB':>8} {'Seconds':>9} {'Results/sec':>13} {'MB/s':>8}  Failed")
+        for fmt, path in paths.items():
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            parser = module.AnsibleExecutionParser(streaming=True)
+            start = time.perf_counter()
+            with open(path) as f:
+                for _ in parser.stream(f):
+                    pass
+            elapsed = time.perf_counter() - start
+            print(f"{parser.input_format:<8} {size_mb:>8.1f} {elapsed:>9.2f} {results / elapsed:>13,.0f} "
+                  f"{size_mb / elapsed:>8.1f}  {parser.metrics['failed_tasks']:,}")
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Ansible execution parser')
+    parser.add_argument('--size-mb', type=int, default=256, help='Size of the synthetic log (default: 256)')
+    parser.add_argument('--hosts', type=int, default=40, help='Number of hosts per task (default: 40)')
+    parser.add_argument('--log', metavar='FILE', help='Reuse or write the synthetic log at this path')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated log')
+    parser.add_argument('--memory', type=int, metavar='RESULTS',
+                        help='Only measure tree memory (tracemalloc peak) for this many result lines')
+    parser.add_argument('--parallel', type=int, metavar='RUNS',
+                        help='Only measure multi-log ingestion speedup over RUNS logs of --size-mb each')
+    parser.add_argument('--compression', action='store_true',
+                        help='Only compare decompression through the text layer with read_log() on compressed copies of the log')
+    parser.add_argument('--engines', type=int, metavar='RESULTS',
+                        help='Only compare the text, json and jsonl input engines on one run of RESULTS results')
+    parser.add_argument('--suite', action='store_true',
+                        help='Run the benchmark suite on a generated run shaped by --plays ... --payload-bytes')
+    parser.add_argument('--plays', type=int, default=4, help='Suite: plays in the run (default: 4)')
+    parser.add_argument('--tasks', type=int, default=50, help='Suite: tasks per play (default: 50)')
+    parser.add_argument('--loop-items', type=int, default=0, metavar='N',
+                        help='Suite: items of the loop every 4th task runs (default: 0, no loops)')
+    parser.add_argument('--failure-ratio', type=float, default=0.01, metavar='R',
+                        help='Suite: share of failed results (default: 0.01)')
+    parser.add_argument('--verbosity', type=int, choices=[0, 1, 2], default=1,
+                        help='Suite: 0 bare results, 1 adds payloads, 2 adds -vv noise (default: 1)')
+    parser.add_argument('--payload-bytes', type=int, default=2048, metavar='N',
+                        help='Suite: size of each failed result payload at verbosity >= 1 (default: 2048)')
+    parser.add_argument('--seed', type=int, default=42, help='Suite: generator seed (default: 42)')
+    parser.add_argument('--repeat', type=int, default=3, help='Suite: keep the best of N timings (default: 3)')
+    parser.add_argument('--results', metavar='FILE', help='Suite: write the results as JSON to FILE')
+    parser.add_argument('--compare', metavar='FILE', help='Suite: show changes against results saved by --results')
+    parser.add_argument('--startup', action='store_true',
+                        help='Only measure module import time (-X importtime) and check it against --import-budget-ms')
+    parser.add_argument('--import-budget-ms', type=float, default=30.0, metavar='MS',
+                        help='Import time budget for --startup (default: 30)')
+    parser.add_argument('--runs', type=int, default=7, help='Interpreter starts measured by --startup (default: 7)')
+    args = parser.parse_args()
+
+    if args.startup:
+        sys.exit(0 if measure_startup(args.runs, args.import_budget_ms) else 1)
+
+    module = load_parser_module()
+
+    if args.suite:
+        shape = {key: getattr(args, key) for key in ("plays", "tasks", "hosts", "loop_items", "failure_ratio",
+                                                     "verbosity", "payload_bytes", "seed")}
+        log_path = args.log or os.path.join(tempfile.gettempdir(), "ansible-bench-suite.log")
+        try:
+            info = generate_run(log_path, **shape)
+            report = run_suite(module, log_path, shape, info, args.repeat)
+        finally:
+            if not args.keep and os.path.exists(log_path):
+                os.remove(log_path)
+        baseline = None
+        if args.compare:
+            with open(args.compare) as f:
+                baseline = json.load(f)
+        print_suite(report, baseline)
+        if args.results:
+            with open(args.results, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nResults written to {args.results}")
+        return
+
+    if args.memory:
+        peak_mb = measure_tree_memory(module, args.memory, args.hosts)
+        print(f"Results: {args.memory:,}  Peak: {peak_mb:.1f} MB  "
+              f"Per million results: {peak_mb * 1_000_000 / args.memory:.1f} MB")
+        return
+
+    if args.engines:
+        measure_engines(module, args.engines, args.hosts)
+        return
+
+    if args.parallel:
+        measure_parallel(module, args.parallel, args.size_mb, args.hosts)
+        return
+
+    log_path = args.log or os.path.join(tempfile.gettempdir(), f"ansible-bench-{args.size_mb}mb.log")
+
+    if args.log and os.path.exists(args.log):
+        with open(log_path) as f:
+            lines = sum(1 for _ in f)
+    else:
+        print(f"Generating {args.size_mb} MB synthetic log at {log_path} ...")
+        lines = generate_log(log_path, args.size_mb, args.hosts)
+    size_mb = os.path.getsize(log_path) / (1024 * 1024)
+    print(f"Log: {lines:,} lines, {size_mb:.1f} MB\n")
+
+    try:
+        if args.compression:
+            measure_compression(module, log_path, size_mb)
+            return
+        results = [
+            ("classify (legacy re.match chain)", time_lines(log_path, legacy_classify)),
+            ("classify (prefix dispatch)", time_lines(log_path, current_classify(module))),
+            ("parse_line (full parser)", time_lines(log_path, module.AnsibleExecutionParser().parse_line)),
+            ("read_log + parse_line (prefilter)", time_read_log(module, log_path)),
+        ]
+    finally:
+        if not args.keep and not args.log:
+            os.remove(log_path)
+
+    print(f"{'Benchmark':<36} {'Seconds':>9} {'Lines/sec':>14} {'MB/s':>8}")
+    for name, elapsed in results:
+        print(f"{name:<36} {elapsed:>9.2f} {lines / elapsed:>14,.0f} {size_mb / elapsed:>8.1f}")
+
+    speedup = results[0][1] / results[1][1]
+    print(f"\nClassifier speedup: {speedup:.2f}x")
+
+if __name__ == "__main__":
+    main()
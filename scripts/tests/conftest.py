@@ -0,0 +1,7 @@
+"""Shared setup for the parser tests: make scripts/ importable"""
+
+import sys
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SCRIPTS_DIR))
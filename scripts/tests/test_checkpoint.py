@@ -0,0 +1,75 @@
+"""parse_incremental(): resuming a growing log from a checkpoint"""
+
+import pickle
+
+from ansible_execution_parser import CHECKPOINT_FORMAT, AnsibleExecutionParser, parse_incremental, read_log
+
+FIRST = """\
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | PLAY [Deploy platform] ****************************
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Apply manifests] **********
+2026-10-17 10:00:04,000 p=1 u=ansible n=ansible | changed: [node01]
+2026-10-17 10:00:05,000 p=1 u=ansible n=ansible | fatal: [node02]: FAILED! => {"changed": false, "msg": "manifest rejected"}
+"""
+SECOND = """\
+2026-10-17 10:00:05,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Wait for rollout] *********
+2026-10-17 10:00:12,000 p=1 u=ansible n=ansible | ok: [node01]
+2026-10-17 10:00:12,000 p=1 u=ansible n=ansible | PLAY RECAP ****************************************
+2026-10-17 10:00:12,000 p=1 u=ansible n=ansible | node01 : ok=2 changed=1 unreachable=0 failed=0 skipped=0
+2026-10-17 10:00:12,000 p=1 u=ansible n=ansible | node02 : ok=0 changed=0 unreachable=0 failed=1 skipped=0
+"""
+
+
+def full_parse(path):
+    parser = AnsibleExecutionParser()
+    parser.parse(read_log(str(path)))
+    parser.finalize_metrics()
+    return parser
+
+
+def incremental(log, checkpoint):
+    parser = AnsibleExecutionParser()
+    return parser, parse_incremental(str(log), str(checkpoint), parser)
+
+
+def test_resumed_parse_matches_full_parse(tmp_path):
+    log, checkpoint = tmp_path / "deploy.log", tmp_path / "deploy.ckpt"
+    log.write_text(FIRST)
+    _, first = incremental(log, checkpoint)
+    assert (first['mode'], first['reason']) == ('full', "no checkpoint yet")
+    with open(log, 'a') as f:
+        f.write(SECOND)
+    resumed, second = incremental(log, checkpoint)
+    assert (second['mode'], second['start'], second['end']) == ('incremental', len(FIRST), len(FIRST + SECOND))
+    assert resumed.metrics == full_parse(log).metrics
+    assert resumed.metrics['failed_hosts'] == ['node02']
+
+
+class Payload:
+    def __init__(self, marker):
+        self.marker = marker
+
+    def __reduce__(self):
+        return open, (self.marker, 'w')
+
+
+def test_checkpoint_referencing_other_globals_is_refused(tmp_path):
+    log, checkpoint = tmp_path / "deploy.log", tmp_path / "deploy.ckpt"
+    marker = tmp_path / "loaded"
+    log.write_text(FIRST + SECOND)
+    checkpoint.write_bytes(pickle.dumps({'format': CHECKPOINT_FORMAT, 'parser': Payload(str(marker))}))
+    parser, info = incremental(log, checkpoint)
+    assert (info['mode'], info['reason'], info['start']) == ('full', "unreadable checkpoint (UnpicklingError)", 0)
+    assert not marker.exists()
+    assert parser.metrics == full_parse(log).metrics
+
+
+def test_checkpoint_of_a_rewritten_log_is_not_used(tmp_path):
+    log, checkpoint = tmp_path / "deploy.log", tmp_path / "deploy.ckpt"
+    log.write_text(FIRST)
+    incremental(log, checkpoint)
+    # Same size up to the checkpoint, but another run: node03 instead of node01
+    log.write_text(FIRST.replace('node01', 'node03') + SECOND)
+    parser, info = incremental(log, checkpoint)
+    assert (info['mode'], info['reason'], info['start']) == ('full', "log was rotated or rewritten", 0)
+    assert parser.metrics == full_parse(log).metrics
+    assert 'node01' in parser.metrics['total_hosts'] and 'node03' in parser.metrics['total_hosts']
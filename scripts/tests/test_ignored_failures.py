@@ -0,0 +1,71 @@
+"""Failures under ignore_errors ("...ignoring") count as ignored in every view"""
+
+import pytest
+
+from ansible_execution_parser import AnsibleExecutionParser, ExecutionTimeline, FailureAlerter, RunIndex
+
+IGNORED_FAILURE = """\
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | PLAY [Deploy platform] ****************************
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Probe endpoint] ***********
+2026-10-17 10:00:03,000 p=1 u=ansible n=ansible | fatal: [node01]: FAILED! => {"changed": false, "msg": "connection refused"}
+2026-10-17 10:00:03,000 p=1 u=ansible n=ansible | ...ignoring
+2026-10-17 10:00:04,000 p=1 u=ansible n=ansible | ok: [node02]
+2026-10-17 10:00:04,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Deploy] *******************
+2026-10-17 10:00:09,000 p=1 u=ansible n=ansible | changed: [node01]
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | changed: [node02]
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | PLAY RECAP ****************************************
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | node01 : ok=2 changed=1 unreachable=0 failed=0 skipped=0 rescued=0 ignored=1
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | node02 : ok=2 changed=1 unreachable=0 failed=0 skipped=0 rescued=0 ignored=0
+"""
+
+
+class RecordingDispatcher:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, build):
+        self.sent.append(build)
+
+
+def parse(streaming=False):
+    parser = AnsibleExecutionParser(streaming=streaming)
+    index = RunIndex(parser)
+    dispatcher = RecordingDispatcher()
+    alerter = FailureAlerter(parser, dispatcher, interval=3600)
+    parser.parse(IGNORED_FAILURE.splitlines())
+    parser.finalize_metrics()
+    index.finish()
+    alerter.flush()
+    return parser, index, dispatcher
+
+
+def test_result_and_task_are_not_failed():
+    parser, _, _ = parse()
+    play = parser.root.children[0]
+    probe = play.children[0]
+    result = probe.children[0]
+    assert (result.host, result.status, result.failed) == ('node01', 'ignored', False)
+    assert probe.failed is False
+    assert parser.metrics['failed_tasks'] == 0
+    assert not parser.metrics['failed_hosts']
+    assert parser.metrics['status_counts']['ignored'] == 1
+    assert not parser.metrics['recap_check']['mismatches']
+    assert {task['name']: task['status'] for task in parser.metrics['slowest_tasks']} == {
+        'platform/mlflow : Probe endpoint': 'success',
+        'platform/mlflow : Deploy': 'success',
+    }
+
+
+@pytest.mark.parametrize('streaming', [False, True])
+def test_index_and_alerts_see_an_ignored_result(streaming):
+    _, index, dispatcher = parse(streaming)
+    assert index.query('status=failed') == []
+    [row] = index.query('status=ignored')
+    assert index.row(row)['host'] == 'node01'
+    assert dispatcher.sent == []
+
+
+def test_timeline_counts_no_failures():
+    parser, _, _ = parse()
+    summary = ExecutionTimeline(parser).summary()
+    assert all(host['failed'] == 0 for host in summary['hosts'])
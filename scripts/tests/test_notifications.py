@@ -0,0 +1,191 @@
+"""NotificationDispatcher against a local stub HTTP server"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ansible_execution_parser import NotificationDispatcher, NotificationSink, alert_payload, summary_payload
+
+METRICS = {
+    'success_rate': 50.0,
+    'total_duration': 12.5,
+    'total_tasks': 4,
+    'failed_tasks': 1,
+    'changed_tasks': 2,
+    'total_hosts': ['node01', 'node02'],
+    'failed_hosts': ['node02'],
+    'status_counts': {'ok': 2, 'changed': 2, 'failed': 1},
+}
+
+
+class StubServer:
+    """Answers each path with scripted (status, headers, delay) responses, then 200"""
+
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append((self.path, body))
+                script = stub.responses.get(self.path, [])
+                status, headers, delay = script.pop(0) if script else (200, {}, 0)
+                time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def attempts(self, path):
+        return [body for request_path, body in self.requests if request_path == path]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def deliver(sinks, build, **options):
+    options.setdefault('backoff', 0.01)
+    dispatcher = NotificationDispatcher(sinks, **options)
+    dispatcher.send(build)
+    return dispatcher.close(timeout=30)
+
+
+def test_retries_server_errors_until_delivered(stub):
+    stub.responses['/hook'] = [(500, {}, 0)]
+    sink = NotificationSink('webhook', stub.url('/hook'))
+    assert deliver([sink], lambda sink: summary_payload(sink, METRICS)) == [(sink, None)]
+    attempts = stub.attempts('/hook')
+    assert len(attempts) == 2
+    assert attempts[0] == attempts[1] == {
+        'event': 'summary',
+        'ok': False,
+        'metrics': METRICS,
+    }
+
+
+def test_honours_retry_after_on_429(stub):
+    stub.responses['/hook'] = [(429, {'Retry-After': '1'}, 0)]
+    sink = NotificationSink('webhook', stub.url('/hook'))
+    started = time.monotonic()
+    assert deliver([sink], lambda sink: {'event': 'test'}) == [(sink, None)]
+    assert time.monotonic() - started >= 1.0
+    assert len(stub.attempts('/hook')) == 2
+
+
+def test_gives_up_after_retries(stub):
+    stub.responses['/hook'] = [(503, {}, 0)] * 5
+    sink = NotificationSink('webhook', stub.url('/hook'))
+    assert deliver([sink], lambda sink: {'event': 'test'}, retries=2) == [(sink, 'HTTP 503')]
+    assert len(stub.attempts('/hook')) == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    stub.responses['/hook'] = [(400, {}, 0)]
+    sink = NotificationSink('webhook', stub.url('/hook'))
+    assert deliver([sink], lambda sink: {'event': 'test'}) == [(sink, 'HTTP 400')]
+    assert len(stub.attempts('/hook')) == 1
+
+
+def test_timeouts_are_retried_then_reported(stub):
+    stub.responses['/slow'] = [(200, {}, 1.0)] * 2
+    sink = NotificationSink('webhook', stub.url('/slow'))
+    [(_, error)] = deliver([sink], lambda sink: {'event': 'test'}, timeout=0.2, retries=1)
+    assert error is not None and 'timed out' in error.lower()
+    assert len(stub.attempts('/slow')) == 2
+
+
+def test_each_sink_gets_its_own_payload_format(stub):
+    sinks = [
+        NotificationSink('slack', stub.url('/slack'), '#deploys'),
+        NotificationSink('teams', stub.url('/teams')),
+        NotificationSink('webhook', stub.url('/webhook')),
+    ]
+    assert [error for _, error in deliver(sinks, lambda sink: summary_payload(sink, METRICS))] == [None] * 3
+
+    [slack] = stub.attempts('/slack')
+    assert slack['channel'] == '#deploys'
+    [attachment] = slack['attachments']
+    assert attachment['color'] == 'danger'
+    assert {field['title']: field['value'] for field in attachment['fields']} == {
+        'Success Rate': '50.0%',
+        'Duration': '12.5s',
+        'Total Tasks': '4',
+        'Failed Tasks': '1',
+        'Hosts': 'node01, node02',
+    }
+
+    [teams] = stub.attempts('/teams')
+    assert teams['@type'] == 'MessageCard'
+    assert teams['themeColor'] == 'D00000'
+    assert teams['sections'][0]['facts'][0] == {'name': 'Success Rate', 'value': '50.0%'}
+
+    [webhook] = stub.attempts('/webhook')
+    assert webhook == {'event': 'summary', 'ok': False, 'metrics': METRICS}
+
+
+def test_failure_alerts(stub):
+    failures = [{'host': 'node02', 'task': 'platform/mlflow : deploy', 'summary': 'rc=1'}]
+    sinks = [NotificationSink('slack', stub.url('/slack')), NotificationSink('webhook', stub.url('/webhook'))]
+    deliver(sinks, lambda sink: alert_payload(sink, failures))
+    [slack] = stub.attempts('/slack')
+    assert slack['attachments'][0]['title'] == '❌ 1 new Ansible failure'
+    assert slack['attachments'][0]['text'] == 'node02: platform/mlflow : deploy - rc=1'
+    assert stub.attempts('/webhook') == [{'event': 'failures', 'failures': failures}]
+
+
+def test_malformed_sink_url_is_reported_not_raised():
+    sink = NotificationSink('webhook', 'not a url')
+    [(reported, error)] = deliver([sink], lambda sink: {'event': 'test'})
+    assert reported == sink and error
+
+
+def test_unreachable_sink_is_reported_not_raised():
+    import socket
+    # A port nothing listens on: bind, read the number, close
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    sink = NotificationSink('slack', f'http://127.0.0.1:{port}/hook')
+    [(_, error)] = deliver([sink], lambda sink: summary_payload(sink, METRICS), retries=1, timeout=2)
+    assert error
+
+
+def test_unencodable_payload_is_reported_not_raised(stub):
+    sink = NotificationSink('webhook', stub.url('/hook'))
+    [(_, error)] = deliver([sink], lambda sink: {'event': object()})
+    assert error
+    assert stub.attempts('/hook') == []
+
+
+def test_slack_notification_survives_bad_url(capsys):
+    from ansible_execution_parser import AnsibleExecutionParser
+    parser = AnsibleExecutionParser()
+    parser.parse(["PLAY [p] ***", "TASK [t] ***", "ok: [node01]"])
+    parser.finalize_metrics()
+    assert parser.send_slack_notification('http://[::1') is False
+    assert 'Failed to send Slack notification' in capsys.readouterr().out
@@ -0,0 +1,33 @@
+"""Import-time budget of ansible_execution_parser (see benchmark --startup)"""
+
+import importlib.util
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+# Generous for shared CI runners; the module imports in ~10 ms locally
+IMPORT_BUDGET_MS = 30
+
+
+def load_benchmark():
+    spec = importlib.util.spec_from_file_location("benchmark_ansible_parser",
+                                                  SCRIPTS_DIR / "benchmark-ansible-parser.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_import_stays_within_budget():
+    benchmark = load_benchmark()
+    assert benchmark.measure_startup(runs=5, budget_ms=IMPORT_BUDGET_MS)
+
+
+def test_optional_modules_are_imported_lazily():
+    benchmark = load_benchmark()
+    # Only what the import adds: site may have loaded some modules already
+    code = (f"import sys; sys.path.insert(0, {str(SCRIPTS_DIR)!r}); before = set(sys.modules); "
+            "import ansible_execution_parser; print(' '.join(set(sys.modules) - before))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    eager = set(result.stdout.split()) & set(benchmark.LAZY_MODULES)
+    assert not eager, f"imported at module load: {', '.join(sorted(eager))}"
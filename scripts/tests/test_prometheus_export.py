@@ -0,0 +1,72 @@
+"""PrometheusExporter output that must not depend on the rendering machine"""
+
+import calendar
+import json
+import time
+
+import pytest
+
+from ansible_execution_parser import AnsibleExecutionParser, PrometheusExporter
+
+END = calendar.timegm((2026, 10, 17, 10, 0, 10))
+
+# Callback times carry "Z"
+JSON_CALLBACK = json.dumps({
+    "plays": [{
+        "play": {"name": "Deploy platform",
+                 "duration": {"start": "2026-10-17T10:00:00.000000Z", "end": "2026-10-17T10:00:10.000000Z"}},
+        "tasks": [{
+            "task": {"name": "platform/mlflow : Deploy",
+                     "duration": {"start": "2026-10-17T10:00:00.000000Z", "end": "2026-10-17T10:00:10.000000Z"}},
+            "hosts": {"node01": {"changed": True}},
+        }],
+    }],
+    "stats": {"node01": {"ok": 1, "changed": 1, "unreachable": 0, "failures": 0, "skipped": 0}},
+})
+
+# ANSIBLE_LOG_PATH times have no offset and are read as UTC
+LOG_PATH = """\
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | PLAY [Deploy platform] ****************************
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Deploy] *******************
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | changed: [node01]
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | PLAY RECAP ****************************************
+2026-10-17 10:00:10,000 p=1 u=ansible n=ansible | node01 : ok=1 changed=1 unreachable=0 failed=0 skipped=0
+"""
+
+# profile_tasks prints the control node's local time with its offset
+PROFILE_TASKS = """\
+PLAY [Deploy platform] *********************************************************
+
+TASK [platform/mlflow : Deploy] ************************************************
+Saturday 17 October 2026  12:00:00 +0200 (0:00:00.000)       0:00:00.000 *******
+changed: [node01]
+
+PLAY RECAP *********************************************************************
+node01                     : ok=1    changed=1    unreachable=0    failed=0    skipped=0
+Saturday 17 October 2026  12:00:10 +0200 (0:00:10.000)       0:00:10.000 *******
+"""
+
+
+def end_timestamp(text):
+    parser = AnsibleExecutionParser()
+    exporter = PrometheusExporter(parser)
+    parser.parse(text.splitlines())
+    parser.finalize_metrics()
+    for line in exporter.render(parser.metrics).splitlines():
+        if line.startswith('ansible_run_end_timestamp_seconds '):
+            return float(line.split()[1])
+    raise AssertionError("no ansible_run_end_timestamp_seconds sample")
+
+
+@pytest.fixture(params=['UTC', 'America/New_York', 'Asia/Kolkata'])
+def local_timezone(request, monkeypatch):
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize('text', [JSON_CALLBACK, LOG_PATH, PROFILE_TASKS], ids=['json', 'log_path', 'profile_tasks'])
+def test_end_timestamp_is_independent_of_local_timezone(text, local_timezone):
+    assert end_timestamp(text) == END
@@ -0,0 +1,29 @@
+"""Recap "rescued" counts move failures out of "failed" without exceeding them"""
+
+from ansible_execution_parser import AnsibleExecutionParser
+
+# node01's recap claims more rescued failures than the log shows: the
+# earlier one was cut off, e.g. by log rotation
+RESCUED_FAILURE = """\
+PLAY [Deploy platform] ****************************
+TASK [platform/mlflow : Apply manifests] **********
+fatal: [node01]: FAILED! => {"changed": false, "msg": "manifest rejected"}
+fatal: [node02]: FAILED! => {"changed": false, "msg": "manifest rejected"}
+TASK [platform/mlflow : Roll back] ****************
+changed: [node01]
+changed: [node02]
+PLAY RECAP ****************************************
+node01 : ok=1 changed=1 unreachable=0 failed=0 skipped=0 rescued=2 ignored=0
+node02 : ok=1 changed=1 unreachable=0 failed=0 skipped=0 rescued=1 ignored=0
+"""
+
+
+def test_rescued_is_clamped_to_matrix_failures():
+    parser = AnsibleExecutionParser()
+    parser.parse(RESCUED_FAILURE.splitlines())
+    parser.finalize_metrics()
+    counts = parser.metrics['status_counts']
+    assert (counts['failed'], counts['rescued']) == (0, 2)
+    assert parser.metrics['failed_tasks'] == 0
+    assert not parser.metrics['failed_hosts']
+    assert sum(counts.values()) == parser.metrics['total_operations']
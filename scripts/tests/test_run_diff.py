@@ -0,0 +1,92 @@
+"""diff_runs(): aligning two runs by (play, task, occurrence) and host"""
+
+import json
+
+from ansible_execution_parser import diff_runs, load_run_index, main
+
+PREFIX = "2026-10-17 10:00:{:02d},000 p=1 u=ansible n=ansible | "
+
+
+def run_log(tmp_path, name, lines):
+    """A timed log from (second, line) pairs"""
+    path = tmp_path / name
+    path.write_text("".join(PREFIX.format(second) + line + "\n" for second, line in lines))
+    return str(path)
+
+
+# "Restart service" runs twice; the current run inserts a task before the
+# second restart, fails it on web01, and no longer runs "Smoke test"
+BASELINE = [
+    (0, "PLAY [Deploy platform] ****"),
+    (0, "TASK [common : Restart service] ****"),
+    (2, "changed: [web01]"),
+    (2, "changed: [db01]"),
+    (2, "TASK [platform/mlflow : Apply manifests] ****"),
+    (4, "ok: [web01]"),
+    (4, "ok: [db01]"),
+    (4, "TASK [common : Restart service] ****"),
+    (6, "changed: [web01]"),
+    (6, "changed: [db01]"),
+    (6, "TASK [platform/mlflow : Smoke test] ****"),
+    (8, "ok: [web01]"),
+]
+CURRENT = [
+    (0, "PLAY [Deploy platform] ****"),
+    (0, "TASK [common : Restart service] ****"),
+    (2, "changed: [web01]"),
+    (2, "changed: [db01]"),
+    (2, "TASK [platform/mlflow : Apply manifests] ****"),
+    (4, "ok: [web01]"),
+    (4, "ok: [db01]"),
+    (4, "TASK [platform/mlflow : Migrate database] ****"),
+    (5, "changed: [db01]"),
+    (5, "TASK [common : Restart service] ****"),
+    (25, 'fatal: [web01]: FAILED! => {"changed": false, "msg": "timed out"}'),
+    (25, "changed: [db01]"),
+]
+
+
+def diff(tmp_path, **options):
+    return diff_runs(load_run_index(run_log(tmp_path, "baseline.log", BASELINE)),
+                     load_run_index(run_log(tmp_path, "current.log", CURRENT)), **options)
+
+
+def test_repeated_task_pairs_by_occurrence(tmp_path):
+    result = diff(tmp_path)
+    assert result['status_changes'] == [{'play': 'Deploy platform', 'task': 'common : Restart service',
+                                         'occurrence': 1, 'host': 'web01', 'from': 'changed', 'to': 'fatal'}]
+    assert result['transitions'] == {'changed -> fatal': 1}
+    assert result['summary']['new_failures'] == 1
+    [slower] = [entry for entry in result['tasks'] if entry['change'] == 'slower']
+    assert (slower['task'], slower['occurrence'], slower['baseline'], slower['current']) == \
+        ('common : Restart service', 1, 2.0, 20.0)
+    first = [entry for entry in result['tasks'] if entry['task'] == 'common : Restart service'
+             and entry['occurrence'] == 0]
+    assert [(entry['baseline'], entry['current'], entry['change']) for entry in first] == [(2.0, 2.0, None)]
+
+
+def test_added_and_removed_tasks(tmp_path):
+    result = diff(tmp_path)
+    summary = result['summary']
+    assert (summary['tasks_matched'], summary['tasks_added'], summary['tasks_removed']) == (3, 1, 1)
+    [added] = result['tasks_added']
+    assert (added['task'], added['occurrence'], added['hosts'], added['failed']) == \
+        ('platform/mlflow : Migrate database', 0, 1, 0)
+    [removed] = result['tasks_removed']
+    assert (removed['task'], removed['hosts'], removed['duration']) == ('platform/mlflow : Smoke test', 1, 2.0)
+    # Only results of matched tasks are compared: 2 hosts x 3 tasks
+    assert summary['results_compared'] == 6
+    assert not result['hosts_added'] and not result['hosts_removed']
+
+
+def test_cli_diff_json_and_exit_code(tmp_path, capsys):
+    baseline = run_log(tmp_path, "baseline.log", BASELINE)
+    current = run_log(tmp_path, "current.log", CURRENT)
+    output = tmp_path / "diff.json"
+    assert main(['--diff', baseline, current, '--diff-json', str(output), '--quiet']) == 1
+    assert json.loads(output.read_text())['summary']['new_failures'] == 1
+    assert main(['--diff', baseline, baseline]) == 0
+    out = capsys.readouterr().out
+    assert "Restart service (#2)" not in out
+    assert main(['--diff', baseline, current]) == 1
+    assert "Deploy platform / common : Restart service (#2)" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+"""Events of AnsibleExecutionParser.stream() and --stream --jsonl"""
+
+import subprocess
+import sys
+
+from ansible_execution_parser import AnsibleExecutionParser
+from conftest import SCRIPTS_DIR
+
+PROFILE_TASKS = """\
+PLAY [Deploy platform] *********************************************************
+
+TASK [platform/mlflow : Apply manifests] ***************************************
+Saturday 17 October 2026  10:00:00 +0000 (0:00:00.000)       0:00:00.000 *******
+changed: [node01]
+
+TASK [platform/mlflow : Wait for rollout] **************************************
+Saturday 17 October 2026  10:00:12 +0000 (0:00:12.000)       0:00:12.000 *******
+ok: [node01]
+
+PLAY RECAP *********************************************************************
+node01                     : ok=2    changed=1    unreachable=0    failed=0    skipped=0
+Saturday 17 October 2026  10:00:20 +0000 (0:00:08.000)       0:00:20.000 *******
+"""
+
+
+def events(text):
+    return list(AnsibleExecutionParser(streaming=True).stream(text.splitlines()))
+
+
+def test_task_timing_comes_with_task_end():
+    stream = events(PROFILE_TASKS)
+    headers = [event for event in stream if event['event'] == 'task']
+    assert len(headers) == 2
+    assert not any('start_time' in event or 'duration' in event for event in headers)
+    ends = [event for event in stream if event['event'] == 'task_end']
+    assert [event['name'] for event in ends] == [event['name'] for event in headers]
+    assert [(event['start_time'], event['duration']) for event in ends] == [
+        ('2026-10-17T10:00:00', 12.0),
+        ('2026-10-17T10:00:12', 8.0),
+    ]
+
+
+def test_closed_jsonl_pipe_exits_quietly(tmp_path):
+    log = tmp_path / "large.log"
+    lines = ["PLAY [Deploy platform] ****"]
+    for task in range(2000):
+        lines.append(f"TASK [platform/mlflow : Step {task}] ****")
+        lines.extend(f"ok: [node{host:02d}]" for host in range(5))
+    log.write_text("\n".join(lines) + "\n")
+    # Like "| head -1": read one event, then close the pipe
+    process = subprocess.Popen([sys.executable, str(SCRIPTS_DIR / "parse-ansible-execution.py"), str(log),
+                                "--stream", "--jsonl", "-"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert process.stdout.readline().startswith(b'{"event": "play"')
+    process.stdout.close()
+    stderr = process.stderr.read()
+    assert process.wait(timeout=60) == 141
+    assert stderr == b""
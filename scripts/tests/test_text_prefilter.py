@@ -0,0 +1,81 @@
+"""Byte-level line prefilter of read_log() against unfiltered parsing"""
+
+from ansible_execution_parser import AnsibleExecutionParser, read_log
+
+# A -vv failure whose payload is cut off by other output before its closing
+# brace; the indented lines after the interruption are not part of it
+INTERRUPTED_PAYLOAD = """\
+PLAY [Deploy platform] *********************************************************
+
+TASK [platform/mlflow : Apply manifests] ***************************************
+Saturday 17 October 2026  10:00:00 +0000 (0:00:00.000)       0:00:00.000 *******
+fatal: [node01]: FAILED! => {
+    "changed": false,
+    "msg": "manifest rejected",
+Using module file /usr/lib/python3/dist-packages/ansible/modules/command.py
+    this indented text is SSH noise, not payload
+    "rc": 99
+ok: [node02]
+
+TASK [platform/mlflow : Wait for rollout] **************************************
+Saturday 17 October 2026  10:00:12 +0000 (0:00:12.000)       0:00:12.000 *******
+ok: [node01] => {
+    "changed": false,
+    "msg": "rolled out"
+}
+META: role_complete for node01
+    more noise after a complete payload
+
+Saturday 17 October 2026  10:00:20 +0000 (0:00:08.000)       0:00:20.000 *******
+
+PLAY RECAP *********************************************************************
+node01                     : ok=1    changed=0    unreachable=0    failed=1    skipped=0    rescued=0    ignored=0
+node02                     : ok=1    changed=0    unreachable=0    failed=0    skipped=0    rescued=0    ignored=0
+"""
+
+
+def results(parser):
+    found = []
+
+    def walk(node):
+        for child in node.children:
+            if child.task_type == "result":
+                found.append((child.host, child.status, child.details))
+            walk(child)
+
+    walk(parser.root)
+    return found
+
+
+def parse_file(path):
+    parser = AnsibleExecutionParser(payload_statuses=('failed', 'fatal', 'ok'))
+    parser.parse(read_log(path))
+    parser.finalize_metrics()
+    return parser
+
+
+def parse_unfiltered(text):
+    parser = AnsibleExecutionParser(payload_statuses=('failed', 'fatal', 'ok'))
+    parser.parse(text.splitlines())
+    parser.finalize_metrics()
+    return parser
+
+
+def test_interrupted_payload_matches_unfiltered_parse(tmp_path):
+    log = tmp_path / "interrupted.log"
+    log.write_text(INTERRUPTED_PAYLOAD)
+    filtered, unfiltered = parse_file(log), parse_unfiltered(INTERRUPTED_PAYLOAD)
+    assert results(filtered) == results(unfiltered)
+    failure = results(filtered)[0]
+    assert failure[:2] == ('node01', 'fatal')
+    assert failure[2] == '{\n    "changed": false,\n    "msg": "manifest rejected",'
+    assert filtered.metrics == unfiltered.metrics
+
+
+def test_payload_is_not_extended_across_chunks(tmp_path, monkeypatch):
+    import ansible_execution_parser
+    # Tiny chunks put the interruption and the indented noise in different chunks
+    monkeypatch.setattr(ansible_execution_parser, 'READ_CHUNK_SIZE', 64)
+    log = tmp_path / "interrupted.log"
+    log.write_text(INTERRUPTED_PAYLOAD)
+    assert results(parse_file(log)) == results(parse_unfiltered(INTERRUPTED_PAYLOAD))
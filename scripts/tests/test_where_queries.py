@@ -0,0 +1,86 @@
+"""RunIndex --where expressions: parsing, evaluation and CLI errors"""
+
+import re
+
+import pytest
+
+from ansible_execution_parser import AnsibleExecutionParser, RunIndex, main
+
+RUN = """\
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | PLAY [Prepare hosts] ******************************
+2026-10-17 10:00:00,000 p=1 u=ansible n=ansible | TASK [common : Install packages] ******************
+2026-10-17 10:00:20,000 p=1 u=ansible n=ansible | changed: [web01]
+2026-10-17 10:00:30,000 p=1 u=ansible n=ansible | ok: [db01]
+2026-10-17 10:00:30,000 p=1 u=ansible n=ansible | PLAY [Deploy platform] ****************************
+2026-10-17 10:00:30,000 p=1 u=ansible n=ansible | TASK [platform/mlflow : Apply manifests] **********
+2026-10-17 10:00:32,000 p=1 u=ansible n=ansible | fatal: [web01]: FAILED! => {"changed": false, "msg": "manifest rejected"}
+2026-10-17 10:00:33,000 p=1 u=ansible n=ansible | skipping: [db01]
+2026-10-17 10:00:33,000 p=1 u=ansible n=ansible | PLAY RECAP ****************************************
+2026-10-17 10:00:33,000 p=1 u=ansible n=ansible | web01 : ok=0 changed=1 unreachable=0 failed=1 skipped=0
+2026-10-17 10:00:33,000 p=1 u=ansible n=ansible | db01 : ok=1 changed=0 unreachable=0 failed=0 skipped=1
+"""
+
+
+@pytest.fixture(scope='module')
+def index():
+    parser = AnsibleExecutionParser()
+    index = RunIndex(parser)
+    parser.parse(RUN.splitlines())
+    parser.finalize_metrics()
+    index.finish()
+    return index
+
+
+def matches(index, where):
+    return [(entry['host'], entry['status']) for entry in map(index.row, index.query(where))]
+
+
+@pytest.mark.parametrize('where, expected', [
+    ('status=failed', [('web01', 'fatal')]),
+    ('host=db01', [('db01', 'ok'), ('db01', 'skipping')]),
+    ('host~"web*" and not status=changed', [('web01', 'fatal')]),
+    ('role=common', [('web01', 'changed'), ('db01', 'ok')]),
+    ("play='Deploy platform' and status!=skipping", [('web01', 'fatal')]),
+    ('task~*manifests or host=db01 and status=ok', [('db01', 'ok'), ('web01', 'fatal'), ('db01', 'skipping')]),
+    ('(task~*manifests or host=db01) and status=ok', [('db01', 'ok')]),
+    ('duration>=20s', [('web01', 'changed'), ('db01', 'ok')]),
+    ('duration<3 and not duration=1', [('web01', 'fatal')]),
+    ('STATUS=ok OR Status=changed', [('web01', 'changed'), ('db01', 'ok')]),
+])
+def test_evaluation(index, where, expected):
+    assert matches(index, where) == expected
+
+
+@pytest.mark.parametrize('where, message', [
+    ('status=failed and (host=web01', "expected ) in --where"),
+    ('status=failed and', "expected term in --where, got end"),
+    ('status=failed host=web01', "expected end in --where, got term"),
+    ('colour=red', "unknown field 'colour'"),
+    ('host>web01', "host does not support >"),
+    ('duration>slow', "duration needs a number of seconds"),
+    ('=failed', "cannot parse --where at"),
+])
+def test_malformed_expressions_raise_value_error(index, where, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        index.query(where)
+
+
+def test_malformed_where_is_a_usage_error(tmp_path, capsys):
+    log = tmp_path / "run.log"
+    log.write_text(RUN)
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(log), '--where', 'status=failed and (', '--quiet'])
+    assert exit_info.value.code == 2
+    err = capsys.readouterr().err
+    assert "error: --where: expected term in --where, got end" in err
+    assert "Traceback" not in err
+
+
+def test_malformed_where_on_a_saved_index(tmp_path, capsys):
+    log, saved = tmp_path / "run.log", tmp_path / "run.index.json"
+    log.write_text(RUN)
+    main([str(log), '--index', str(saved), '--quiet'])  # 1: the run has a failure
+    assert main(['--query-index', str(saved), '--where', 'host=']) == 1
+    assert "Error: cannot parse --where at: 'host='" in capsys.readouterr().err
+    assert main(['--query-index', str(saved), '--where', 'status=failed']) == 0
+    assert "1 result(s) where status=failed" in capsys.readouterr().out